@@ -0,0 +1,707 @@
+-- ==========================================================
+-- PERFORMANCE TABLES FOR MONEYMINDER
+-- Run this after Physical_Schema_Definition.sql and
+-- Notifications_Schema.sql
+--
+-- Safe to re-run: tables are only created when missing, every
+-- function, procedure and trigger is dropped and recreated so
+-- changed definitions take effect, and the backfills recalculate
+-- the aggregates from Transactions.
+-- ==========================================================
+
+USE MoneyMinder_DB;
+
+-- ==========================================================
+-- 1. USER DATA VERSIONS TABLE
+-- One counter per user, incremented by every write to the
+-- user's accounts, transactions, budgets, recurring payments,
+-- categories or groups. Read endpoints derive their ETag from it.
+-- ==========================================================
+
+CREATE TABLE IF NOT EXISTS User_Data_Versions (
+    user_id INT PRIMARY KEY,
+    version BIGINT UNSIGNED NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    
+    FOREIGN KEY (user_id) REFERENCES Users(user_id) ON DELETE CASCADE
+);
+
+-- ==========================================================
+-- 2. DAILY CATEGORY ROLLUPS
+-- One row per user, category and day holding that day's count,
+-- sum, min and max, plus running totals (cum_count, cum_total)
+-- over every earlier day. The total for any date range is then
+-- the running total at its last day minus the running total
+-- before its first day: two index lookups per category,
+-- whatever the width of the range.
+-- ==========================================================
+
+CREATE TABLE IF NOT EXISTS Daily_Category_Rollups (
+    user_id INT NOT NULL,
+    category_id INT NOT NULL,
+    day DATE NOT NULL,
+    txn_count INT NOT NULL DEFAULT 0,
+    total_amount DECIMAL(19, 2) NOT NULL DEFAULT 0.00,
+    min_amount DECIMAL(15, 2),
+    max_amount DECIMAL(15, 2),
+    cum_count BIGINT NOT NULL DEFAULT 0,
+    cum_total DECIMAL(19, 2) NOT NULL DEFAULT 0.00,
+    
+    PRIMARY KEY (user_id, category_id, day),
+    INDEX idx_rollups_user_day (user_id, day),
+    FOREIGN KEY (user_id) REFERENCES Users(user_id) ON DELETE CASCADE,
+    FOREIGN KEY (category_id) REFERENCES Categories(category_id) ON DELETE CASCADE
+);
+
+-- PROCEDURE: Add one transaction to the rollups
+DELIMITER //
+
+DROP PROCEDURE IF EXISTS SP_Rollup_Add_Transaction //
+CREATE PROCEDURE SP_Rollup_Add_Transaction(
+    IN p_user_id INT,
+    IN p_category_id INT,
+    IN p_transaction_date DATETIME,
+    IN p_amount DECIMAL(15, 2)
+)
+BEGIN
+    DECLARE v_day DATE DEFAULT DATE(p_transaction_date);
+    DECLARE v_prev_count BIGINT DEFAULT 0;
+    DECLARE v_prev_total DECIMAL(19, 2) DEFAULT 0.00;
+    
+    -- Running totals up to the previous day that has transactions
+    SELECT cum_count, cum_total INTO v_prev_count, v_prev_total
+    FROM Daily_Category_Rollups
+    WHERE user_id = p_user_id AND category_id = p_category_id AND day < v_day
+    ORDER BY day DESC
+    LIMIT 1;
+    
+    INSERT INTO Daily_Category_Rollups
+        (user_id, category_id, day, txn_count, total_amount, min_amount, max_amount, cum_count, cum_total)
+    VALUES
+        (p_user_id, p_category_id, v_day, 1, p_amount, p_amount, p_amount, v_prev_count + 1, v_prev_total + p_amount)
+    ON DUPLICATE KEY UPDATE
+        txn_count = txn_count + 1,
+        total_amount = total_amount + p_amount,
+        min_amount = LEAST(COALESCE(min_amount, p_amount), p_amount),
+        max_amount = GREATEST(COALESCE(max_amount, p_amount), p_amount),
+        cum_count = cum_count + 1,
+        cum_total = cum_total + p_amount;
+    
+    -- Later days now include this transaction in their running totals
+    UPDATE Daily_Category_Rollups
+    SET cum_count = cum_count + 1, cum_total = cum_total + p_amount
+    WHERE user_id = p_user_id AND category_id = p_category_id AND day > v_day;
+END //
+
+DELIMITER ;
+
+-- PROCEDURE: Remove one transaction from the rollups
+-- Called after the row has left Transactions, so the day's min and
+-- max are recalculated from the transactions that remain.
+DELIMITER //
+
+DROP PROCEDURE IF EXISTS SP_Rollup_Remove_Transaction //
+CREATE PROCEDURE SP_Rollup_Remove_Transaction(
+    IN p_user_id INT,
+    IN p_category_id INT,
+    IN p_transaction_date DATETIME,
+    IN p_amount DECIMAL(15, 2)
+)
+BEGIN
+    DECLARE v_day DATE DEFAULT DATE(p_transaction_date);
+    
+    UPDATE Daily_Category_Rollups
+    SET cum_count = cum_count - 1, cum_total = cum_total - p_amount
+    WHERE user_id = p_user_id AND category_id = p_category_id AND day >= v_day;
+    
+    UPDATE Daily_Category_Rollups
+    SET txn_count = txn_count - 1,
+        total_amount = total_amount - p_amount,
+        min_amount = (
+            SELECT MIN(amount) FROM Transactions
+            WHERE user_id = p_user_id AND category_id = p_category_id
+            AND transaction_date >= v_day AND transaction_date < v_day + INTERVAL 1 DAY
+        ),
+        max_amount = (
+            SELECT MAX(amount) FROM Transactions
+            WHERE user_id = p_user_id AND category_id = p_category_id
+            AND transaction_date >= v_day AND transaction_date < v_day + INTERVAL 1 DAY
+        )
+    WHERE user_id = p_user_id AND category_id = p_category_id AND day = v_day;
+    
+    DELETE FROM Daily_Category_Rollups
+    WHERE user_id = p_user_id AND category_id = p_category_id AND day = v_day AND txn_count <= 0;
+END //
+
+DELIMITER ;
+
+-- TRIGGERS: Keep the rollups in step with Transactions
+-- MySQL fires no triggers for rows removed by ON DELETE CASCADE, so an
+-- account's transactions must be deleted explicitly before the account
+-- (see delete_account in routes_accounts.py).
+DELIMITER //
+
+DROP TRIGGER IF EXISTS TRG_Rollup_Transaction_Insert //
+CREATE TRIGGER TRG_Rollup_Transaction_Insert
+AFTER INSERT ON Transactions
+FOR EACH ROW
+BEGIN
+    CALL SP_Rollup_Add_Transaction(NEW.user_id, NEW.category_id, NEW.transaction_date, NEW.amount);
+END //
+
+DROP TRIGGER IF EXISTS TRG_Rollup_Transaction_Delete //
+CREATE TRIGGER TRG_Rollup_Transaction_Delete
+AFTER DELETE ON Transactions
+FOR EACH ROW
+BEGIN
+    CALL SP_Rollup_Remove_Transaction(OLD.user_id, OLD.category_id, OLD.transaction_date, OLD.amount);
+END //
+
+DROP TRIGGER IF EXISTS TRG_Rollup_Transaction_Update //
+CREATE TRIGGER TRG_Rollup_Transaction_Update
+AFTER UPDATE ON Transactions
+FOR EACH ROW
+BEGIN
+    IF NOT (OLD.user_id <=> NEW.user_id
+            AND OLD.category_id <=> NEW.category_id
+            AND OLD.transaction_date <=> NEW.transaction_date
+            AND OLD.amount <=> NEW.amount) THEN
+        CALL SP_Rollup_Remove_Transaction(OLD.user_id, OLD.category_id, OLD.transaction_date, OLD.amount);
+        CALL SP_Rollup_Add_Transaction(NEW.user_id, NEW.category_id, NEW.transaction_date, NEW.amount);
+    END IF;
+END //
+
+DELIMITER ;
+
+-- Backfill from existing transactions (safe to re-run)
+-- Days whose transactions are all gone, e.g. removed by a cascade before
+-- accounts were deleted explicitly, are dropped first; the INSERT then
+-- recalculates the remaining days and their running totals.
+DELETE r FROM Daily_Category_Rollups r
+WHERE NOT EXISTS (
+    SELECT 1 FROM Transactions t
+    WHERE t.user_id = r.user_id AND t.category_id = r.category_id
+    AND t.transaction_date >= r.day AND t.transaction_date < r.day + INTERVAL 1 DAY
+);
+
+INSERT INTO Daily_Category_Rollups
+    (user_id, category_id, day, txn_count, total_amount, min_amount, max_amount, cum_count, cum_total)
+SELECT * FROM (
+    SELECT
+        d.user_id,
+        d.category_id,
+        d.day,
+        d.txn_count,
+        d.total_amount,
+        d.min_amount,
+        d.max_amount,
+        SUM(d.txn_count) OVER w AS cum_count,
+        SUM(d.total_amount) OVER w AS cum_total
+    FROM (
+        SELECT
+            user_id,
+            category_id,
+            DATE(transaction_date) AS day,
+            COUNT(*) AS txn_count,
+            SUM(amount) AS total_amount,
+            MIN(amount) AS min_amount,
+            MAX(amount) AS max_amount
+        FROM Transactions
+        GROUP BY user_id, category_id, DATE(transaction_date)
+    ) d
+    WINDOW w AS (PARTITION BY d.user_id, d.category_id ORDER BY d.day)
+) AS backfill
+ON DUPLICATE KEY UPDATE
+    txn_count = backfill.txn_count,
+    total_amount = backfill.total_amount,
+    min_amount = backfill.min_amount,
+    max_amount = backfill.max_amount,
+    cum_count = backfill.cum_count,
+    cum_total = backfill.cum_total;
+
+-- ==========================================================
+-- 3. BUDGET SPEND COUNTERS
+-- One row per budget holding the count and sum of the user's
+-- transactions in the budget's category and date window. Kept
+-- current by triggers on Transactions, so budget endpoints read
+-- spent values directly instead of summing transactions.
+-- A budget's row is seeded from the daily rollups when the
+-- budget is created or its window changes.
+-- ==========================================================
+
+CREATE TABLE IF NOT EXISTS Budget_Spend (
+    budget_id INT PRIMARY KEY,
+    txn_count INT NOT NULL DEFAULT 0,
+    spent DECIMAL(19, 2) NOT NULL DEFAULT 0.00,
+    alert_level TINYINT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    
+    FOREIGN KEY (budget_id) REFERENCES Budgets(budget_id) ON DELETE CASCADE
+);
+
+-- FUNCTION: Highest alert threshold reached (0, 80 or 100 percent)
+DELIMITER //
+
+DROP FUNCTION IF EXISTS FN_Budget_Alert_Level //
+CREATE FUNCTION FN_Budget_Alert_Level(
+    p_spent DECIMAL(19, 2),
+    p_limit DECIMAL(15, 2)
+)
+RETURNS TINYINT
+DETERMINISTIC
+NO SQL
+BEGIN
+    RETURN CASE
+        WHEN p_limit IS NULL OR p_limit <= 0 THEN 0
+        WHEN p_spent >= p_limit THEN 100
+        WHEN p_spent >= p_limit * 0.8 THEN 80
+        ELSE 0
+    END;
+END //
+
+DELIMITER ;
+
+-- PROCEDURE: Apply one transaction to the budgets covering it
+-- p_sign is 1 when the transaction is added and -1 when removed.
+DELIMITER //
+
+DROP PROCEDURE IF EXISTS SP_Budget_Spend_Apply //
+CREATE PROCEDURE SP_Budget_Spend_Apply(
+    IN p_user_id INT,
+    IN p_category_id INT,
+    IN p_transaction_date DATETIME,
+    IN p_amount DECIMAL(15, 2),
+    IN p_sign INT
+)
+BEGIN
+    UPDATE Budget_Spend s
+    JOIN Budgets b ON b.budget_id = s.budget_id
+    SET s.txn_count = s.txn_count + p_sign,
+        s.spent = s.spent + p_sign * p_amount
+    WHERE b.user_id = p_user_id
+    AND b.category_id = p_category_id
+    AND DATE(p_transaction_date) BETWEEN b.start_date AND b.end_date;
+END //
+
+DELIMITER ;
+
+-- PROCEDURE: Recalculate one budget's counters from the rollups
+-- The alert level is set to match the new spend without notifying,
+-- so a budget created or moved over spending that already exists
+-- does not raise an alert for it.
+DELIMITER //
+
+DROP PROCEDURE IF EXISTS SP_Budget_Spend_Refresh //
+CREATE PROCEDURE SP_Budget_Spend_Refresh(
+    IN p_budget_id INT
+)
+BEGIN
+    INSERT INTO Budget_Spend (budget_id, txn_count, spent, alert_level)
+    SELECT * FROM (
+        SELECT
+            b.budget_id,
+            COALESCE(SUM(r.txn_count), 0) AS txn_count,
+            COALESCE(SUM(r.total_amount), 0) AS spent,
+            FN_Budget_Alert_Level(COALESCE(SUM(r.total_amount), 0), b.amount_limit) AS alert_level
+        FROM Budgets b
+        LEFT JOIN Daily_Category_Rollups r ON r.user_id = b.user_id
+            AND r.category_id = b.category_id
+            AND r.day BETWEEN b.start_date AND b.end_date
+        WHERE b.budget_id = p_budget_id
+        GROUP BY b.budget_id
+    ) AS refreshed
+    ON DUPLICATE KEY UPDATE
+        txn_count = refreshed.txn_count,
+        spent = refreshed.spent,
+        alert_level = refreshed.alert_level;
+END //
+
+DELIMITER ;
+
+-- TRIGGERS: Keep the counters in step with Transactions and Budgets
+-- Like the rollup triggers, these do not fire for transactions removed
+-- by a cascade, which is why accounts are deleted after their
+-- transactions.
+DELIMITER //
+
+DROP TRIGGER IF EXISTS TRG_Budget_Spend_Transaction_Insert //
+CREATE TRIGGER TRG_Budget_Spend_Transaction_Insert
+AFTER INSERT ON Transactions
+FOR EACH ROW
+BEGIN
+    CALL SP_Budget_Spend_Apply(NEW.user_id, NEW.category_id, NEW.transaction_date, NEW.amount, 1);
+END //
+
+DROP TRIGGER IF EXISTS TRG_Budget_Spend_Transaction_Delete //
+CREATE TRIGGER TRG_Budget_Spend_Transaction_Delete
+AFTER DELETE ON Transactions
+FOR EACH ROW
+BEGIN
+    CALL SP_Budget_Spend_Apply(OLD.user_id, OLD.category_id, OLD.transaction_date, OLD.amount, -1);
+END //
+
+DROP TRIGGER IF EXISTS TRG_Budget_Spend_Transaction_Update //
+CREATE TRIGGER TRG_Budget_Spend_Transaction_Update
+AFTER UPDATE ON Transactions
+FOR EACH ROW
+BEGIN
+    IF NOT (OLD.user_id <=> NEW.user_id
+            AND OLD.category_id <=> NEW.category_id
+            AND OLD.transaction_date <=> NEW.transaction_date
+            AND OLD.amount <=> NEW.amount) THEN
+        CALL SP_Budget_Spend_Apply(OLD.user_id, OLD.category_id, OLD.transaction_date, OLD.amount, -1);
+        CALL SP_Budget_Spend_Apply(NEW.user_id, NEW.category_id, NEW.transaction_date, NEW.amount, 1);
+    END IF;
+END //
+
+DROP TRIGGER IF EXISTS TRG_Budget_Spend_Budget_Insert //
+CREATE TRIGGER TRG_Budget_Spend_Budget_Insert
+AFTER INSERT ON Budgets
+FOR EACH ROW
+BEGIN
+    CALL SP_Budget_Spend_Refresh(NEW.budget_id);
+END //
+
+DROP TRIGGER IF EXISTS TRG_Budget_Spend_Budget_Update //
+CREATE TRIGGER TRG_Budget_Spend_Budget_Update
+AFTER UPDATE ON Budgets
+FOR EACH ROW
+BEGIN
+    IF NOT (OLD.user_id <=> NEW.user_id
+            AND OLD.category_id <=> NEW.category_id
+            AND OLD.start_date <=> NEW.start_date
+            AND OLD.end_date <=> NEW.end_date) THEN
+        CALL SP_Budget_Spend_Refresh(NEW.budget_id);
+    ELSEIF NOT (OLD.amount_limit <=> NEW.amount_limit) THEN
+        UPDATE Budget_Spend
+        SET alert_level = FN_Budget_Alert_Level(spent, NEW.amount_limit)
+        WHERE budget_id = NEW.budget_id;
+    END IF;
+END //
+
+DELIMITER ;
+
+-- Backfill from the rollups (safe to re-run)
+-- Run after the rollup backfill, this also repairs counters left too
+-- high by transactions removed through a cascade.
+INSERT INTO Budget_Spend (budget_id, txn_count, spent, alert_level)
+SELECT * FROM (
+    SELECT
+        b.budget_id,
+        COALESCE(SUM(r.txn_count), 0) AS txn_count,
+        COALESCE(SUM(r.total_amount), 0) AS spent,
+        FN_Budget_Alert_Level(COALESCE(SUM(r.total_amount), 0), b.amount_limit) AS alert_level
+    FROM Budgets b
+    LEFT JOIN Daily_Category_Rollups r ON r.user_id = b.user_id
+        AND r.category_id = b.category_id
+        AND r.day BETWEEN b.start_date AND b.end_date
+    GROUP BY b.budget_id
+) AS backfill
+ON DUPLICATE KEY UPDATE
+    txn_count = backfill.txn_count,
+    spent = backfill.spent,
+    alert_level = backfill.alert_level;
+
+-- ==========================================================
+-- 4. BUDGET THRESHOLD ALERTS
+-- When a transaction raises a budget's spend past 80% or 100%
+-- of its limit, a budget_alert notification is created in the
+-- same transaction. Budget_Spend.alert_level records the highest
+-- threshold already notified, so each threshold alerts once per
+-- budget, even when an edited transaction is removed and re-added.
+-- Only an increase in spend is checked, at the cost of one
+-- primary key lookup.
+-- ==========================================================
+
+DELIMITER //
+
+DROP TRIGGER IF EXISTS TRG_Budget_Spend_Alert //
+CREATE TRIGGER TRG_Budget_Spend_Alert
+BEFORE UPDATE ON Budget_Spend
+FOR EACH ROW
+BEGIN
+    DECLARE v_user_id INT;
+    DECLARE v_limit DECIMAL(15, 2);
+    DECLARE v_category_name VARCHAR(100);
+    DECLARE v_level TINYINT DEFAULT 0;
+    
+    IF NEW.spent > OLD.spent THEN
+        SELECT b.user_id, b.amount_limit, c.category_name
+        INTO v_user_id, v_limit, v_category_name
+        FROM Budgets b
+        JOIN Categories c ON c.category_id = b.category_id
+        WHERE b.budget_id = NEW.budget_id AND c.type = 'Expense';
+        
+        SET v_level = FN_Budget_Alert_Level(NEW.spent, v_limit);
+        
+        IF v_level > NEW.alert_level THEN
+            SET NEW.alert_level = v_level;
+            
+            INSERT INTO Notifications (user_id, type, title, message, severity, related_id)
+            VALUES (
+                v_user_id,
+                'budget_alert',
+                IF(v_level = 100, CONCAT(v_category_name, ' budget exceeded'),
+                                  CONCAT(v_category_name, ' budget at 80%')),
+                CONCAT('You have spent ', FORMAT(NEW.spent, 0), ' of your ', FORMAT(v_limit, 0),
+                       ' ', v_category_name, ' budget (', ROUND(NEW.spent / v_limit * 100), '%).'),
+                IF(v_level = 100, 'danger', 'warning'),
+                NEW.budget_id
+            );
+        END IF;
+    END IF;
+END //
+
+DELIMITER ;
+
+-- ==========================================================
+-- 5. RECURRING BUDGET TEMPLATES
+-- A template creates the same budget every month, quarter or
+-- year. next_start_date is always the first day of the next
+-- period to create. generate_template_budgets in
+-- routes_budgets.py reads every due template with one SELECT,
+-- inserts their Budgets rows with one multi-row INSERT and then
+-- moves the templates on by one period. With rollover, the
+-- unspent part of the previous period's budget is added to the
+-- limit; it is read before the INSERT, since the Budgets insert
+-- trigger writes Budget_Spend.
+-- ==========================================================
+
+CREATE TABLE IF NOT EXISTS Budget_Templates (
+    template_id INT PRIMARY KEY AUTO_INCREMENT,
+    user_id INT NOT NULL,
+    category_id INT NOT NULL,
+    amount_limit DECIMAL(15, 2) NOT NULL,
+    period ENUM('Monthly', 'Quarterly', 'Yearly') NOT NULL DEFAULT 'Monthly',
+    rollover BOOLEAN NOT NULL DEFAULT FALSE,
+    is_active BOOLEAN NOT NULL DEFAULT TRUE,
+    next_start_date DATE NOT NULL,
+    last_generated_at DATETIME NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    
+    UNIQUE KEY uq_templates_user_category (user_id, category_id),
+    INDEX idx_templates_due (is_active, next_start_date),
+    FOREIGN KEY (user_id) REFERENCES Users(user_id) ON DELETE CASCADE,
+    FOREIGN KEY (category_id) REFERENCES Categories(category_id) ON DELETE CASCADE
+);
+
+-- FUNCTION: Last day of the period starting on p_start
+DELIMITER //
+
+DROP FUNCTION IF EXISTS FN_Template_Period_End //
+CREATE FUNCTION FN_Template_Period_End(
+    p_start DATE,
+    p_period VARCHAR(10)
+)
+RETURNS DATE
+DETERMINISTIC
+NO SQL
+BEGIN
+    RETURN CASE p_period
+        WHEN 'Quarterly' THEN p_start + INTERVAL 3 MONTH - INTERVAL 1 DAY
+        WHEN 'Yearly' THEN p_start + INTERVAL 1 YEAR - INTERVAL 1 DAY
+        ELSE p_start + INTERVAL 1 MONTH - INTERVAL 1 DAY
+    END;
+END //
+
+DELIMITER ;
+
+-- ==========================================================
+-- 6. GROUP MEMBER BALANCES
+-- One row per group and user holding the user's expense and
+-- contribution totals in the group, and whether they are still
+-- a member. Kept current by triggers on Transactions and
+-- User_Groups, so group endpoints read one row per member
+-- instead of aggregating the group's transactions. Rows of
+-- former members stay while they have transactions in the group.
+-- ==========================================================
+
+CREATE TABLE IF NOT EXISTS Group_Member_Balances (
+    group_id INT NOT NULL,
+    user_id INT NOT NULL,
+    is_member BOOLEAN NOT NULL DEFAULT FALSE,
+    txn_count INT NOT NULL DEFAULT 0,
+    total_expenses DECIMAL(19, 2) NOT NULL DEFAULT 0.00,
+    total_contributions DECIMAL(19, 2) NOT NULL DEFAULT 0.00,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    
+    PRIMARY KEY (group_id, user_id),
+    FOREIGN KEY (group_id) REFERENCES `Groups`(group_id) ON DELETE CASCADE,
+    FOREIGN KEY (user_id) REFERENCES Users(user_id) ON DELETE CASCADE
+);
+
+-- PROCEDURE: Apply one group transaction to its member's balance
+-- p_sign is 1 when the transaction is added and -1 when removed.
+DELIMITER //
+
+DROP PROCEDURE IF EXISTS SP_Group_Balance_Apply //
+CREATE PROCEDURE SP_Group_Balance_Apply(
+    IN p_group_id INT,
+    IN p_user_id INT,
+    IN p_category_id INT,
+    IN p_amount DECIMAL(15, 2),
+    IN p_sign INT
+)
+BEGIN
+    DECLARE v_type VARCHAR(10);
+    
+    IF p_group_id IS NOT NULL THEN
+        SELECT type INTO v_type FROM Categories WHERE category_id = p_category_id;
+        
+        INSERT INTO Group_Member_Balances
+            (group_id, user_id, txn_count, total_expenses, total_contributions)
+        VALUES (
+            p_group_id,
+            p_user_id,
+            p_sign,
+            IF(v_type = 'Expense', p_sign * ABS(p_amount), 0),
+            IF(v_type = 'Income', p_sign * p_amount, 0)
+        )
+        ON DUPLICATE KEY UPDATE
+            txn_count = txn_count + p_sign,
+            total_expenses = total_expenses + IF(v_type = 'Expense', p_sign * ABS(p_amount), 0),
+            total_contributions = total_contributions + IF(v_type = 'Income', p_sign * p_amount, 0);
+        
+        DELETE FROM Group_Member_Balances
+        WHERE group_id = p_group_id AND user_id = p_user_id AND txn_count <= 0 AND NOT is_member;
+    END IF;
+END //
+
+DELIMITER ;
+
+-- TRIGGERS: Keep the balances in step with Transactions and User_Groups
+-- Foreign key actions bypass these triggers. Accounts are therefore
+-- deleted after their transactions, and a group's transactions are
+-- unlinked (group_id = NULL) before the group is deleted rather than
+-- through ON DELETE SET NULL (see delete_group in routes_groups.py).
+-- Deleting a user removes all of that user's balance rows through
+-- their own foreign key.
+DELIMITER //
+
+DROP TRIGGER IF EXISTS TRG_Group_Balance_Transaction_Insert //
+CREATE TRIGGER TRG_Group_Balance_Transaction_Insert
+AFTER INSERT ON Transactions
+FOR EACH ROW
+BEGIN
+    CALL SP_Group_Balance_Apply(NEW.group_id, NEW.user_id, NEW.category_id, NEW.amount, 1);
+END //
+
+DROP TRIGGER IF EXISTS TRG_Group_Balance_Transaction_Delete //
+CREATE TRIGGER TRG_Group_Balance_Transaction_Delete
+AFTER DELETE ON Transactions
+FOR EACH ROW
+BEGIN
+    CALL SP_Group_Balance_Apply(OLD.group_id, OLD.user_id, OLD.category_id, OLD.amount, -1);
+END //
+
+DROP TRIGGER IF EXISTS TRG_Group_Balance_Transaction_Update //
+CREATE TRIGGER TRG_Group_Balance_Transaction_Update
+AFTER UPDATE ON Transactions
+FOR EACH ROW
+BEGIN
+    IF NOT (OLD.group_id <=> NEW.group_id
+            AND OLD.user_id <=> NEW.user_id
+            AND OLD.category_id <=> NEW.category_id
+            AND OLD.amount <=> NEW.amount) THEN
+        CALL SP_Group_Balance_Apply(OLD.group_id, OLD.user_id, OLD.category_id, OLD.amount, -1);
+        CALL SP_Group_Balance_Apply(NEW.group_id, NEW.user_id, NEW.category_id, NEW.amount, 1);
+    END IF;
+END //
+
+DROP TRIGGER IF EXISTS TRG_Group_Balance_Member_Insert //
+CREATE TRIGGER TRG_Group_Balance_Member_Insert
+AFTER INSERT ON User_Groups
+FOR EACH ROW
+BEGIN
+    INSERT INTO Group_Member_Balances (group_id, user_id, is_member)
+    VALUES (NEW.group_id, NEW.user_id, TRUE)
+    ON DUPLICATE KEY UPDATE is_member = TRUE;
+END //
+
+DROP TRIGGER IF EXISTS TRG_Group_Balance_Member_Delete //
+CREATE TRIGGER TRG_Group_Balance_Member_Delete
+AFTER DELETE ON User_Groups
+FOR EACH ROW
+BEGIN
+    UPDATE Group_Member_Balances
+    SET is_member = FALSE
+    WHERE group_id = OLD.group_id AND user_id = OLD.user_id;
+    
+    DELETE FROM Group_Member_Balances
+    WHERE group_id = OLD.group_id AND user_id = OLD.user_id AND txn_count <= 0;
+END //
+
+-- A category's type decides whether its group transactions count as
+-- expenses or contributions, so a type change moves their totals
+DROP TRIGGER IF EXISTS TRG_Group_Balance_Category_Update //
+CREATE TRIGGER TRG_Group_Balance_Category_Update
+AFTER UPDATE ON Categories
+FOR EACH ROW
+BEGIN
+    IF NOT (OLD.type <=> NEW.type) THEN
+        UPDATE Group_Member_Balances gb
+        JOIN (
+            SELECT group_id, user_id, SUM(ABS(amount)) AS abs_total, SUM(amount) AS total
+            FROM Transactions
+            WHERE category_id = NEW.category_id AND group_id IS NOT NULL
+            GROUP BY group_id, user_id
+        ) t ON t.group_id = gb.group_id AND t.user_id = gb.user_id
+        SET gb.total_expenses = gb.total_expenses
+                - IF(OLD.type = 'Expense', t.abs_total, 0)
+                + IF(NEW.type = 'Expense', t.abs_total, 0),
+            gb.total_contributions = gb.total_contributions
+                - IF(OLD.type = 'Income', t.total, 0)
+                + IF(NEW.type = 'Income', t.total, 0);
+    END IF;
+END //
+
+DELIMITER ;
+
+-- Backfill from existing members and transactions (safe to re-run)
+-- Rows of former members with no transactions left in the group, e.g.
+-- after a cascade, are dropped first; the INSERT then recalculates the
+-- remaining rows.
+DELETE gb FROM Group_Member_Balances gb
+WHERE NOT EXISTS (
+    SELECT 1 FROM User_Groups ug
+    WHERE ug.group_id = gb.group_id AND ug.user_id = gb.user_id
+)
+AND NOT EXISTS (
+    SELECT 1 FROM Transactions t
+    WHERE t.group_id = gb.group_id AND t.user_id = gb.user_id
+);
+
+INSERT INTO Group_Member_Balances
+    (group_id, user_id, is_member, txn_count, total_expenses, total_contributions)
+SELECT * FROM (
+    SELECT
+        x.group_id,
+        x.user_id,
+        MAX(x.is_member) AS is_member,
+        SUM(x.txn_count) AS txn_count,
+        SUM(x.total_expenses) AS total_expenses,
+        SUM(x.total_contributions) AS total_contributions
+    FROM (
+        SELECT group_id, user_id, 1 AS is_member, 0 AS txn_count,
+               0 AS total_expenses, 0 AS total_contributions
+        FROM User_Groups
+        UNION ALL
+        SELECT
+            t.group_id,
+            t.user_id,
+            0,
+            COUNT(*),
+            SUM(CASE WHEN c.type = 'Expense' THEN ABS(t.amount) ELSE 0 END),
+            SUM(CASE WHEN c.type = 'Income' THEN t.amount ELSE 0 END)
+        FROM Transactions t
+        JOIN Categories c ON c.category_id = t.category_id
+        WHERE t.group_id IS NOT NULL
+        GROUP BY t.group_id, t.user_id
+    ) x
+    GROUP BY x.group_id, x.user_id
+) AS backfill
+ON DUPLICATE KEY UPDATE
+    is_member = backfill.is_member,
+    txn_count = backfill.txn_count,
+    total_expenses = backfill.total_expenses,
+    total_contributions = backfill.total_contributions;
@@ -2,10 +2,10 @@
 MoneyMinder Backend API
 Flask application entry point with security enhancements
 """
-from flask import Flask, jsonify
+from flask import Flask, g, jsonify
 from flask_cors import CORS
 from config import config
-from database import Database
+from database import Database, QueryTimeoutError
 import atexit
 import logging
 import os
@@ -27,12 +27,21 @@ from routes_groups import groups_bp
 from routes_recurring import recurring_bp
 from routes_notifications import notifications_bp
 from routes_time import time_bp
+from routes_batch import batch_bp
 
 # Import security components
 from security.headers import init_security_headers
 from security.rate_limiter import init_rate_limiter
 from security.config_validator import ConfigValidator
 
+# Import monitoring components
+from monitoring.query_stats import init_query_stats
+from monitoring.metrics import init_metrics
+
+# Import performance components
+from performance.json_provider import init_json_provider
+from performance.compression import init_compression
+
 # Import scheduler (optional)
 try:
     from scheduler import start_scheduler, stop_scheduler
@@ -90,6 +99,13 @@ def create_app(config_name='development'):
     # Disable strict slashes to avoid redirect issues
     app.url_map.strict_slashes = False
     
+    # Serialize Decimal and datetime values without per-row conversion
+    init_json_provider(app)
+    
+    # Compress responses; registered first so it runs after every other
+    # after_request hook has finished with the body
+    init_compression(app)
+    
     # Configure CORS with allowed origins
     allowed_origins = get_allowed_origins()
     if allowed_origins:
@@ -120,6 +136,12 @@ def create_app(config_name='development'):
     if limiter:
         app.limiter = limiter
     
+    # Initialize per-request query statistics
+    init_query_stats(app)
+    
+    # Initialize Prometheus metrics
+    init_metrics(app)
+    
     # Register blueprints
     app.register_blueprint(auth_bp)
     app.register_blueprint(accounts_bp)
@@ -131,6 +153,29 @@ def create_app(config_name='development'):
     app.register_blueprint(recurring_bp)
     app.register_blueprint(notifications_bp)
     app.register_blueprint(time_bp)
+    app.register_blueprint(batch_bp)
+    
+    # Statements that run past their time limit are reported as 504s
+    @app.errorhandler(QueryTimeoutError)
+    def query_timeout(error):
+        response = jsonify({'error': str(error), 'code': 'QUERY_TIMEOUT'})
+        response.status_code = 504
+        return response
+    
+    # Routes catch Exception themselves and answer 500, so a timeout noted
+    # by Database is turned into the 504 here
+    @app.after_request
+    def report_query_timeout(response):
+        timeout = g.pop('query_timeout', None)
+        if timeout and response.status_code == 500:
+            return query_timeout(QueryTimeoutError(timeout))
+        return response
+    
+    # Stop statements still running on MySQL when the request ends without
+    # waiting for them, e.g. run_parallel calls abandoned at its deadline
+    @app.teardown_request
+    def cancel_abandoned_queries(exc):
+        Database.cancel_request_queries()
     
     # Health check endpoint
     @app.route('/api/health', methods=['GET'])
@@ -159,7 +204,8 @@ def create_app(config_name='development'):
                 'analytics': '/api/analytics',
                 'budgets': '/api/budgets',
                 'groups': '/api/groups',
-                'recurring': '/api/recurring'
+                'recurring': '/api/recurring',
+                'batch': '/api/batch'
             }
         }), 200
     
@@ -8,6 +8,10 @@ from functools import wraps
 from flask import request, jsonify
 from config import Config
 
+# WSGI environ key holding a token payload already verified by /api/batch.
+# Clients cannot set it: header values only reach the environ as HTTP_* keys.
+AUTH_PAYLOAD_ENVIRON_KEY = 'moneyminder.auth_payload'
+
 class AuthManager:
     """Handles authentication and authorization"""
     
@@ -56,15 +60,19 @@ def require_auth(f):
     """Decorator to require authentication"""
     @wraps(f)
     def decorated_function(*args, **kwargs):
-        token = AuthManager.get_token_from_request()
-        
-        if not token:
-            return jsonify({'error': 'Authentication required', 'code': 'AUTH_REQUIRED'}), 401
-        
-        payload = AuthManager.decode_token(token)
+        # Sub-requests of a batch reuse the batch's verified token
+        payload = request.environ.get(AUTH_PAYLOAD_ENVIRON_KEY)
         
-        if not payload:
-            return jsonify({'error': 'Invalid or expired token', 'code': 'INVALID_TOKEN'}), 401
+        if payload is None:
+            token = AuthManager.get_token_from_request()
+            
+            if not token:
+                return jsonify({'error': 'Authentication required', 'code': 'AUTH_REQUIRED'}), 401
+            
+            payload = AuthManager.decode_token(token)
+            
+            if not payload:
+                return jsonify({'error': 'Invalid or expired token', 'code': 'INVALID_TOKEN'}), 401
         
         # Add user info to request context
         request.user_id = payload['user_id']
@@ -21,6 +21,28 @@ class Config:
         'charset': 'utf8mb4'
     }
     
+    # Statement time limits in seconds (0 disables the limit)
+    QUERY_TIMEOUT_SECONDS = float(os.getenv('QUERY_TIMEOUT_SECONDS', 30))
+    
+    # Per-blueprint overrides, keyed by blueprint name
+    BLUEPRINT_QUERY_TIMEOUTS = {
+        'analytics': float(os.getenv('ANALYTICS_QUERY_TIMEOUT_SECONDS', 10)),
+    }
+    
+    # Threads for running independent read queries concurrently
+    PARALLEL_QUERY_WORKERS = int(os.getenv('PARALLEL_QUERY_WORKERS', 8))
+    
+    # Memory for cached analytics responses
+    ANALYTICS_CACHE_MAX_BYTES = int(os.getenv('ANALYTICS_CACHE_MAX_BYTES', 32 * 1024 * 1024))
+    
+    # Users whose transaction history is kept in memory for /analytics/stats
+    HISTORY_CACHE_USERS = int(os.getenv('HISTORY_CACHE_USERS', 256))
+    
+    # Response compression
+    COMPRESS_MIN_SIZE = int(os.getenv('COMPRESS_MIN_SIZE', 500))        # bytes
+    COMPRESS_GZIP_LEVEL = int(os.getenv('COMPRESS_GZIP_LEVEL', 6))      # 1-9
+    COMPRESS_BROTLI_LEVEL = int(os.getenv('COMPRESS_BROTLI_LEVEL', 4))  # 0-11
+    
     # Flask configuration
     DEBUG = os.getenv('FLASK_DEBUG', 'True') == 'True'
     TESTING = False
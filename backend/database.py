@@ -1,43 +1,288 @@
 """
 Database connection and utility functions
 """
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
 import pymysql
-from pymysql.cursors import DictCursor
+from pymysql.cursors import Cursor, DictCursor
+from flask import g, has_request_context, request
 from config import Config
-from contextlib import contextmanager
+from contextlib import ExitStack, contextmanager
+from monitoring.metrics import track_db_connection
+from monitoring.query_stats import QueryStats, current_endpoint
+
+# MySQL error codes for statements stopped by the server
+ER_QUERY_INTERRUPTED = 1317
+ER_QUERY_TIMEOUT = 3024
+
+# Client error code when the socket read times out mid-query
+CR_SERVER_LOST = 2013
+
+# Extra seconds the client waits after the server-side limit, so the server
+# normally stops a SELECT itself and reports a clean timeout error
+CLIENT_TIMEOUT_GRACE_SECONDS = 2
+
+_SELECT_RE = re.compile(r'^\s*SELECT\b', re.IGNORECASE)
+
+# Connection reused by every call on this thread inside Database.shared_connection()
+_shared = threading.local()
+
+# Request details a Database.run_parallel worker runs its query for
+_worker_context = threading.local()
+
+# Thread pool for Database.run_parallel, created on first use
+_parallel_pool = None
+_parallel_pool_lock = threading.Lock()
+
+
+class QueryTimeoutError(pymysql.err.OperationalError):
+    """Raised when a statement runs longer than its time limit"""
+    
+    def __init__(self, timeout):
+        self.timeout = timeout
+        super().__init__(ER_QUERY_TIMEOUT, f'Query exceeded the {timeout:g}s time limit')
+
 
 class Database:
     """Database connection manager"""
     
+    @staticmethod
+    def _connect(read_timeout=None):
+        """Open a new connection"""
+        # Create connection config - set to Asia/Bangkok timezone (GMT+7)
+        db_config = Config.DB_CONFIG.copy()
+        
+        return pymysql.connect(
+            **db_config,
+            cursorclass=DictCursor,
+            read_timeout=read_timeout,
+            init_command="SET time_zone='+07:00'"  # Match local timezone
+        )
+    
     @staticmethod
     @contextmanager
-    def get_connection():
+    def get_connection(read_timeout=None):
         """
         Context manager for database connections
         Automatically handles connection closing
+        
+        Inside Database.shared_connection() the thread's shared connection
+        is returned instead and left open for the next call.
+        
+        Args:
+            read_timeout: Seconds to wait for a server response, None for no limit
         """
+        shared = getattr(_shared, 'state', None)
+        if shared is not None:
+            connection = Database._shared_connection_for(shared, read_timeout)
+            try:
+                yield connection
+            except pymysql.Error as e:
+                print(f"Database error: {e}")
+                if connection.open:
+                    connection.rollback()
+                raise
+            return
+        
         connection = None
         try:
-            # Create connection config - set to Asia/Bangkok timezone (GMT+7)
-            db_config = Config.DB_CONFIG.copy()
-            
-            connection = pymysql.connect(
-                **db_config,
-                cursorclass=DictCursor,
-                init_command="SET time_zone='+07:00'"  # Match local timezone
-            )
-            yield connection
+            connection = Database._connect(read_timeout)
+            with track_db_connection():
+                yield connection
         except pymysql.Error as e:
             print(f"Database error: {e}")
-            if connection:
+            if connection and connection.open:
                 connection.rollback()
             raise
         finally:
-            if connection:
+            if connection and connection.open:
+                connection.close()
+    
+    @staticmethod
+    def _shared_connection_for(shared, read_timeout):
+        """Get the thread's shared connection, reconnecting if it was lost"""
+        connection = shared['connection']
+        if connection is None or not connection.open:
+            if connection is None:
+                shared['stack'].enter_context(track_db_connection())
+            connection = Database._connect(read_timeout)
+            shared['connection'] = connection
+        else:
+            # PyMySQL applies this to the socket before every read
+            connection._read_timeout = read_timeout
+        return connection
+    
+    @staticmethod
+    @contextmanager
+    def shared_connection():
+        """
+        Run every database call made on this thread inside the block on one connection
+        
+        The connection is opened on first use and closed when the block
+        exits. Nested blocks reuse the outer connection.
+        """
+        if getattr(_shared, 'state', None) is not None:
+            yield
+            return
+        
+        with ExitStack() as stack:
+            state = {'connection': None, 'stack': stack}
+            stack.callback(Database._close_shared, state)
+            _shared.state = state
+            try:
+                yield
+            finally:
+                _shared.state = None
+    
+    @staticmethod
+    def _close_shared(state):
+        """Close the connection opened by shared_connection(), if any"""
+        connection = state['connection']
+        if connection is not None and connection.open:
+            connection.close()
+    
+    @staticmethod
+    def resolve_timeout(timeout=None):
+        """
+        Get the statement timeout for the current call
+        
+        An explicit timeout wins, then the current blueprint's timeout,
+        then the global default. A timeout of 0 disables the limit.
+        
+        Returns:
+            Timeout in seconds, or None for no limit
+        """
+        if timeout is None:
+            timeout = Config.QUERY_TIMEOUT_SECONDS
+            if has_request_context() and request.blueprint:
+                timeout = Config.BLUEPRINT_QUERY_TIMEOUTS.get(request.blueprint, timeout)
+        return timeout or None
+    
+    @staticmethod
+    def add_execution_time_hint(query, timeout):
+        """
+        Add a MAX_EXECUTION_TIME optimizer hint to a SELECT statement
+        
+        Other statements are returned unchanged, since MySQL only honours
+        the hint on read-only SELECTs.
+        """
+        if not timeout or 'MAX_EXECUTION_TIME' in query.upper() or not _SELECT_RE.match(query):
+            return query
+        milliseconds = max(1, int(timeout * 1000))
+        return _SELECT_RE.sub(f'SELECT /*+ MAX_EXECUTION_TIME({milliseconds}) */', query, count=1)
+    
+    @staticmethod
+    def _client_timeout(timeout):
+        """Socket read timeout matching a statement timeout"""
+        return timeout + CLIENT_TIMEOUT_GRACE_SECONDS if timeout else None
+    
+    @staticmethod
+    def _request_queries():
+        """Server thread ids of queries running for the current request"""
+        if not has_request_context():
+            return getattr(_worker_context, 'active', None)
+        if 'active_db_threads' not in g:
+            g.active_db_threads = set()
+        return g.active_db_threads
+    
+    @staticmethod
+    def _timeout_error(timeout):
+        """
+        Build a QueryTimeoutError and note it on the current request
+        
+        Routes answer their own exceptions with a 500, so the app checks
+        this note to report the request as a 504 instead.
+        """
+        if has_request_context():
+            g.query_timeout = timeout
+        return QueryTimeoutError(timeout)
+    
+    @staticmethod
+    @contextmanager
+    def _statement_guard(conn, timeout):
+        """
+        Track a running statement, translate timeout errors and cancel
+        statements the caller stopped waiting for
+        
+        When the client gives up waiting, or the request is aborted while
+        the statement runs (a worker timeout or shutdown interrupts the
+        read), the statement may still be running on the server, so it is
+        killed before the error is raised.
+        """
+        thread_id = conn.thread_id()
+        active = Database._request_queries()
+        if active is not None:
+            active.add(thread_id)
+        try:
+            yield
+        except pymysql.err.OperationalError as e:
+            code = e.args[0] if e.args else None
+            if code in (ER_QUERY_TIMEOUT, ER_QUERY_INTERRUPTED) and timeout:
+                raise Database._timeout_error(timeout) from e
+            if code == CR_SERVER_LOST:
+                Database.kill_query(thread_id)
+                if timeout and 'timed out' in str(e):
+                    raise Database._timeout_error(timeout) from e
+            raise
+        except pymysql.Error:
+            # Answered by the server, so the statement is over
+            raise
+        except BaseException:
+            Database.kill_query(thread_id)
+            raise
+        finally:
+            if active is not None:
+                active.discard(thread_id)
+    
+    @staticmethod
+    def kill_query(thread_id):
+        """
+        Stop the statement running on a server connection
+        
+        The KILL is sent on a new connection of its own.
+        
+        Args:
+            thread_id: MySQL connection id running the statement
+            
+        Returns:
+            True if the KILL was sent
+        """
+        # Never the thread's shared connection: inside shared_connection()
+        # that may be the connection still running the statement
+        connection = None
+        try:
+            connection = Database._connect(read_timeout=5)
+            with track_db_connection():
+                with connection.cursor() as cursor:
+                    cursor.execute("KILL QUERY %s", (int(thread_id),))
+            return True
+        except pymysql.Error as e:
+            print(f"Failed to kill query on connection {thread_id}: {e}")
+            return False
+        finally:
+            if connection and connection.open:
                 connection.close()
     
     @staticmethod
-    def execute_query(query, params=None, fetch_one=False, fetch_all=False, commit=False):
+    def cancel_request_queries():
+        """
+        Kill any statements still running for the current request
+        
+        Returns:
+            Number of statements killed
+        """
+        active = Database._request_queries()
+        if not active:
+            return 0
+        killed = sum(1 for thread_id in list(active) if Database.kill_query(thread_id))
+        active.clear()
+        return killed
+    
+    @staticmethod
+    def execute_query(query, params=None, fetch_one=False, fetch_all=False, commit=False, timeout=None,
+                      columnar=False):
         """
         Execute a database query
         
@@ -47,43 +292,166 @@ class Database:
             fetch_one: Return single row
             fetch_all: Return all rows
             commit: Commit transaction
-            
+            timeout: Time limit in seconds, defaults to the blueprint's limit
+            columnar: With fetch_all, return {'columns': [...], 'data': [[...], ...]}
+                read through a tuple cursor instead of one dict per row
+                
         Returns:
             Query results or lastrowid for INSERT operations
+            
+        Raises:
+            QueryTimeoutError: If the statement runs past its time limit
         """
-        with Database.get_connection() as conn:
-            with conn.cursor() as cursor:
-                cursor.execute(query, params or ())
+        timeout = Database.resolve_timeout(timeout)
+        statement = Database.add_execution_time_hint(query, timeout)
+        
+        with Database.get_connection(read_timeout=Database._client_timeout(timeout)) as conn:
+            with Database._statement_guard(conn, timeout):
+                with QueryStats.measure(query, params, getattr(_worker_context, 'endpoint', None)) as measurement:
+                    with conn.cursor(Cursor if columnar else None) as cursor:
+                        cursor.execute(statement, params or ())
+                        measurement.rows = cursor.rowcount
+                        
+                        if commit:
+                            conn.commit()
+                            return cursor.lastrowid if query.strip().upper().startswith('INSERT') else cursor.rowcount
+                        
+                        if fetch_one:
+                            return cursor.fetchone()
+                        
+                        if fetch_all:
+                            rows = cursor.fetchall()
+                            if columnar:
+                                return {'columns': [column[0] for column in cursor.description], 'data': rows}
+                            return rows
+                        
+                        return None
+    
+    @staticmethod
+    def _parallel_executor():
+        """Get the thread pool used by run_parallel"""
+        global _parallel_pool
+        with _parallel_pool_lock:
+            if _parallel_pool is None:
+                _parallel_pool = ThreadPoolExecutor(
+                    max_workers=Config.PARALLEL_QUERY_WORKERS,
+                    thread_name_prefix='db-parallel'
+                )
+            return _parallel_pool
+    
+    @staticmethod
+    def run_parallel(calls, deadline=None):
+        """
+        Run independent read queries at the same time, each on its own connection
+        
+        Args:
+            calls: Sequence of execute_query keyword arguments, e.g.
+                {'query': "SELECT ...", 'params': (user_id,), 'fetch_all': True}
+            deadline: Seconds allowed for all calls together, defaults to
+                the blueprint's statement timeout
                 
-                if commit:
+        Returns:
+            List of results, in the order of calls
+            
+        Raises:
+            QueryTimeoutError: If the calls do not all finish by the deadline
+        """
+        deadline = Database.resolve_timeout(deadline)
+        context = {
+            'endpoint': current_endpoint(),
+            'active': Database._request_queries(),
+            'started': time.perf_counter(),
+            'deadline': deadline,
+        }
+        
+        executor = Database._parallel_executor()
+        futures = [executor.submit(Database._run_for_request, context, call) for call in calls]
+        done, pending = wait(futures, timeout=Database._client_timeout(deadline))
+        
+        QueryStats.add_request_time(len(calls), (time.perf_counter() - context['started']) * 1000)
+        
+        if pending:
+            for future in pending:
+                future.cancel()
+            # Calls already running keep their statements on the server
+            Database.cancel_request_queries()
+            raise Database._timeout_error(deadline)
+        
+        try:
+            return [future.result() for future in futures]
+        except QueryTimeoutError as e:
+            raise Database._timeout_error(e.timeout) from e
+    
+    @staticmethod
+    def _run_for_request(context, call):
+        """Run one run_parallel call on a worker thread"""
+        call = dict(call)
+        if context['deadline']:
+            remaining = context['deadline'] - (time.perf_counter() - context['started'])
+            if remaining <= 0:
+                raise QueryTimeoutError(context['deadline'])
+            call['timeout'] = min(call.get('timeout') or remaining, remaining)
+        else:
+            call.setdefault('timeout', 0)
+        
+        _worker_context.endpoint = context['endpoint']
+        _worker_context.active = context['active']
+        try:
+            return Database.execute_query(**call)
+        finally:
+            _worker_context.endpoint = None
+            _worker_context.active = None
+    
+    @staticmethod
+    def execute_many(query, seq_params):
+        """
+        Execute a statement once per parameter set and commit
+        
+        PyMySQL rewrites ``INSERT ... VALUES`` statements into a single
+        multi-row INSERT, so a batch costs one round trip.
+        
+        Args:
+            query: SQL query string
+            seq_params: Sequence of parameter tuples
+            
+        Returns:
+            Number of affected rows
+        """
+        with Database.get_connection() as conn:
+            with QueryStats.measure(query, seq_params[0] if seq_params else None) as measurement:
+                with conn.cursor() as cursor:
+                    affected = cursor.executemany(query, seq_params)
+                    measurement.rows = affected
                     conn.commit()
-                    return cursor.lastrowid if query.strip().upper().startswith('INSERT') else cursor.rowcount
-                
-                if fetch_one:
-                    return cursor.fetchone()
-                
-                if fetch_all:
-                    return cursor.fetchall()
-                
-                return None
+                    return affected
     
     @staticmethod
-    def call_procedure(proc_name, params=()):
+    def call_procedure(proc_name, params=(), timeout=None):
         """
         Call a stored procedure
         
         Args:
             proc_name: Stored procedure name
             params: Procedure parameters
+            timeout: Time limit in seconds, defaults to the blueprint's limit
             
         Returns:
             Procedure results
+            
+        Raises:
+            QueryTimeoutError: If the procedure runs past its time limit
         """
-        with Database.get_connection() as conn:
-            with conn.cursor() as cursor:
-                cursor.callproc(proc_name, params)
-                conn.commit()
-                return cursor.fetchall()
+        timeout = Database.resolve_timeout(timeout)
+        
+        with Database.get_connection(read_timeout=Database._client_timeout(timeout)) as conn:
+            with Database._statement_guard(conn, timeout):
+                with QueryStats.measure(f"CALL {proc_name}", params) as measurement:
+                    with conn.cursor() as cursor:
+                        cursor.callproc(proc_name, params)
+                        conn.commit()
+                        results = cursor.fetchall()
+                        measurement.rows = len(results)
+                        return results
     
     @staticmethod
     def test_connection():
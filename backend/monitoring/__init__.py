@@ -0,0 +1,24 @@
+"""
+Monitoring module for MoneyMinder
+Provides database query instrumentation and Prometheus metrics.
+"""
+
+from .query_stats import QueryStats, init_query_stats, fingerprint
+from .metrics import (
+    init_metrics,
+    record_cache_lookup,
+    record_rate_limit_rejection,
+    timed_job,
+    mark_process_dead,
+)
+
+__all__ = [
+    'QueryStats',
+    'init_query_stats',
+    'fingerprint',
+    'init_metrics',
+    'record_cache_lookup',
+    'record_rate_limit_rejection',
+    'timed_job',
+    'mark_process_dead',
+]
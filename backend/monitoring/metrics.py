@@ -0,0 +1,240 @@
+"""
+Prometheus metrics for MoneyMinder
+Exposes request, database, cache, scheduler and rate limiting metrics.
+
+Metrics are served from GET /metrics in the Prometheus text format. When
+the API runs under several worker processes, set PROMETHEUS_MULTIPROC_DIR
+to a directory shared by all workers (and emptied before they start); every
+worker then writes its samples there and /metrics aggregates them, so any
+worker can answer a scrape. With gunicorn, also call mark_process_dead from
+the child_exit hook so live gauges of exited workers are dropped.
+
+prometheus_client is optional: without it every helper here is a no-op
+and the endpoint is not registered.
+"""
+import logging
+import os
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+from flask import Response, g, request
+
+try:
+    from prometheus_client import (
+        CONTENT_TYPE_LATEST,
+        CollectorRegistry,
+        Counter,
+        Gauge,
+        Histogram,
+        generate_latest,
+        multiprocess,
+    )
+    PROMETHEUS_AVAILABLE = True
+except ImportError:
+    PROMETHEUS_AVAILABLE = False
+
+
+# Latency buckets in seconds, from cached lookups to slow reports
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Scheduler jobs run for much longer than requests
+JOB_BUCKETS = (0.1, 0.5, 1.0, 5.0, 15.0, 60.0, 300.0, 900.0)
+
+if PROMETHEUS_AVAILABLE:
+    REQUEST_LATENCY = Histogram(
+        'moneyminder_http_request_duration_seconds',
+        'Time spent handling HTTP requests',
+        ['blueprint', 'route', 'method'],
+        buckets=LATENCY_BUCKETS
+    )
+    RESPONSES = Counter(
+        'moneyminder_http_responses_total',
+        'HTTP responses sent',
+        ['blueprint', 'route', 'method', 'status']
+    )
+    IN_FLIGHT = Gauge(
+        'moneyminder_http_requests_in_flight',
+        'HTTP requests currently being handled',
+        multiprocess_mode='livesum'
+    )
+    DB_CONNECTIONS_IN_USE = Gauge(
+        'moneyminder_db_connections_in_use',
+        'Database connections currently open',
+        multiprocess_mode='livesum'
+    )
+    DB_QUERY_LATENCY = Histogram(
+        'moneyminder_db_query_duration_seconds',
+        'Time spent in database calls',
+        ['endpoint'],
+        buckets=LATENCY_BUCKETS
+    )
+    CACHE_LOOKUPS = Counter(
+        'moneyminder_cache_lookups_total',
+        'Cache lookups by cache and result',
+        ['cache', 'result']
+    )
+    JOB_DURATION = Histogram(
+        'moneyminder_scheduler_job_duration_seconds',
+        'Time spent running scheduled jobs',
+        ['job'],
+        buckets=JOB_BUCKETS
+    )
+    RATE_LIMIT_REJECTIONS = Counter(
+        'moneyminder_rate_limit_rejections_total',
+        'Requests rejected by a rate limit',
+        ['limit']
+    )
+
+
+def route_labels() -> tuple:
+    """
+    Get the blueprint and route labels for the current request.
+    
+    The URL rule is used rather than the path, so /api/accounts/1 and
+    /api/accounts/2 share one series.
+    
+    Returns:
+        Tuple of (blueprint, route)
+    """
+    blueprint = request.blueprint or 'app'
+    route = request.url_rule.rule if request.url_rule else 'unmatched'
+    return (blueprint, route)
+
+
+@contextmanager
+def track_db_connection():
+    """Count a database connection as in use while the block runs."""
+    if not PROMETHEUS_AVAILABLE:
+        yield
+        return
+    DB_CONNECTIONS_IN_USE.inc()
+    try:
+        yield
+    finally:
+        DB_CONNECTIONS_IN_USE.dec()
+
+
+def observe_db_query(endpoint: str, duration_ms: float) -> None:
+    """Record the duration of one database call."""
+    if PROMETHEUS_AVAILABLE:
+        DB_QUERY_LATENCY.labels(endpoint=endpoint).observe(duration_ms / 1000)
+
+
+def record_cache_lookup(cache: str, hit: bool) -> None:
+    """
+    Record a cache lookup, for hit ratio dashboards.
+    
+    Args:
+        cache: Name of the cache
+        hit: Whether the lookup was served from the cache
+    """
+    if PROMETHEUS_AVAILABLE:
+        CACHE_LOOKUPS.labels(cache=cache, result='hit' if hit else 'miss').inc()
+
+
+def record_rate_limit_rejection(limit: str) -> None:
+    """
+    Record a request rejected by a rate limit.
+    
+    Args:
+        limit: Name of the limit that rejected it
+    """
+    if PROMETHEUS_AVAILABLE:
+        RATE_LIMIT_REJECTIONS.labels(limit=limit).inc()
+
+
+def timed_job(f):
+    """Decorator that records how long a scheduled job takes."""
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return f(*args, **kwargs)
+        finally:
+            if PROMETHEUS_AVAILABLE:
+                JOB_DURATION.labels(job=f.__name__).observe(time.perf_counter() - started)
+    
+    return decorated_function
+
+
+def mark_process_dead(pid: int) -> None:
+    """
+    Drop the live gauges of an exited worker in multi-process mode.
+    
+    Args:
+        pid: Process id of the worker
+    """
+    if PROMETHEUS_AVAILABLE and os.getenv('PROMETHEUS_MULTIPROC_DIR'):
+        multiprocess.mark_process_dead(pid)
+
+
+def generate_metrics() -> bytes:
+    """
+    Render all metrics in the Prometheus text format.
+    
+    In multi-process mode the samples of every worker are merged.
+    """
+    if os.getenv('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry)
+    return generate_latest()
+
+
+def init_metrics(app):
+    """
+    Initialize Prometheus metrics for the Flask application.
+    
+    Times every request, counts responses by status and serves /metrics.
+    Set METRICS_TOKEN to require "Authorization: Bearer <token>" on scrapes.
+    
+    Args:
+        app: Flask application instance
+        
+    Returns:
+        True if metrics are enabled, False if prometheus_client is not available
+    """
+    if not PROMETHEUS_AVAILABLE:
+        logging.warning("prometheus_client not installed. Metrics disabled.")
+        return False
+    
+    @app.before_request
+    def start_request_timer():
+        g.metrics_started = time.perf_counter()
+        g.metrics_in_flight = True
+        IN_FLIGHT.inc()
+    
+    @app.after_request
+    def record_request_metrics(response):
+        blueprint, route = route_labels()
+        RESPONSES.labels(
+            blueprint=blueprint, route=route, method=request.method, status=str(response.status_code)
+        ).inc()
+        
+        # Requests rejected by an earlier before_request hook were never timed
+        started = g.get('metrics_started')
+        if started is not None:
+            REQUEST_LATENCY.labels(blueprint=blueprint, route=route, method=request.method).observe(
+                time.perf_counter() - started
+            )
+        return response
+    
+    @app.teardown_request
+    def end_request_in_flight(exc):
+        if g.pop('metrics_in_flight', False):
+            IN_FLIGHT.dec()
+    
+    @app.route('/metrics', methods=['GET'])
+    def metrics():
+        """Prometheus scrape endpoint"""
+        token = os.getenv('METRICS_TOKEN')
+        if token and request.headers.get('Authorization') != f'Bearer {token}':
+            return Response('Unauthorized\n', status=401, mimetype='text/plain')
+        return Response(generate_metrics(), content_type=CONTENT_TYPE_LATEST)
+    
+    # Scrapes should not use up the default rate limit
+    if getattr(app, 'limiter', None):
+        app.limiter.exempt(metrics)
+    
+    return True
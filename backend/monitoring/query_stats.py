@@ -0,0 +1,293 @@
+"""
+Query instrumentation for MoneyMinder
+Records timing, row counts and call sites for every database call.
+
+Statements are grouped by fingerprint (the SQL with literals and
+placeholders normalised), counted per request and per endpoint, and
+statements slower than SLOW_QUERY_MS are logged with redacted parameters.
+The aggregates are served as JSON from GET /metrics/queries.
+"""
+import logging
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+from functools import lru_cache
+
+from flask import g, has_request_context, jsonify, request
+
+from .metrics import observe_db_query
+
+
+slow_query_logger = logging.getLogger('slow_query')
+
+_WHITESPACE_RE = re.compile(r'\s+')
+_HINT_RE = re.compile(r'/\*\+.*?\*/')
+_STRING_RE = re.compile(r"'(?:[^'\\]|\\.)*'")
+_NUMBER_RE = re.compile(r'\b\d+(?:\.\d+)?\b')
+_PLACEHOLDER_RE = re.compile(r'%s|%\(\w+\)s')
+_IN_LIST_RE = re.compile(r'\(\s*\?(?:\s*,\s*\?)+\s*\)')
+
+
+@lru_cache(maxsize=1024)
+def fingerprint(query: str) -> str:
+    """
+    Normalise a SQL statement so that calls differing only in values match.
+    
+    Args:
+        query: SQL query string
+        
+    Returns:
+        Single-line statement with literals and placeholders replaced by ?
+    """
+    normalised = _HINT_RE.sub('', query)
+    normalised = _STRING_RE.sub('?', normalised)
+    normalised = _PLACEHOLDER_RE.sub('?', normalised)
+    normalised = _NUMBER_RE.sub('?', normalised)
+    normalised = _IN_LIST_RE.sub('(?+)', normalised)
+    return _WHITESPACE_RE.sub(' ', normalised).strip()
+
+
+def redact_params(params) -> str:
+    """
+    Describe query parameters without revealing their values.
+    
+    Args:
+        params: Query parameters (tuple, list or dict)
+        
+    Returns:
+        Parameter types, e.g. "(int, str, NoneType)"
+    """
+    if not params:
+        return '()'
+    if isinstance(params, dict):
+        return '{' + ', '.join(f"{k}: {type(v).__name__}" for k, v in params.items()) + '}'
+    return '(' + ', '.join(type(p).__name__ for p in params) + ')'
+
+
+def current_endpoint() -> str:
+    """Get the Flask endpoint making the current call."""
+    if has_request_context():
+        return request.endpoint or request.path
+    return 'background'
+
+
+class QueryMeasurement:
+    """Filled in by the caller while a statement runs"""
+    
+    __slots__ = ('rows',)
+    
+    def __init__(self):
+        self.rows = 0
+
+
+class QueryStats:
+    """Aggregates database call statistics for the whole process"""
+    
+    SLOW_QUERY_MS = float(os.getenv('SLOW_QUERY_MS', 500))
+    
+    # In-memory storage, per process
+    _by_fingerprint = {}  # {fingerprint: {count, errors, total_ms, max_ms, rows, endpoints}}
+    _by_endpoint = {}     # {endpoint: {requests, queries, total_ms, max_queries}}
+    _lock = threading.Lock()
+    
+    @classmethod
+    @contextmanager
+    def measure(cls, query: str, params=None, endpoint: str = None):
+        """
+        Time one database call and record it when it finishes.
+        
+        Args:
+            query: SQL query string as written by the caller
+            params: Query parameters, only their types are logged
+            endpoint: Endpoint to attribute the call to, defaults to the current one
+            
+        Yields:
+            QueryMeasurement whose rows attribute the caller should set
+        """
+        measurement = QueryMeasurement()
+        started = time.perf_counter()
+        failed = False
+        try:
+            yield measurement
+        except Exception:
+            failed = True
+            raise
+        finally:
+            duration_ms = (time.perf_counter() - started) * 1000
+            cls.record(query, params, duration_ms, measurement.rows,
+                       endpoint=endpoint, failed=failed)
+    
+    @classmethod
+    def record(cls, query: str, params, duration_ms: float, rows: int,
+               endpoint: str = None, failed: bool = False) -> None:
+        """
+        Record a finished database call.
+        
+        Args:
+            query: SQL query string
+            params: Query parameters
+            duration_ms: Time spent in the call
+            rows: Rows returned or affected
+            endpoint: Endpoint that made the call
+            failed: Whether the call raised
+        """
+        fp = fingerprint(query)
+        endpoint = endpoint or current_endpoint()
+        rows = max(rows or 0, 0)
+        
+        cls.add_request_time(1, duration_ms)
+        
+        with cls._lock:
+            stats = cls._by_fingerprint.get(fp)
+            if stats is None:
+                stats = {'count': 0, 'errors': 0, 'total_ms': 0.0, 'max_ms': 0.0,
+                         'rows': 0, 'endpoints': set()}
+                cls._by_fingerprint[fp] = stats
+            stats['count'] += 1
+            stats['errors'] += 1 if failed else 0
+            stats['total_ms'] += duration_ms
+            stats['max_ms'] = max(stats['max_ms'], duration_ms)
+            stats['rows'] += rows
+            stats['endpoints'].add(endpoint)
+        
+        observe_db_query(endpoint, duration_ms)
+        
+        if duration_ms >= cls.SLOW_QUERY_MS:
+            slow_query_logger.warning(
+                f"Slow query {duration_ms:.1f}ms endpoint={endpoint} rows={rows} "
+                f"params={redact_params(params)} sql={fp}"
+            )
+    
+    @staticmethod
+    def add_request_time(queries: int, duration_ms: float) -> None:
+        """
+        Add database work to the current request's totals.
+        
+        Queries run on other threads are added here by the thread that
+        waited for them, with the time it spent waiting.
+        
+        Args:
+            queries: Number of database calls
+            duration_ms: Time spent in them
+        """
+        if has_request_context():
+            g.db_query_count = g.get('db_query_count', 0) + queries
+            g.db_time_ms = g.get('db_time_ms', 0.0) + duration_ms
+    
+    @classmethod
+    def record_request(cls, endpoint: str, queries: int, db_time_ms: float) -> None:
+        """
+        Record the database work done by one finished request.
+        
+        Args:
+            endpoint: Flask endpoint of the request
+            queries: Number of database calls it made
+            db_time_ms: Total time spent in those calls
+        """
+        with cls._lock:
+            stats = cls._by_endpoint.get(endpoint)
+            if stats is None:
+                stats = {'requests': 0, 'queries': 0, 'total_ms': 0.0, 'max_queries': 0}
+                cls._by_endpoint[endpoint] = stats
+            stats['requests'] += 1
+            stats['queries'] += queries
+            stats['total_ms'] += db_time_ms
+            stats['max_queries'] = max(stats['max_queries'], queries)
+    
+    @classmethod
+    def snapshot(cls) -> dict:
+        """
+        Export the aggregated statistics.
+        
+        Returns:
+            Dictionary with 'queries' (per fingerprint, slowest total first)
+            and 'endpoints' (per endpoint)
+        """
+        with cls._lock:
+            queries = [
+                {
+                    'fingerprint': fp,
+                    'count': s['count'],
+                    'errors': s['errors'],
+                    'total_ms': round(s['total_ms'], 3),
+                    'avg_ms': round(s['total_ms'] / s['count'], 3),
+                    'max_ms': round(s['max_ms'], 3),
+                    'rows': s['rows'],
+                    'endpoints': sorted(s['endpoints']),
+                }
+                for fp, s in cls._by_fingerprint.items()
+            ]
+            endpoints = {
+                name: {
+                    'requests': s['requests'],
+                    'queries': s['queries'],
+                    'avg_queries': round(s['queries'] / s['requests'], 2),
+                    'max_queries': s['max_queries'],
+                    'total_ms': round(s['total_ms'], 3),
+                }
+                for name, s in cls._by_endpoint.items()
+            }
+        
+        queries.sort(key=lambda q: q['total_ms'], reverse=True)
+        return {'queries': queries, 'endpoints': endpoints}
+    
+    @classmethod
+    def reset(cls) -> None:
+        """Clear all collected statistics."""
+        with cls._lock:
+            cls._by_fingerprint.clear()
+            cls._by_endpoint.clear()
+
+
+def stats_authorized() -> bool:
+    """
+    Check that the current request may read the query statistics.
+    
+    Requires "Authorization: Bearer <METRICS_TOKEN>". Without a configured
+    token the statistics are only served in development, since they show
+    the shape of every statement the API runs.
+    """
+    token = os.getenv('METRICS_TOKEN')
+    if not token:
+        return os.getenv('FLASK_ENV', 'development') == 'development'
+    return request.headers.get('Authorization') == f'Bearer {token}'
+
+
+def init_query_stats(app):
+    """
+    Report per-request database usage for the Flask application.
+    
+    Every response gets a Server-Timing header with the request's query
+    count and database time, and the totals are added to the per-endpoint
+    statistics. GET /metrics/queries exports QueryStats.snapshot() for
+    the worker process that answers it.
+    
+    Args:
+        app: Flask application instance
+    """
+    @app.after_request
+    def record_request_queries(response):
+        queries = g.get('db_query_count', 0)
+        db_time_ms = g.get('db_time_ms', 0.0)
+        
+        if request.endpoint:
+            QueryStats.record_request(request.endpoint, queries, db_time_ms)
+        
+        response.headers['Server-Timing'] = f'db;dur={db_time_ms:.1f};desc="{queries} queries"'
+        return response
+    
+    @app.route('/metrics/queries', methods=['GET'])
+    def query_stats():
+        """Aggregated query statistics of this process"""
+        if not stats_authorized():
+            return jsonify({'error': 'Unauthorized'}), 401
+        
+        snapshot = QueryStats.snapshot()
+        snapshot['pid'] = os.getpid()
+        return jsonify(snapshot), 200
+    
+    # Monitoring reads should not use up the default rate limit
+    if getattr(app, 'limiter', None):
+        app.limiter.exempt(query_stats)
@@ -0,0 +1,45 @@
+"""
+Performance module for MoneyMinder
+Provides fast response serialization, columnar list responses,
+response compression, conditional GET, request coalescing
+stale-while-revalidate response caching, columnar
+transaction histories for statistics, cash-flow forecasts,
+pivot queries and budget burn rates.
+"""
+
+from .json_provider import FastJSONProvider, init_json_provider
+from .columnar import COLUMNAR_MEDIA_TYPE, wants_columnar
+from .compression import init_compression
+from .data_version import DataVersion, conditional_get, read_only, track_writes
+from .singleflight import SingleFlight, CoalesceTimeoutError, coalesce_requests
+from .response_cache import ResponseCache, analytics_cache, cache_response
+from .history import UserHistory, get_history
+from .forecast import build_forecast, expand_occurrences
+from .pivot import PivotError, build_pivot_query
+from .burn_rate import add_burn_rates, project_budgets
+
+__all__ = [
+    'FastJSONProvider',
+    'init_json_provider',
+    'COLUMNAR_MEDIA_TYPE',
+    'wants_columnar',
+    'init_compression',
+    'DataVersion',
+    'conditional_get',
+    'read_only',
+    'track_writes',
+    'SingleFlight',
+    'CoalesceTimeoutError',
+    'coalesce_requests',
+    'ResponseCache',
+    'analytics_cache',
+    'cache_response',
+    'UserHistory',
+    'get_history',
+    'build_forecast',
+    'expand_occurrences',
+    'PivotError',
+    'build_pivot_query',
+    'add_burn_rates',
+    'project_budgets',
+]
@@ -0,0 +1,107 @@
+"""
+Budget burn rates for MoneyMinder
+Projects where each budget will end up from how fast it is being spent.
+
+For every budget the daily burn rate is the spend so far divided by the
+days elapsed in its window, today included. The projected total assumes
+the same rate for the rest of the window, and the projected exceed date
+is the first day on which the spend would reach the limit at that rate.
+
+The spend comes from the Budget_Spend counters, which the daily rollups
+and triggers keep current, so projecting costs no extra query: all of a
+user's budgets are projected at once with array arithmetic over their
+spend, limits and dates.
+
+numpy is optional: without it NUMPY_AVAILABLE is False and the functions
+here cannot be used.
+"""
+import logging
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+    logging.warning("numpy not installed. Budget burn rates disabled.")
+
+
+def project_budgets(spent, limits, start_dates, end_dates, today) -> list:
+    """
+    Project budgets forward at their current burn rate.
+    
+    Args:
+        spent: Spend so far per budget
+        limits: Limit per budget
+        start_dates: First day of each budget's window
+        end_dates: Last day of each budget's window
+        today: Current date
+        
+    Returns:
+        List of dicts, one per budget, with days_elapsed, days_remaining,
+        burn_rate, projected_total, projected_total_percentage and
+        projected_exceed_date (None unless the limit would first be
+        reached on a later day within the window)
+    """
+    if not len(spent):
+        return []
+    
+    spent = np.asarray([float(s or 0) for s in spent], dtype=np.float64)
+    limits = np.asarray([float(l or 0) for l in limits], dtype=np.float64)
+    starts = np.asarray(start_dates, dtype='datetime64[D]')
+    ends = np.asarray(end_dates, dtype='datetime64[D]')
+    today = np.datetime64(today, 'D')
+    
+    total_days = (ends - starts).astype(np.int64) + 1
+    elapsed = np.clip((today - starts).astype(np.int64) + 1, 0, total_days)
+    remaining = total_days - elapsed
+    
+    rates = np.where(elapsed > 0, spent / np.maximum(elapsed, 1), 0.0)
+    projected = spent + rates * remaining
+    with np.errstate(divide='ignore', invalid='ignore'):
+        percentages = np.where(limits > 0, projected / limits * 100, 0.0)
+        days_to_limit = np.ceil((limits - spent) / rates)
+    
+    exceeds = (limits > 0) & (spent < limits) & (rates > 0) & (days_to_limit <= remaining)
+    exceed_dates = today + np.where(exceeds, days_to_limit, 0).astype(np.int64)
+    
+    return [
+        {
+            'days_elapsed': int(elapsed[i]),
+            'days_remaining': int(remaining[i]),
+            'burn_rate': round(float(rates[i]), 2),
+            'projected_total': round(float(projected[i]), 2),
+            'projected_total_percentage': round(float(percentages[i]), 2),
+            'projected_exceed_date': str(exceed_dates[i]) if exceeds[i] else None
+        }
+        for i in range(len(spent))
+    ]
+
+
+def add_burn_rates(budgets, today, spent_key: str = 'spent', limit_key: str = 'amount_limit') -> list:
+    """
+    Add burn-rate projections to budget rows in place.
+    
+    Rows are left unchanged when numpy is not installed.
+    
+    Args:
+        budgets: Rows with start_date, end_date and the spent and limit keys
+        today: Current date
+        spent_key: Key of the spend so far
+        limit_key: Key of the budget limit
+        
+    Returns:
+        The same rows
+    """
+    if not NUMPY_AVAILABLE or not budgets:
+        return budgets
+    
+    projections = project_budgets(
+        [b[spent_key] for b in budgets],
+        [b[limit_key] for b in budgets],
+        [b['start_date'] for b in budgets],
+        [b['end_date'] for b in budgets],
+        today
+    )
+    for budget, projection in zip(budgets, projections):
+        budget.update(projection)
+    return budgets
@@ -0,0 +1,30 @@
+"""
+Column-oriented responses for MoneyMinder
+Lets clients ask list and chart endpoints for columns instead of row objects.
+
+A row-per-object response repeats every column name on every row. Clients
+that send ?format=columnar, or accept COLUMNAR_MEDIA_TYPE, get
+    
+    {"columns": ["transaction_id", "amount", ...],
+     "data": [[1, -50000.0, ...], [2, 120000.0, ...]]}
+
+in place of each list, read straight from a tuple cursor.
+"""
+from flask import request
+
+
+COLUMNAR_MEDIA_TYPE = 'application/vnd.moneyminder.columnar+json'
+
+
+def wants_columnar() -> bool:
+    """
+    Check whether the current request asked for columnar lists.
+    
+    Returns:
+        True for ?format=columnar or an Accept header preferring
+        COLUMNAR_MEDIA_TYPE over plain JSON
+    """
+    if request.args.get('format') == 'columnar':
+        return True
+    best = request.accept_mimetypes.best_match(['application/json', COLUMNAR_MEDIA_TYPE])
+    return best == COLUMNAR_MEDIA_TYPE
@@ -0,0 +1,173 @@
+"""
+Response compression for MoneyMinder
+Compresses responses with brotli or gzip, negotiated from Accept-Encoding.
+
+Buffered responses smaller than COMPRESS_MIN_SIZE bytes are sent as they
+are, since compressing them saves little and costs CPU. Streamed responses
+are compressed chunk by chunk and flushed after every chunk, so a client
+receives each part of a chunked export as soon as it is produced.
+
+Brotli is used when the brotli package is installed and the client
+accepts it; otherwise gzip from the standard library.
+"""
+import logging
+import zlib
+
+from flask import request
+
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except ImportError:
+    BROTLI_AVAILABLE = False
+
+
+# Content types worth compressing; images and archives are already compressed
+COMPRESSIBLE_MIMETYPES = {
+    'application/json',
+    'application/javascript',
+    'application/xml',
+    'text/csv',
+    'text/html',
+    'text/plain',
+    'text/css',
+}
+
+# zlib window bits that produce a gzip header and trailer
+GZIP_WBITS = 16 + zlib.MAX_WBITS
+
+
+def choose_encoding(accept_encoding, brotli_enabled: bool = BROTLI_AVAILABLE):
+    """
+    Pick the best encoding the client accepts.
+    
+    Args:
+        accept_encoding: Parsed Accept-Encoding header
+        brotli_enabled: Whether brotli may be used
+        
+    Returns:
+        'br', 'gzip' or None
+    """
+    if brotli_enabled and accept_encoding['br'] > 0:
+        return 'br'
+    if accept_encoding['gzip'] > 0:
+        return 'gzip'
+    return None
+
+
+def _compressor(encoding: str, gzip_level: int, brotli_level: int):
+    """Create an incremental compressor returning (compress, flush, finish) callables."""
+    if encoding == 'br':
+        compressor = brotli.Compressor(quality=brotli_level)
+        return (compressor.process, compressor.flush, compressor.finish)
+    compressor = zlib.compressobj(gzip_level, zlib.DEFLATED, GZIP_WBITS)
+    return (
+        compressor.compress,
+        lambda: compressor.flush(zlib.Z_SYNC_FLUSH),
+        compressor.flush,
+    )
+
+
+def compress_bytes(data: bytes, encoding: str, gzip_level: int = 6, brotli_level: int = 4) -> bytes:
+    """
+    Compress a whole body in one call.
+    
+    Args:
+        data: Uncompressed body
+        encoding: 'br' or 'gzip'
+        gzip_level: zlib level 1-9
+        brotli_level: Brotli quality 0-11
+        
+    Returns:
+        Compressed body
+    """
+    if encoding == 'br':
+        return brotli.compress(data, quality=brotli_level)
+    compressor = zlib.compressobj(gzip_level, zlib.DEFLATED, GZIP_WBITS)
+    return compressor.compress(data) + compressor.flush()
+
+
+def compress_stream(chunks, encoding: str, gzip_level: int = 6, brotli_level: int = 4):
+    """
+    Compress an iterable of chunks, flushing after each one.
+    
+    Args:
+        chunks: Iterable of str or bytes chunks
+        encoding: 'br' or 'gzip'
+        gzip_level: zlib level 1-9
+        brotli_level: Brotli quality 0-11
+        
+    Yields:
+        Compressed chunks
+    """
+    compress, flush, finish = _compressor(encoding, gzip_level, brotli_level)
+    try:
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode('utf-8')
+            if not chunk:
+                continue
+            data = compress(chunk) + flush()
+            if data:
+                yield data
+        tail = finish()
+        if tail:
+            yield tail
+    finally:
+        close = getattr(chunks, 'close', None)
+        if close:
+            close()
+
+
+def init_compression(app):
+    """
+    Compress responses for the Flask application.
+    
+    Settings are read from app.config: COMPRESS_MIN_SIZE (bytes),
+    COMPRESS_GZIP_LEVEL and COMPRESS_BROTLI_LEVEL.
+    
+    Args:
+        app: Flask application instance
+    """
+    min_size = app.config.get('COMPRESS_MIN_SIZE', 500)
+    gzip_level = app.config.get('COMPRESS_GZIP_LEVEL', 6)
+    brotli_level = app.config.get('COMPRESS_BROTLI_LEVEL', 4)
+    
+    if not BROTLI_AVAILABLE:
+        logging.info("brotli not installed. Responses will be compressed with gzip only.")
+    
+    @app.after_request
+    def compress_response(response):
+        if (
+            response.status_code < 200
+            or response.status_code in (204, 206, 304)
+            or 'Content-Encoding' in response.headers
+            or response.mimetype not in COMPRESSIBLE_MIMETYPES
+            or request.method == 'HEAD'
+        ):
+            return response
+        
+        response.vary.add('Accept-Encoding')
+        
+        encoding = choose_encoding(request.accept_encodings)
+        if encoding is None:
+            return response
+        
+        if response.is_streamed:
+            response.response = compress_stream(response.response, encoding, gzip_level, brotli_level)
+            response.direct_passthrough = False
+            response.headers.pop('Content-Length', None)
+        else:
+            data = response.get_data()
+            if len(data) < min_size:
+                return response
+            response.set_data(compress_bytes(data, encoding, gzip_level, brotli_level))
+        
+        response.headers['Content-Encoding'] = encoding
+        
+        # The compressed body has a different strong validator
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+        
+        return response
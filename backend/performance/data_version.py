@@ -0,0 +1,201 @@
+"""
+Per-user data versions and conditional GET for MoneyMinder
+Lets clients revalidate cached lists without the server re-running queries.
+
+Each user has a counter in User_Data_Versions that is incremented after
+every successful write in a tracked blueprint. Read endpoints decorated
+with @conditional_get derive a weak ETag from the counter and the request
+URL, and answer a matching If-None-Match with 304 Not Modified after a
+single primary key lookup, without calling the view.
+
+The counter is stored in MySQL so every worker process sees the same value.
+"""
+import hashlib
+import logging
+import threading
+from datetime import date
+from functools import wraps
+
+from flask import current_app, g, make_response, request
+
+
+logger = logging.getLogger(__name__)
+
+WRITE_METHODS = frozenset(('POST', 'PUT', 'PATCH', 'DELETE'))
+
+
+class DataVersion:
+    """Per-user data version counters"""
+    
+    # Callables notified with the set of user ids after each bump
+    _listeners = []
+    _lock = threading.Lock()
+    
+    @staticmethod
+    def get(user_id: int) -> int:
+        """
+        Get the user's current data version.
+        
+        Args:
+            user_id: User ID
+            
+        Returns:
+            Version number, 0 if the user has never written
+        """
+        from database import Database
+        
+        row = Database.execute_query(
+            "SELECT version FROM User_Data_Versions WHERE user_id = %s",
+            (user_id,),
+            fetch_one=True
+        )
+        return int(row['version']) if row else 0
+    
+    @classmethod
+    def bump(cls, user_ids) -> None:
+        """
+        Increment the data version of one or more users.
+        
+        Args:
+            user_ids: User ID or iterable of user IDs
+        """
+        from database import Database
+        
+        if isinstance(user_ids, int):
+            user_ids = (user_ids,)
+        user_ids = sorted({int(u) for u in user_ids if u})
+        if not user_ids:
+            return
+        
+        Database.execute_many(
+            """
+            INSERT INTO User_Data_Versions (user_id, version) VALUES (%s, 1)
+            ON DUPLICATE KEY UPDATE version = version + 1
+            """,
+            [(user_id,) for user_id in user_ids]
+        )
+        
+        for listener in list(cls._listeners):
+            try:
+                listener(user_ids)
+            except Exception as e:
+                logger.error(f"Data version listener failed: {e}")
+    
+    @classmethod
+    def add_listener(cls, listener) -> None:
+        """
+        Register a callable to run after every bump.
+        
+        Args:
+            listener: Callable taking the list of bumped user ids
+        """
+        with cls._lock:
+            if listener not in cls._listeners:
+                cls._listeners.append(listener)
+
+
+def make_etag(user_id: int, version: int) -> str:
+    """
+    Build the ETag for the current request at a data version.
+    
+    The URL and Accept header are included so that different pages,
+    filters and response formats never share a tag, and today's date so
+    that values computed from the current date are refreshed daily.
+    
+    Args:
+        user_id: User ID
+        version: User's data version
+        
+    Returns:
+        ETag value without quotes
+    """
+    variant = f"{date.today()}|{request.full_path}|{request.headers.get('Accept', '')}"
+    digest = hashlib.blake2b(variant.encode('utf-8'), digest_size=8).hexdigest()
+    return f"{user_id}-{version}-{digest}"
+
+
+def _cache_headers(response, etag: str):
+    response.set_etag(etag, weak=True)
+    response.headers['Cache-Control'] = 'private, no-cache'
+    response.vary.add('Authorization')
+    return response
+
+
+def conditional_get(f):
+    """
+    Decorator answering If-None-Match from the user's data version.
+    
+    Must be applied below @require_auth so request.user_id is available.
+    Only 200 responses are tagged.
+    """
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        try:
+            version = DataVersion.get(request.user_id)
+        except Exception as e:
+            # Serve the request untagged rather than fail it
+            logger.warning(f"Data version lookup failed: {e}")
+            return f(*args, **kwargs)
+        
+        etag = make_etag(request.user_id, version)
+        if request.if_none_match.contains_weak(etag):
+            return _cache_headers(current_app.response_class(status=304), etag)
+        
+        response = make_response(f(*args, **kwargs))
+        if response.status_code == 200:
+            _cache_headers(response, etag)
+        return response
+    
+    return decorated_function
+
+
+def read_only(f):
+    """
+    Decorator marking a POST view of a tracked blueprint as not changing
+    user data, so a successful call does not bump the data version.
+    """
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        g.data_version_read_only = True
+        return f(*args, **kwargs)
+    
+    return decorated_function
+
+
+def track_writes(blueprint, affected_users=None):
+    """
+    Bump the data version after successful writes in a blueprint.
+    
+    Args:
+        blueprint: Flask blueprint whose POST/PUT/PATCH/DELETE requests
+            change user data, except views decorated with @read_only
+        affected_users: Optional callable returning further user ids whose
+            data the current request changes; called before the view runs
+    """
+    if affected_users is not None:
+        @blueprint.before_request
+        def collect_affected_users():
+            if request.method in WRITE_METHODS:
+                try:
+                    g.data_version_users = set(affected_users())
+                except Exception as e:
+                    logger.error(f"Could not collect affected users: {e}")
+                    g.data_version_users = set()
+    
+    @blueprint.after_request
+    def bump_data_version(response):
+        if request.method not in WRITE_METHODS or response.status_code >= 400:
+            return response
+        if g.pop('data_version_read_only', False):
+            return response
+        
+        user_ids = set(g.pop('data_version_users', ()))
+        user_id = getattr(request, 'user_id', None)
+        if user_id:
+            user_ids.add(user_id)
+        
+        try:
+            DataVersion.bump(user_ids)
+        except Exception as e:
+            logger.error(f"Failed to bump data version: {e}")
+        return response
@@ -0,0 +1,193 @@
+"""
+Cash-flow forecasting for MoneyMinder
+Projects each account's daily balance from recurring payment schedules
+and the user's usual discretionary spending.
+
+Recurring schedules are expanded into individual occurrences with array
+arithmetic instead of stepping through dates one by one: every payment's
+occurrence count is computed up front, the occurrences are laid out with
+np.repeat, and their dates are derived from the occurrence number. Daily
+and weekly payments advance by a fixed number of days; monthly and yearly
+payments advance by whole months, keeping the original day of the month
+and moving to the last day of shorter months.
+
+numpy is optional: without it NUMPY_AVAILABLE is False and the functions
+here cannot be used.
+"""
+import logging
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+    logging.warning("numpy not installed. Cash-flow forecast disabled.")
+
+
+# Step of each frequency, as (days, months)
+FREQUENCY_STEPS = {
+    'Daily': (1, 0),
+    'Weekly': (7, 0),
+    'Monthly': (0, 1),
+    'Yearly': (0, 12),
+}
+
+
+def expand_occurrences(next_due, frequencies, last_day):
+    """
+    Expand recurring schedules into occurrences up to a day.
+    
+    Args:
+        next_due: datetime64[D] array of each payment's next due date
+        frequencies: Sequence of frequency names, one per payment
+        last_day: datetime64[D] of the last day to include
+        
+    Returns:
+        Tuple of (payment index, datetime64[D] date) arrays, one entry per
+        occurrence
+    """
+    next_due = np.asarray(next_due, dtype='datetime64[D]')
+    last_day = np.datetime64(last_day, 'D')
+    steps = np.array([FREQUENCY_STEPS[f] for f in frequencies], dtype=np.int64).reshape(-1, 2)
+    step_days, step_months = steps[:, 0], steps[:, 1]
+    by_day = step_days > 0
+    
+    # Occurrences per payment; for month steps this is an upper bound, as
+    # the last one may fall after last_day once the day of month is applied
+    next_month = next_due.astype('datetime64[M]')
+    span_days = (last_day - next_due).astype(np.int64)
+    span_months = (last_day.astype('datetime64[M]') - next_month).astype(np.int64)
+    counts = np.where(
+        by_day,
+        span_days // np.maximum(step_days, 1) + 1,
+        span_months // np.maximum(step_months, 1) + 1
+    )
+    counts = np.where(next_due <= last_day, counts, 0)
+    
+    index = np.repeat(np.arange(len(next_due)), counts)
+    k = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    
+    day_dates = next_due[index] + k * step_days[index]
+    
+    months = next_month[index] + k * step_months[index]
+    month_start = months.astype('datetime64[D]')
+    month_length = ((months + 1).astype('datetime64[D]') - month_start).astype(np.int64)
+    day_of_month = (next_due - next_month.astype('datetime64[D]')).astype(np.int64)[index]
+    month_dates = month_start + np.minimum(day_of_month, month_length - 1)
+    
+    dates = np.where(by_day[index], day_dates, month_dates)
+    keep = dates <= last_day
+    return index[keep], dates[keep]
+
+
+def project_balances(start_balances, event_accounts, event_offsets, event_amounts, daily_changes, days):
+    """
+    Project daily closing balances per account.
+    
+    Args:
+        start_balances: Current balance per account
+        event_accounts: Account index of each dated event
+        event_offsets: Day of each event within the horizon (0 = first day)
+        event_amounts: Signed amount of each event
+        daily_changes: Signed amount applied to each account every day
+        days: Number of days in the horizon
+        
+    Returns:
+        Array of shape (accounts, days) with each day's closing balance
+    """
+    accounts = len(start_balances)
+    changes = np.bincount(
+        np.asarray(event_accounts, dtype=np.int64) * days + np.asarray(event_offsets, dtype=np.int64),
+        weights=np.asarray(event_amounts, dtype=np.float64),
+        minlength=accounts * days
+    ).reshape(accounts, days)
+    changes += np.asarray(daily_changes, dtype=np.float64)[:, None]
+    return np.asarray(start_balances, dtype=np.float64)[:, None] + np.cumsum(changes, axis=1)
+
+
+def build_forecast(accounts, recurring, discretionary, first_day, days: int) -> dict:
+    """
+    Build the forecast response from the user's rows.
+    
+    Args:
+        accounts: Rows with account_id, account_name and balance
+        recurring: Active recurring payment rows with account_id, frequency,
+            next_due_date and signed_amount (negative for expenses)
+        discretionary: Rows with account_id, category_id, category_name and
+            daily_average of non-recurring spending
+        first_day: First date of the horizon (tomorrow)
+        days: Number of days in the horizon
+        
+    Returns:
+        Dict with the dates, per-account daily balances and the recurring
+        and discretionary amounts behind them
+    """
+    first = np.datetime64(first_day, 'D')
+    last = first + (days - 1)
+    account_index = {a['account_id']: i for i, a in enumerate(accounts)}
+    
+    recurring = [r for r in recurring if r['account_id'] in account_index]
+    payment_index, occurrence_dates = expand_occurrences(
+        [r['next_due_date'] for r in recurring],
+        [r['frequency'] for r in recurring],
+        last
+    )
+    # Overdue payments have not been posted yet, so they land on the first day
+    offsets = np.maximum((occurrence_dates - first).astype(np.int64), 0)
+    payment_accounts = np.array([account_index[r['account_id']] for r in recurring], dtype=np.int64)
+    payment_amounts = np.array([float(r['signed_amount']) for r in recurring], dtype=np.float64)
+    amounts = payment_amounts[payment_index]
+    
+    daily_changes = np.zeros(len(accounts))
+    by_category = {}
+    for row in discretionary:
+        average = float(row['daily_average'])
+        if row['account_id'] in account_index:
+            daily_changes[account_index[row['account_id']]] -= average
+        category = by_category.setdefault(row['category_id'], {
+            'category_id': row['category_id'],
+            'category_name': row['category_name'],
+            'daily_average': 0.0
+        })
+        category['daily_average'] += average
+    
+    balances = np.round(project_balances(
+        [float(a['balance'] or 0) for a in accounts],
+        payment_accounts[payment_index],
+        offsets,
+        amounts,
+        daily_changes,
+        days
+    ), 2)
+    
+    dates = np.arange(first, last + 1).astype(str).tolist()
+    projected = []
+    for i, account in enumerate(accounts):
+        lowest = int(np.argmin(balances[i]))
+        projected.append({
+            'account_id': account['account_id'],
+            'account_name': account['account_name'],
+            'current_balance': float(account['balance'] or 0),
+            'projected_balance': float(balances[i, -1]),
+            'lowest_balance': float(balances[i, lowest]),
+            'lowest_balance_date': dates[lowest],
+            'daily_balances': balances[i].tolist()
+        })
+    
+    for category in by_category.values():
+        category['daily_average'] = round(category['daily_average'], 2)
+    
+    return {
+        'start_date': dates[0],
+        'end_date': dates[-1],
+        'days': days,
+        'dates': dates,
+        'accounts': projected,
+        'total_daily_balances': np.round(balances.sum(axis=0), 2).tolist(),
+        'recurring': {
+            'occurrences': int(len(amounts)),
+            'income': round(float(amounts[amounts > 0].sum()), 2),
+            'expense': round(float(-amounts[amounts < 0].sum()), 2)
+        },
+        'discretionary': sorted(by_category.values(), key=lambda c: -c['daily_average'])
+    }
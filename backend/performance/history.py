@@ -0,0 +1,375 @@
+"""
+Columnar transaction history for MoneyMinder analytics
+Loads a user's transactions once into NumPy arrays and computes
+statistics over them without further queries.
+
+Each history holds one entry per transaction in five parallel arrays:
+  days         int64  days since 1970-01-01
+  amounts      int64  amount in minor units (cents)
+  codes        int16  index into the category table below
+  is_expense   bool   whether the category is an expense category
+  ids          int64  transaction_id
+
+Categories are stored once, in category_ids / category_names, and every
+transaction refers to them by code. Histories are cached per process in an
+LRU and reused until the user's data version changes.
+
+numpy is optional: without it NUMPY_AVAILABLE is False and
+get_history raises RuntimeError.
+"""
+import logging
+import threading
+from collections import OrderedDict
+from datetime import date
+
+from config import Config
+from performance.data_version import DataVersion
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+    logging.warning("numpy not installed. Statistics endpoints disabled.")
+
+
+logger = logging.getLogger(__name__)
+
+# Minor units per currency unit
+MINOR_UNITS = 100
+
+WEEKDAY_NAMES = ('Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday')
+
+
+def day_number(value) -> int:
+    """Get the number of days since 1970-01-01 for a date"""
+    return (value - date(1970, 1, 1)).days
+
+
+def day_to_date(day: int) -> str:
+    """Format a day number as YYYY-MM-DD"""
+    return str(np.datetime64(int(day), 'D'))
+
+
+class UserHistory:
+    """A user's transactions as parallel NumPy arrays"""
+    
+    __slots__ = ('ids', 'days', 'amounts', 'codes', 'is_expense', 'category_ids', 'category_names')
+    
+    def __init__(self, ids, days, amounts, codes, is_expense, category_ids, category_names):
+        self.ids = ids
+        self.days = days
+        self.amounts = amounts
+        self.codes = codes
+        self.is_expense = is_expense
+        self.category_ids = category_ids
+        self.category_names = category_names
+    
+    @classmethod
+    def from_rows(cls, rows) -> 'UserHistory':
+        """
+        Build a history from query rows.
+        
+        Args:
+            rows: Sequence of (transaction_id, transaction_date, amount,
+                category_id, category_name, is_expense) tuples
+                
+        Returns:
+            UserHistory
+        """
+        count = len(rows)
+        if not count:
+            empty = np.empty(0, dtype=np.int64)
+            return cls(empty, empty, empty, np.empty(0, dtype=np.int16),
+                       np.empty(0, dtype=bool), empty, [])
+        
+        ids, dates, amounts, category_ids, names, expense = zip(*rows)
+        days = np.array(dates, dtype='datetime64[D]').astype(np.int64)
+        # Decimal amounts are scaled exactly, never through float
+        amounts = np.fromiter((int(a.scaleb(2)) if hasattr(a, 'scaleb') else round(a * MINOR_UNITS)
+                               for a in amounts), dtype=np.int64, count=count)
+        unique_ids, first_index, codes = np.unique(
+            np.fromiter(category_ids, dtype=np.int64, count=count), return_index=True, return_inverse=True
+        )
+        
+        return cls(
+            ids=np.fromiter(ids, dtype=np.int64, count=count),
+            days=days,
+            amounts=amounts,
+            codes=codes.astype(np.int16),
+            is_expense=np.fromiter(expense, dtype=bool, count=count),
+            category_ids=unique_ids,
+            category_names=[names[i] for i in first_index]
+        )
+    
+    def __len__(self):
+        return len(self.ids)
+    
+    @property
+    def nbytes(self) -> int:
+        """Memory used by the arrays"""
+        return sum(a.nbytes for a in (self.ids, self.days, self.amounts, self.codes, self.is_expense))
+    
+    def _category(self, code: int) -> dict:
+        return {'category_id': int(self.category_ids[code]), 'category_name': self.category_names[code]}
+    
+    def rolling_average(self, window: int, days: int, today: int) -> list:
+        """
+        Daily expense totals with their trailing moving average.
+        
+        Args:
+            window: Days in the moving average
+            days: Number of days to return, ending today
+            today: Day number of today
+            
+        Returns:
+            List of {date, total, average} dicts, oldest first
+        """
+        first = today - days - window + 2
+        mask = self.is_expense & (self.days >= first) & (self.days <= today)
+        totals = np.bincount(self.days[mask] - first, weights=self.amounts[mask],
+                             minlength=days + window - 1)
+        
+        running = np.concatenate(([0.0], np.cumsum(totals)))
+        averages = (running[window:] - running[:-window]) / window
+        totals = totals[window - 1:]
+        
+        return [
+            {
+                'date': day_to_date(today - days + 1 + i),
+                'total': totals[i] / MINOR_UNITS,
+                'average': round(averages[i] / MINOR_UNITS, 2)
+            }
+            for i in range(days)
+        ]
+    
+    def percentiles(self, quantiles, since: int = None) -> list:
+        """
+        Percentiles of expense amounts per category.
+        
+        All categories are computed at once: amounts are sorted within
+        categories and each percentile is read from its position in the
+        sorted run, with linear interpolation.
+        
+        Args:
+            quantiles: Percentiles to compute, between 0 and 100
+            since: Only include transactions on or after this day number
+            
+        Returns:
+            List of dicts per category with transaction_count and
+            percentiles keyed by 'p<n>'
+        """
+        mask = self.is_expense if since is None else self.is_expense & (self.days >= since)
+        codes = self.codes[mask]
+        amounts = self.amounts[mask]
+        if not len(codes):
+            return []
+        
+        order = np.lexsort((amounts, codes))
+        codes = codes[order]
+        amounts = amounts[order].astype(np.float64)
+        
+        present, starts, counts = np.unique(codes, return_index=True, return_counts=True)
+        q = np.asarray(quantiles, dtype=np.float64) / 100
+        
+        # Fractional position of each percentile within each category's run
+        position = starts[:, None] + q[None, :] * (counts[:, None] - 1)
+        lower = np.floor(position).astype(np.int64)
+        upper = np.minimum(lower + 1, (starts + counts - 1)[:, None])
+        fraction = position - lower
+        values = amounts[lower] * (1 - fraction) + amounts[upper] * fraction
+        
+        labels = [f'p{p:g}' for p in quantiles]
+        return [
+            {
+                **self._category(code),
+                'transaction_count': int(counts[i]),
+                'percentiles': {label: round(values[i, j] / MINOR_UNITS, 2) for j, label in enumerate(labels)}
+            }
+            for i, code in enumerate(present)
+        ]
+    
+    def weekday_profile(self, since: int = None) -> list:
+        """
+        Expense totals and averages by day of the week.
+        
+        The average divides each weekday's total by the number of times
+        that weekday occurs in the covered period, so weekdays without
+        spending count as zero.
+        
+        Args:
+            since: Only include transactions on or after this day number
+            
+        Returns:
+            List of seven dicts, Monday first
+        """
+        mask = self.is_expense if since is None else self.is_expense & (self.days >= since)
+        days = self.days[mask]
+        if not len(days):
+            return [{'weekday': name, 'transaction_count': 0, 'total': 0.0, 'average': 0.0}
+                    for name in WEEKDAY_NAMES]
+        
+        # 1970-01-01 was a Thursday
+        weekdays = (days + 3) % 7
+        totals = np.bincount(weekdays, weights=self.amounts[mask], minlength=7)
+        counts = np.bincount(weekdays, minlength=7)
+        start = days.min() if since is None else since
+        occurrences = np.bincount((np.arange(start, days.max() + 1) + 3) % 7, minlength=7)
+        averages = totals / np.maximum(occurrences, 1)
+        
+        return [
+            {
+                'weekday': name,
+                'transaction_count': int(counts[i]),
+                'total': totals[i] / MINOR_UNITS,
+                'average': round(averages[i] / MINOR_UNITS, 2)
+            }
+            for i, name in enumerate(WEEKDAY_NAMES)
+        ]
+    
+    def zscores(self, threshold: float, since: int = None, limit: int = 50) -> list:
+        """
+        Expense transactions far from their category's mean.
+        
+        Each category's mean and standard deviation come from all of the
+        user's expenses in that category; only transactions on or after
+        since are reported.
+        
+        Args:
+            threshold: Minimum absolute z-score to report
+            since: Only report transactions on or after this day number
+            limit: Most transactions to return
+            
+        Returns:
+            List of transaction dicts with z_score, largest first
+        """
+        expense = self.is_expense
+        if not expense.any():
+            return []
+        
+        size = len(self.category_ids)
+        codes = self.codes[expense]
+        amounts = self.amounts[expense].astype(np.float64)
+        counts = np.bincount(codes, minlength=size)
+        means = np.bincount(codes, weights=amounts, minlength=size) / np.maximum(counts, 1)
+        variances = np.bincount(codes, weights=(amounts - means[codes]) ** 2, minlength=size) / np.maximum(counts, 1)
+        stds = np.sqrt(variances)
+        
+        with np.errstate(divide='ignore', invalid='ignore'):
+            scores = (amounts - means[codes]) / stds[codes]
+        selected = np.isfinite(scores) & (np.abs(scores) >= threshold)
+        if since is not None:
+            selected &= self.days[expense] >= since
+        
+        indices = np.flatnonzero(selected)
+        indices = indices[np.argsort(-np.abs(scores[indices]), kind='stable')][:limit]
+        ids = self.ids[expense]
+        days = self.days[expense]
+        
+        return [
+            {
+                'transaction_id': int(ids[i]),
+                'date': day_to_date(days[i]),
+                **self._category(codes[i]),
+                'amount': amounts[i] / MINOR_UNITS,
+                'category_mean': round(means[codes[i]] / MINOR_UNITS, 2),
+                'z_score': round(float(scores[i]), 2)
+            }
+            for i in indices
+        ]
+
+
+class HistoryCache:
+    """LRU of user histories, each valid for one data version"""
+    
+    def __init__(self, max_users: int):
+        self.max_users = max_users
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+    
+    def get(self, user_id: int, version: int):
+        """Get the user's history if it was loaded at this version."""
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None or entry[0] != version:
+                return None
+            self._entries.move_to_end(user_id)
+            return entry[1]
+    
+    def put(self, user_id: int, version: int, history: UserHistory) -> None:
+        """Store a history, evicting the least recently used user if full."""
+        with self._lock:
+            self._entries[user_id] = (version, history)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_users:
+                self._entries.popitem(last=False)
+    
+    def invalidate_users(self, user_ids) -> None:
+        """Drop the histories of the given users."""
+        with self._lock:
+            for user_id in user_ids:
+                self._entries.pop(user_id, None)
+    
+    def clear(self) -> None:
+        """Drop every history."""
+        with self._lock:
+            self._entries.clear()
+    
+    def __len__(self):
+        return len(self._entries)
+
+
+history_cache = HistoryCache(Config.HISTORY_CACHE_USERS)
+DataVersion.add_listener(history_cache.invalidate_users)
+
+
+def load_history(user_id: int) -> UserHistory:
+    """Load a user's full transaction history from the database."""
+    from database import Database
+    
+    result = Database.execute_query(
+        """
+        SELECT
+            t.transaction_id,
+            t.transaction_date,
+            t.amount,
+            t.category_id,
+            c.category_name,
+            c.type = 'Expense' as is_expense
+        FROM Transactions t
+        JOIN Categories c ON t.category_id = c.category_id
+        WHERE t.user_id = %s
+        ORDER BY t.transaction_date, t.transaction_id
+        """,
+        (user_id,),
+        fetch_all=True,
+        columnar=True
+    )
+    return UserHistory.from_rows(result['data'])
+
+
+def get_history(user_id: int) -> UserHistory:
+    """
+    Get a user's history, loading it if the cached copy is out of date.
+    
+    Args:
+        user_id: User ID
+        
+    Returns:
+        UserHistory
+        
+    Raises:
+        RuntimeError: If numpy is not installed
+    """
+    if not NUMPY_AVAILABLE:
+        raise RuntimeError('Statistics require numpy')
+    
+    from monitoring.metrics import record_cache_lookup
+    
+    version = DataVersion.get(user_id)
+    history = history_cache.get(user_id, version)
+    record_cache_lookup('transaction_history', history is not None)
+    if history is None:
+        history = load_history(user_id)
+        history_cache.put(user_id, version, history)
+    return history
@@ -0,0 +1,108 @@
+"""
+Fast JSON serialization for MoneyMinder
+Flask JSON provider that encodes database rows without per-row conversion.
+
+PyMySQL returns DECIMAL columns as Decimal and DATE/DATETIME columns as
+date/datetime. The provider writes them directly in the formats the API
+has always used, so routes can return query results as they are:
+    
+    Decimal   -> number       1234.5
+    date      -> "YYYY-MM-DD"
+    datetime  -> "YYYY-MM-DD HH:MM:SS"
+
+orjson is used when it is installed; otherwise the standard library
+encoder is used with the same conversions.
+"""
+import logging
+from datetime import date, datetime
+from decimal import Decimal
+
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+
+DATE_FORMAT = '%Y-%m-%d'
+DATETIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+
+def _default(o):
+    """Convert values the encoder does not handle natively."""
+    if isinstance(o, Decimal):
+        return float(o)
+    if isinstance(o, datetime):
+        return o.strftime(DATETIME_FORMAT)
+    if isinstance(o, date):
+        return o.strftime(DATE_FORMAT)
+    if hasattr(o, '__html__'):
+        return str(o.__html__())
+    raise TypeError(f"Object of type {type(o).__name__} is not JSON serializable")
+
+
+if ORJSON_AVAILABLE:
+    # Datetimes are passed to _default so they keep the API's formats
+    # instead of orjson's RFC 3339 output
+    ORJSON_OPTIONS = (
+        orjson.OPT_PASSTHROUGH_DATETIME
+        | orjson.OPT_NON_STR_KEYS
+        | orjson.OPT_SERIALIZE_NUMPY
+    )
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """JSON provider serializing Decimal and datetime values natively"""
+    
+    default = staticmethod(_default)
+    
+    # Key order follows the query's column order
+    sort_keys = False
+    
+    def dumps(self, obj, **kwargs) -> str:
+        """
+        Serialize data as JSON.
+        
+        Calls with standard library options other than indent fall back
+        to the standard library encoder.
+        """
+        if not ORJSON_AVAILABLE or set(kwargs) - {'indent', 'separators'}:
+            return super().dumps(obj, **kwargs)
+        return self._encode(obj, kwargs.get('indent')).decode('utf-8')
+    
+    def response(self, *args, **kwargs):
+        """
+        Serialize the given arguments as a JSON response.
+        
+        With orjson the bytes are passed straight to the response without
+        an intermediate str.
+        """
+        if not ORJSON_AVAILABLE:
+            return super().response(*args, **kwargs)
+        
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = 2 if (self.compact is None and self._app.debug) or self.compact is False else None
+        return self._app.response_class(self._encode(obj, indent) + b'\n', mimetype=self.mimetype)
+    
+    def _encode(self, obj, indent=None) -> bytes:
+        options = ORJSON_OPTIONS
+        if indent:
+            options |= orjson.OPT_INDENT_2
+        if self.sort_keys:
+            options |= orjson.OPT_SORT_KEYS
+        return orjson.dumps(obj, default=_default, option=options)
+
+
+def init_json_provider(app):
+    """
+    Use the fast JSON provider for the Flask application.
+    
+    Args:
+        app: Flask application instance
+    """
+    if not ORJSON_AVAILABLE:
+        logging.warning("orjson not installed. Using the standard library JSON encoder.")
+    app.json_provider_class = FastJSONProvider
+    app.json = FastJSONProvider(app)
@@ -0,0 +1,232 @@
+"""
+Pivot queries for MoneyMinder analytics
+Builds one GROUP BY ... WITH ROLLUP query for any combination of
+whitelisted dimensions, with subtotals for every level of the grouping.
+
+Dimensions and measures are only ever taken from the tables below, never
+from the request, so the generated SQL contains no user input other than
+bound parameters.
+
+When every requested dimension and filter is available at day grain per
+category (time, category and type), the query reads Daily_Category_Rollups
+instead of Transactions: a month then costs at most one row per category
+and day rather than one row per transaction. Account and group need the
+transactions themselves.
+
+There is no monthly rollup table. Month, quarter and year pivots sum the
+daily rollup rows, so a year costs up to 366 rows per category; a monthly
+table would need its own set of triggers on Transactions.
+"""
+from datetime import datetime
+
+
+class PivotError(ValueError):
+    """Raised when pivot parameters are not valid"""
+
+
+# Most dimensions in rows and cols together
+MAX_DIMENSIONS = 3
+
+# SQL per dimension; {date} is the date column of the source table
+TIME_DIMENSIONS = {
+    'day': "DATE({date})",
+    'week': "DATE_FORMAT({date}, '%%x-W%%v')",
+    'month': "DATE_FORMAT({date}, '%%Y-%%m')",
+    'quarter': "CONCAT(YEAR({date}), '-Q', QUARTER({date}))",
+    'year': "YEAR({date})",
+}
+
+CATEGORY_DIMENSIONS = {
+    'category': "c.category_name",
+    'type': "c.type",
+}
+
+TRANSACTION_DIMENSIONS = {
+    'account': "a.account_name",
+    'group': "g.group_name",
+}
+
+DIMENSIONS = {**TIME_DIMENSIONS, **CATEGORY_DIMENSIONS, **TRANSACTION_DIMENSIONS}
+
+# Measures over raw transactions and over daily rollups
+MEASURES = {
+    'sum': ("SUM(t.amount)", "SUM(r.total_amount)"),
+    'count': ("COUNT(*)", "SUM(r.txn_count)"),
+    'avg': ("AVG(t.amount)", "SUM(r.total_amount) / SUM(r.txn_count)"),
+    'min': ("MIN(t.amount)", "MIN(r.min_amount)"),
+    'max': ("MAX(t.amount)", "MAX(r.max_amount)"),
+}
+
+# Filter name -> (column on transactions, column on rollups or None)
+FILTERS = {
+    'type': ("c.type", "c.type"),
+    'category': ("t.category_id", "r.category_id"),
+    'account': ("t.account_id", None),
+    'group': ("t.group_id", None),
+}
+
+TYPE_VALUES = ('Income', 'Expense')
+
+
+def parse_dimensions(value: str, name: str) -> list:
+    """Split a comma-separated list of dimensions, checking each one."""
+    dimensions = [d.strip() for d in (value or '').split(',') if d.strip()]
+    for dimension in dimensions:
+        if dimension not in DIMENSIONS:
+            raise PivotError(f"Unknown {name} dimension '{dimension}'. Use one of: {', '.join(DIMENSIONS)}")
+    return dimensions
+
+
+def parse_filters(value: str) -> dict:
+    """
+    Parse filters given as comma-separated name:value pairs.
+    
+    A name may be repeated to match any of several values, for example
+    "type:Expense,category:3,category:5".
+    
+    Returns:
+        Dict of filter name -> list of values
+    """
+    filters = {}
+    for item in (value or '').split(','):
+        if not item.strip():
+            continue
+        name, _, raw = item.partition(':')
+        name, raw = name.strip(), raw.strip()
+        if name not in FILTERS or not raw:
+            raise PivotError(f"Invalid filter '{item.strip()}'. Use name:value with one of: {', '.join(FILTERS)}")
+        
+        if name == 'type':
+            if raw not in TYPE_VALUES:
+                raise PivotError("type filter must be Income or Expense")
+            filters.setdefault(name, []).append(raw)
+        else:
+            try:
+                filters.setdefault(name, []).append(int(raw))
+            except ValueError:
+                raise PivotError(f"{name} filter must be an id")
+    return filters
+
+
+def _parse_date(value: str):
+    if not value:
+        return None
+    try:
+        return datetime.strptime(value[:10], '%Y-%m-%d').date()
+    except ValueError:
+        raise PivotError('Dates must be in YYYY-MM-DD format')
+
+
+def build_pivot_query(user_id: int, rows: list, cols: list, measure: str, filters: dict,
+                      start_date: str = None, end_date: str = None, limit: int = None) -> tuple:
+    """
+    Build the pivot query.
+    
+    Args:
+        user_id: User ID
+        rows: Row dimensions, outermost first
+        cols: Column dimensions, grouped after the row dimensions
+        measure: One of MEASURES
+        filters: Parsed filters from parse_filters
+        start_date: Optional first day (YYYY-MM-DD), inclusive
+        end_date: Optional last day (YYYY-MM-DD), inclusive
+        limit: Optional row limit
+        
+    Returns:
+        Tuple of (query, params, source) where source is 'rollup' or
+        'transactions'
+        
+    Raises:
+        PivotError: If the parameters are not valid
+    """
+    dimensions = rows + cols
+    if not dimensions:
+        raise PivotError('At least one row or column dimension is required')
+    if len(dimensions) > MAX_DIMENSIONS:
+        raise PivotError(f'At most {MAX_DIMENSIONS} dimensions can be combined')
+    if len(set(dimensions)) != len(dimensions):
+        raise PivotError('Each dimension can only be used once')
+    if measure not in MEASURES:
+        raise PivotError(f"Unknown measure '{measure}'. Use one of: {', '.join(MEASURES)}")
+    
+    start = _parse_date(start_date)
+    end = _parse_date(end_date)
+    
+    use_rollup = (
+        not any(d in TRANSACTION_DIMENSIONS for d in dimensions)
+        and all(FILTERS[name][1] for name in filters)
+    )
+    
+    if use_rollup:
+        date_column = "r.day"
+        source_sql = """
+            FROM Daily_Category_Rollups r
+            JOIN Categories c ON c.category_id = r.category_id
+            WHERE r.user_id = %s
+        """
+        value_sql = MEASURES[measure][1]
+    else:
+        date_column = "t.transaction_date"
+        source_sql = """
+            FROM Transactions t
+            JOIN Categories c ON c.category_id = t.category_id
+            JOIN Accounts a ON a.account_id = t.account_id
+            LEFT JOIN `Groups` g ON g.group_id = t.group_id
+            WHERE t.user_id = %s
+        """
+        value_sql = MEASURES[measure][0]
+    
+    params = [user_id]
+    if start:
+        source_sql += f" AND {date_column} >= %s"
+        params.append(start)
+    if end:
+        # Whole last day, written so an index on the date column can be used
+        source_sql += f" AND {date_column} < %s + INTERVAL 1 DAY"
+        params.append(end)
+    for name, values in filters.items():
+        column = FILTERS[name][1] if use_rollup else FILTERS[name][0]
+        source_sql += f" AND {column} IN ({', '.join(['%s'] * len(values))})"
+        params.extend(values)
+    
+    expressions = [DIMENSIONS[d].format(date=date_column) for d in dimensions]
+    select = ', '.join(f"{e} AS `{d}`" for e, d in zip(expressions, dimensions))
+    grouping = ', '.join(f"GROUPING({e}) AS `_total_{d}`" for e, d in zip(expressions, dimensions))
+    order = ', '.join(f"GROUPING({e}), {e}" for e in expressions)
+    
+    query = f"""
+        SELECT {select}, {value_sql} AS value, {grouping}
+        {source_sql}
+        GROUP BY {', '.join(expressions)} WITH ROLLUP
+        ORDER BY {order}
+    """
+    if limit:
+        query += " LIMIT %s"
+        params.append(limit)
+    
+    return query, tuple(params), 'rollup' if use_rollup else 'transactions'
+
+
+def shape_pivot_rows(result: list, dimensions: list) -> list:
+    """
+    Turn query rows into pivot cells.
+    
+    Dimensions summed over in a subtotal row are set to None and the cell
+    is marked with "total": true, so a subtotal can be told apart from a
+    real NULL value such as a transaction without a group.
+    """
+    cells = []
+    for row in result:
+        cell = {}
+        total = False
+        for dimension in dimensions:
+            if row[f'_total_{dimension}']:
+                cell[dimension] = None
+                total = True
+            else:
+                cell[dimension] = row[dimension]
+        cell['value'] = row['value']
+        if total:
+            cell['total'] = True
+        cells.append(cell)
+    return cells
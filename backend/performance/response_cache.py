@@ -0,0 +1,191 @@
+"""
+Stale-while-revalidate response cache for MoneyMinder
+Serves expensive analytics responses from memory.
+
+Each cached endpoint has a policy of two ages. A response younger than
+its fresh age is served as is. A response past its fresh age but younger
+than its stale age is still served immediately, and one background
+thread recomputes it for the next request. Older responses are computed
+again in the request.
+
+Entries are stored with the user's data version (see data_version.py)
+and are only served while it is unchanged, so a user sees their own
+writes at once, whichever worker process handled them. Bumps made in
+this process also drop the user's entries straight away through a
+DataVersion listener. Memory is bounded by ANALYTICS_CACHE_MAX_BYTES,
+evicting the least recently used responses first.
+"""
+import logging
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from functools import wraps
+
+from flask import current_app, g, make_response, request
+
+from config import Config
+from monitoring.metrics import record_cache_lookup
+from performance.data_version import DataVersion
+from performance.singleflight import request_key
+
+
+logger = logging.getLogger(__name__)
+
+CacheEntry = namedtuple('CacheEntry', ['body', 'status', 'headers', 'version', 'created'])
+
+
+class ResponseCache:
+    """Byte-bounded LRU cache of response snapshots"""
+    
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._size = 0
+    
+    def get(self, key):
+        """Get the entry for key, or None, marking it recently used."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+    
+    def put(self, key, entry: CacheEntry) -> None:
+        """Store an entry, evicting least recently used ones to stay in bounds."""
+        size = len(entry.body)
+        if size > self.max_bytes:
+            return
+        
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._size -= len(old.body)
+            self._entries[key] = entry
+            self._size += size
+            
+            while self._size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted.body)
+    
+    def invalidate_users(self, user_ids) -> None:
+        """Drop every entry belonging to the given users."""
+        user_ids = set(user_ids)
+        with self._lock:
+            for key in [k for k in self._entries if k[0] in user_ids]:
+                self._size -= len(self._entries.pop(key).body)
+    
+    def clear(self) -> None:
+        """Drop every entry."""
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+    
+    @property
+    def size(self) -> int:
+        """Bytes of response bodies currently stored"""
+        return self._size
+    
+    def __len__(self):
+        return len(self._entries)
+
+
+analytics_cache = ResponseCache(Config.ANALYTICS_CACHE_MAX_BYTES)
+DataVersion.add_listener(analytics_cache.invalidate_users)
+
+# A single thread recomputes stale responses, so refreshes never compete
+# with requests for more than one connection
+_refresher = ThreadPoolExecutor(max_workers=1, thread_name_prefix='cache-refresh')
+_refreshing = set()
+_refreshing_lock = threading.Lock()
+
+
+def _snapshot(response, version: int) -> CacheEntry:
+    return CacheEntry(
+        response.get_data(), response.status_code, list(response.headers.items()), version, time.monotonic()
+    )
+
+
+def _from_entry(entry: CacheEntry, state: str):
+    response = current_app.response_class(entry.body, status=entry.status, headers=entry.headers)
+    response.headers['X-Cache'] = state
+    return response
+
+
+def _schedule_refresh(key, view, args, kwargs) -> None:
+    """Recompute a stale entry in the background unless already under way."""
+    with _refreshing_lock:
+        if key in _refreshing:
+            return
+        _refreshing.add(key)
+    
+    app = current_app._get_current_object()
+    path = request.full_path
+    headers = {'Accept': request.headers.get('Accept', '')}
+    identity = (request.user_id, request.username, request.email)
+    
+    def refresh():
+        try:
+            with app.test_request_context(path, headers=headers):
+                request.user_id, request.username, request.email = identity
+                # Not charged to the user's query budget: they did not ask for it
+                g.cache_refresh = True
+                version = DataVersion.get(request.user_id)
+                response = make_response(view(*args, **kwargs))
+                if response.status_code == 200:
+                    analytics_cache.put(key, _snapshot(response, version))
+        except Exception as e:
+            logger.warning(f"Background refresh of {path} failed: {e}")
+        finally:
+            with _refreshing_lock:
+                _refreshing.discard(key)
+    
+    _refresher.submit(refresh)
+
+
+def cache_response(fresh: float, stale: float):
+    """
+    Decorator caching 200 responses per user, endpoint and parameters.
+    
+    Must be applied below @require_auth and above @coalesce_requests and
+    @throttle_query_cost, so cached responses cost no query budget.
+    Background refreshes set g.cache_refresh and are not charged either.
+    Responses carry X-Cache: HIT, STALE or MISS.
+    
+    Args:
+        fresh: Seconds a response is served without recomputing it
+        stale: Seconds a response may be served while it is recomputed
+            in the background
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            try:
+                version = DataVersion.get(request.user_id)
+            except Exception as e:
+                # Without a version the cache cannot tell if an entry is current
+                logger.warning(f"Data version lookup failed: {e}")
+                return f(*args, **kwargs)
+            
+            key = request_key()
+            entry = analytics_cache.get(key)
+            if entry is not None and entry.version == version:
+                age = time.monotonic() - entry.created
+                if age < fresh:
+                    record_cache_lookup('analytics_responses', True)
+                    return _from_entry(entry, 'HIT')
+                if age < stale:
+                    record_cache_lookup('analytics_responses', True)
+                    _schedule_refresh(key, f, args, kwargs)
+                    return _from_entry(entry, 'STALE')
+            
+            record_cache_lookup('analytics_responses', False)
+            response = make_response(f(*args, **kwargs))
+            if response.status_code == 200:
+                analytics_cache.put(key, _snapshot(response, version))
+            response.headers['X-Cache'] = 'MISS'
+            return response
+        
+        return decorated_function
+    return decorator
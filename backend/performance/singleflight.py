@@ -0,0 +1,172 @@
+"""
+Request coalescing for MoneyMinder
+Lets concurrent identical requests share one computation.
+
+When a user has several tabs open, or the frontend retries a slow report,
+the same analytics request can arrive many times while the first one is
+still aggregating. With @coalesce_requests the first request for a key
+runs the view and every identical request that arrives while it is running
+waits for that result instead of running its own queries.
+
+The key is (user_id, endpoint, normalized query parameters, Accept), so
+different users, filters and response formats never share a result. Only
+requests that overlap in time are merged; nothing is cached afterwards.
+Coalescing is per process.
+"""
+import logging
+import threading
+from functools import wraps
+
+from flask import current_app, jsonify, make_response, request
+
+from monitoring.metrics import record_cache_lookup
+
+
+logger = logging.getLogger(__name__)
+
+# Extra seconds a waiting request allows on top of the statement time limit
+WAIT_MARGIN_SECONDS = 2.0
+
+
+class CoalesceTimeoutError(Exception):
+    """Raised when a shared computation does not finish in time"""
+    
+    def __init__(self, timeout):
+        self.timeout = timeout
+        super().__init__(f'Shared request did not finish within {timeout:g}s')
+
+
+class _Call:
+    """One in-flight computation and its outcome"""
+    
+    __slots__ = ('done', 'result', 'error', 'waiters')
+    
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Runs at most one computation per key at a time"""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+    
+    def do(self, key, fn, timeout: float = None) -> tuple:
+        """
+        Run fn for key, or wait for the run already in progress.
+        
+        An exception raised by fn is raised in every caller sharing the run.
+        
+        Args:
+            key: Hashable key identifying the computation
+            fn: Callable taking no arguments
+            timeout: Seconds a waiting caller waits before giving up
+                (None waits indefinitely)
+                
+        Returns:
+            Tuple of (result, shared) where shared is True if the result
+            came from another caller's run
+            
+        Raises:
+            CoalesceTimeoutError: If a waiting caller times out
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is None:
+                call = self._calls[key] = _Call()
+                leader = True
+            else:
+                call.waiters += 1
+                leader = False
+        
+        if not leader:
+            if not call.done.wait(timeout):
+                raise CoalesceTimeoutError(timeout)
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+        
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+            if call.waiters:
+                logger.debug(f"Shared one computation with {call.waiters} waiting requests")
+        
+        return call.result, False
+    
+    def in_flight(self) -> int:
+        """Get the number of computations currently running"""
+        with self._lock:
+            return len(self._calls)
+
+
+_analytics_flights = SingleFlight()
+
+
+def request_key() -> tuple:
+    """
+    Build the coalescing key for the current request.
+    
+    Query parameters are sorted by name, so ?a=1&b=2 and ?b=2&a=1 share a
+    key; repeated values keep their order. Must be called after
+    @require_auth has set request.user_id.
+    """
+    params = tuple(sorted((name, tuple(values)) for name, values in request.args.lists()))
+    return (
+        request.user_id,
+        request.endpoint,
+        params,
+        request.headers.get('Accept', '')
+    )
+
+
+def _wait_timeout() -> float:
+    """Seconds to wait for a shared run: the endpoint's statement limit plus a margin"""
+    config = current_app.config
+    timeout = config.get('BLUEPRINT_QUERY_TIMEOUTS', {}).get(
+        request.blueprint, config.get('QUERY_TIMEOUT_SECONDS', 0)
+    )
+    return timeout + WAIT_MARGIN_SECONDS if timeout else None
+
+
+def coalesce_requests(f):
+    """
+    Decorator merging concurrent identical requests into one view call.
+    
+    Must be applied below @require_auth. Place it above decorators that
+    charge a cost, such as @throttle_query_cost, so that waiting requests
+    are not charged for work they do not do. Every caller receives its own
+    copy of the response, with the same status, headers and body.
+    """
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        def compute():
+            response = make_response(f(*args, **kwargs))
+            # Keep a copy that does not depend on this request's context
+            return response, (response.get_data(), response.status_code, list(response.headers.items()))
+        
+        try:
+            (response, snapshot), shared = _analytics_flights.do(
+                request_key(), compute, timeout=_wait_timeout()
+            )
+        except CoalesceTimeoutError as e:
+            return jsonify({'error': str(e), 'code': 'QUERY_TIMEOUT'}), 504
+        
+        record_cache_lookup('analytics_coalescing', shared)
+        if not shared:
+            return response
+        
+        body, status, headers = snapshot
+        return current_app.response_class(body, status=status, headers=headers)
+    
+    return decorated_function
@@ -4,11 +4,15 @@ Account management routes
 from flask import Blueprint, request, jsonify
 from database import Database
 from auth import require_auth
+from performance.data_version import conditional_get, track_writes
+from performance.columnar import wants_columnar
 
 accounts_bp = Blueprint('accounts', __name__, url_prefix='/api/accounts')
+track_writes(accounts_bp)
 
 @accounts_bp.route('/', methods=['GET'])
 @require_auth
+@conditional_get
 def get_accounts():
     """Get all accounts for current user"""
     try:
@@ -20,7 +24,8 @@ def get_accounts():
             ORDER BY created_at DESC
             """,
             (request.user_id,),
-            fetch_all=True
+            fetch_all=True,
+            columnar=wants_columnar()
         )
         
         return jsonify({'accounts': accounts}), 200
@@ -30,6 +35,7 @@ def get_accounts():
 
 @accounts_bp.route('/<int:account_id>', methods=['GET'])
 @require_auth
+@conditional_get
 def get_account(account_id):
     """Get specific account"""
     try:
@@ -149,11 +155,19 @@ def delete_account(account_id):
         if not account:
             return jsonify({'error': 'Account not found'}), 404
         
-        Database.execute_query(
-            "DELETE FROM Accounts WHERE account_id = %s AND user_id = %s",
-            (account_id, request.user_id),
-            commit=True
-        )
+        # MySQL fires no triggers for rows removed by ON DELETE CASCADE, so
+        # the account's transactions are deleted first, in the same database
+        # transaction, to keep the trigger-maintained aggregates in step
+        with Database.shared_connection():
+            Database.execute_query(
+                "DELETE FROM Transactions WHERE account_id = %s AND user_id = %s",
+                (account_id, request.user_id)
+            )
+            Database.execute_query(
+                "DELETE FROM Accounts WHERE account_id = %s AND user_id = %s",
+                (account_id, request.user_id),
+                commit=True
+            )
         
         return jsonify({'message': 'Account deleted successfully'}), 200
         
@@ -162,35 +176,37 @@ def delete_account(account_id):
 
 @accounts_bp.route('/summary', methods=['GET'])
 @require_auth
+@conditional_get
 def get_accounts_summary():
     """Get summary of all accounts"""
     try:
-        summary = Database.execute_query(
-            """
-            SELECT 
-                COUNT(*) as total_accounts,
-                SUM(balance) as total_balance,
-                account_type,
-                SUM(balance) as type_balance
-            FROM Accounts
-            WHERE user_id = %s
-            GROUP BY account_type
-            """,
-            (request.user_id,),
-            fetch_all=True
-        )
-        
-        total = Database.execute_query(
-            """
-            SELECT 
-                COUNT(*) as total_accounts,
-                SUM(balance) as total_balance
-            FROM Accounts
-            WHERE user_id = %s
-            """,
-            (request.user_id,),
-            fetch_one=True
-        )
+        summary, total = Database.run_parallel([
+            {
+                'query': """
+                    SELECT 
+                        COUNT(*) as total_accounts,
+                        SUM(balance) as total_balance,
+                        account_type,
+                        SUM(balance) as type_balance
+                    FROM Accounts
+                    WHERE user_id = %s
+                    GROUP BY account_type
+                """,
+                'params': (request.user_id,),
+                'fetch_all': True
+            },
+            {
+                'query': """
+                    SELECT 
+                        COUNT(*) as total_accounts,
+                        SUM(balance) as total_balance
+                    FROM Accounts
+                    WHERE user_id = %s
+                """,
+                'params': (request.user_id,),
+                'fetch_one': True
+            }
+        ])
         
         return jsonify({
             'summary': {
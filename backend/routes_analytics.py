@@ -2,67 +2,116 @@
 Analytics and Reporting routes
 """
 from flask import Blueprint, request, jsonify
-from database import Database
+from database import Database, QueryTimeoutError
 from auth import require_auth
-from datetime import datetime
+from security.query_budget import throttle_query_cost, date_span_days
+from performance.columnar import wants_columnar
+from performance.singleflight import coalesce_requests
+from performance.response_cache import cache_response
+from performance.history import get_history, day_number
+from performance.forecast import NUMPY_AVAILABLE as FORECAST_AVAILABLE, build_forecast
+from performance.pivot import PivotError, build_pivot_query, parse_dimensions, parse_filters, shape_pivot_rows
+from performance.burn_rate import add_burn_rates
+from routes_budgets import budget_percentage, budget_status, with_template_budgets
+from datetime import date, datetime, timedelta
 
 analytics_bp = Blueprint('analytics', __name__, url_prefix='/api/analytics')
 
+# Longest history /trends will aggregate in one request
+MAX_TREND_MONTHS = 60
+
+# Bounds used for an open-ended date range (MySQL's DATE range)
+FIRST_DAY = date(1000, 1, 1)
+LAST_DAY = date(9999, 12, 31)
+
+# Limits for the /stats endpoints
+MAX_STATS_DAYS = 3660
+MAX_ROLLING_WINDOW = 90
+DEFAULT_PERCENTILES = (50, 90, 99)
+
+# Most years /yearly-summary compares in one request
+MAX_SUMMARY_YEARS = 10
+
+MONTH_NAMES = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun',
+               'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
+
+# Limits for /forecast
+MAX_FORECAST_DAYS = 730
+MAX_FORECAST_HISTORY_DAYS = 365
+
+# Most cells, subtotals included, that /pivot returns
+MAX_PIVOT_CELLS = 5000
+
+# Months per period for /compare, and how many periods back it can reach
+COMPARE_PERIOD_MONTHS = {'month': 1, 'quarter': 3, 'year': 12}
+MAX_COMPARE_OFFSET = 120
+
+
+def _parse_date(value):
+    """Parse an optional YYYY-MM-DD query parameter; raises ValueError if malformed"""
+    if not value:
+        return None
+    return datetime.strptime(value[:10], '%Y-%m-%d').date()
+
+def _trend_months():
+    """Get the requested number of months for /trends, clamped to a sane range"""
+    return max(1, min(request.args.get('months', 6, type=int) or 6, MAX_TREND_MONTHS))
+
 @analytics_bp.route('/dashboard', methods=['GET'])
 @require_auth
+@coalesce_requests
 def get_dashboard():
     """Get dashboard overview"""
     try:
-        # Get account summary
-        accounts = Database.execute_query(
-            """
-            SELECT 
-                COUNT(*) as total_accounts,
-                COALESCE(SUM(balance), 0) as total_balance
-            FROM Accounts
-            WHERE user_id = %s
-            """,
-            (request.user_id,),
-            fetch_one=True
-        )
-        
-        # Get monthly income/expense
-        monthly = Database.execute_query(
-            """
-            SELECT 
-                c.type,
-                COALESCE(SUM(t.amount), 0) as total
-            FROM Transactions t
-            JOIN Categories c ON t.category_id = c.category_id
-            WHERE t.user_id = %s 
-            AND t.transaction_date >= DATE_FORMAT(NOW(), '%%Y-%%m-01')
-            GROUP BY c.type
-            """,
-            (request.user_id,),
-            fetch_all=True
-        )
+        # Account summary, monthly income/expense and recent transactions
+        # are independent, so they run at the same time
+        accounts, monthly, recent = Database.run_parallel([
+            {
+                'query': """
+                    SELECT 
+                        COUNT(*) as total_accounts,
+                        COALESCE(SUM(balance), 0) as total_balance
+                    FROM Accounts
+                    WHERE user_id = %s
+                """,
+                'params': (request.user_id,),
+                'fetch_one': True
+            },
+            {
+                'query': """
+                    SELECT 
+                        c.type,
+                        COALESCE(SUM(t.amount), 0) as total
+                    FROM Transactions t
+                    JOIN Categories c ON t.category_id = c.category_id
+                    WHERE t.user_id = %s 
+                    AND t.transaction_date >= DATE_FORMAT(NOW(), '%%Y-%%m-01')
+                    GROUP BY c.type
+                """,
+                'params': (request.user_id,),
+                'fetch_all': True
+            },
+            {
+                'query': """
+                    SELECT 
+                        t.transaction_id, t.amount, t.transaction_date, t.description,
+                        a.account_name, c.category_name, c.type as category_type
+                    FROM Transactions t
+                    JOIN Accounts a ON t.account_id = a.account_id
+                    JOIN Categories c ON t.category_id = c.category_id
+                    WHERE t.user_id = %s
+                    ORDER BY t.transaction_date DESC
+                    LIMIT 10
+                """,
+                'params': (request.user_id,),
+                'fetch_all': True
+            }
+        ])
         
         monthly_data = {}
         if monthly:
             monthly_data = {row['type']: float(row['total']) for row in monthly}
         
-        # Get recent transactions
-        recent = Database.execute_query(
-            """
-            SELECT 
-                t.transaction_id, t.amount, t.transaction_date, t.description,
-                a.account_name, c.category_name, c.type as category_type
-            FROM Transactions t
-            JOIN Accounts a ON t.account_id = a.account_id
-            JOIN Categories c ON t.category_id = c.category_id
-            WHERE t.user_id = %s
-            ORDER BY t.transaction_date DESC
-            LIMIT 10
-            """,
-            (request.user_id,),
-            fetch_all=True
-        )
-        
         return jsonify({
             'accounts': {
                 'total': accounts['total_accounts'],
@@ -91,6 +140,9 @@ def get_dashboard():
 
 @analytics_bp.route('/monthly-report', methods=['GET'])
 @require_auth
+@cache_response(fresh=300, stale=3600)
+@coalesce_requests
+@throttle_query_cost(lambda: 31 if request.args.get('month') else None)
 def get_monthly_report():
     """Get monthly report from view"""
     try:
@@ -110,64 +162,96 @@ def get_monthly_report():
         
         query += " ORDER BY month_year DESC, type, category_name"
         
-        report = Database.execute_query(query, tuple(params), fetch_all=True)
+        report = Database.execute_query(query, tuple(params), fetch_all=True, columnar=wants_columnar())
         
         return jsonify({'report': report}), 200
         
+    except QueryTimeoutError as e:
+        return jsonify({'error': str(e), 'code': 'QUERY_TIMEOUT'}), 504
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @analytics_bp.route('/spending-by-category', methods=['GET'])
 @require_auth
+@cache_response(fresh=120, stale=1800)
+@coalesce_requests
+@throttle_query_cost(lambda: 1)  # Read from the daily rollups, so the span does not matter
 def get_spending_by_category():
     """Get spending breakdown by category"""
     try:
-        start_date = request.args.get('start_date')
-        end_date = request.args.get('end_date')
-        
-        query = """
+        try:
+            start_date = _parse_date(request.args.get('start_date'))
+            end_date = _parse_date(request.args.get('end_date'))
+        except ValueError:
+            return jsonify({'error': 'Dates must be in YYYY-MM-DD format'}), 400
+        
+        first_day = start_date or FIRST_DAY
+        last_day = end_date or LAST_DAY
+        
+        # Totals are differences of running totals: the last rollup row on or
+        # before the end date minus the last one before the start date
+        data = Database.execute_query(
+            """
             SELECT 
                 c.category_name,
                 c.type,
-                COUNT(t.transaction_id) as transaction_count,
-                SUM(t.amount) as total_amount,
-                AVG(t.amount) as avg_amount,
-                MIN(t.amount) as min_amount,
-                MAX(t.amount) as max_amount
-            FROM Transactions t
-            JOIN Categories c ON t.category_id = c.category_id
-            WHERE t.user_id = %s
-        """
-        params = [request.user_id]
-        
-        if start_date:
-            query += " AND t.transaction_date >= %s"
-            params.append(start_date)
-        
-        if end_date:
-            query += " AND t.transaction_date <= %s"
-            params.append(end_date)
-        
-        query += " GROUP BY c.category_id, c.category_name, c.type ORDER BY total_amount DESC"
-        
-        data = Database.execute_query(query, tuple(params), fetch_all=True)
+                hi.cum_count - COALESCE(lo.cum_count, 0) as transaction_count,
+                hi.cum_total - COALESCE(lo.cum_total, 0) as total_amount,
+                (hi.cum_total - COALESCE(lo.cum_total, 0))
+                    / (hi.cum_count - COALESCE(lo.cum_count, 0)) as avg_amount,
+                mm.min_amount,
+                mm.max_amount
+            FROM (
+                SELECT category_id, MIN(min_amount) as min_amount, MAX(max_amount) as max_amount
+                FROM Daily_Category_Rollups
+                WHERE user_id = %s AND day BETWEEN %s AND %s
+                GROUP BY category_id
+            ) mm
+            JOIN Categories c ON c.category_id = mm.category_id
+            JOIN LATERAL (
+                SELECT r.cum_count, r.cum_total
+                FROM Daily_Category_Rollups r
+                WHERE r.user_id = %s AND r.category_id = mm.category_id AND r.day <= %s
+                ORDER BY r.day DESC
+                LIMIT 1
+            ) hi ON TRUE
+            LEFT JOIN LATERAL (
+                SELECT r.cum_count, r.cum_total
+                FROM Daily_Category_Rollups r
+                WHERE r.user_id = %s AND r.category_id = mm.category_id AND r.day < %s
+                ORDER BY r.day DESC
+                LIMIT 1
+            ) lo ON TRUE
+            ORDER BY total_amount DESC
+            """,
+            (request.user_id, first_day, last_day,
+             request.user_id, last_day,
+             request.user_id, first_day),
+            fetch_all=True,
+            columnar=wants_columnar()
+        )
         
         return jsonify({'categories': data}), 200
         
+    except QueryTimeoutError as e:
+        return jsonify({'error': str(e), 'code': 'QUERY_TIMEOUT'}), 504
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @analytics_bp.route('/trends', methods=['GET'])
 @require_auth
+@cache_response(fresh=300, stale=3600)
+@coalesce_requests
+@throttle_query_cost(lambda: _trend_months() * 31)
 def get_trends():
     """Get spending trends over time"""
     try:
-        months = request.args.get('months', 6, type=int)
+        months = _trend_months()
         
         trends = Database.execute_query(
             """
             SELECT 
-                DATE_FORMAT(t.transaction_date, '%Y-%m') as month,
+                DATE_FORMAT(t.transaction_date, '%%Y-%%m') as month,
                 c.type,
                 SUM(t.amount) as total
             FROM Transactions t
@@ -178,16 +262,21 @@ def get_trends():
             ORDER BY month DESC, c.type
             """,
             (request.user_id, months),
-            fetch_all=True
+            fetch_all=True,
+            columnar=wants_columnar()
         )
         
         return jsonify({'trends': trends}), 200
         
+    except QueryTimeoutError as e:
+        return jsonify({'error': str(e), 'code': 'QUERY_TIMEOUT'}), 504
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @analytics_bp.route('/budget-status', methods=['GET'])
 @require_auth
+@with_template_budgets
+@coalesce_requests
 def get_budget_status():
     """Get budget status for current month"""
     try:
@@ -200,16 +289,13 @@ def get_budget_status():
                 b.amount_limit,
                 b.start_date,
                 b.end_date,
-                COALESCE(SUM(t.amount), 0) as spent
+                COALESCE(s.spent, 0) as spent
             FROM Budgets b
             JOIN Categories c ON b.category_id = c.category_id
-            LEFT JOIN Transactions t ON t.category_id = b.category_id 
-                AND t.user_id = b.user_id
-                AND t.transaction_date BETWEEN b.start_date AND b.end_date
+            LEFT JOIN Budget_Spend s ON s.budget_id = b.budget_id
             WHERE b.user_id = %s
             AND b.start_date <= CURDATE()
             AND b.end_date >= CURDATE()
-            GROUP BY b.budget_id, b.category_id, c.category_name, b.amount_limit, b.start_date, b.end_date
             """,
             (request.user_id,),
             fetch_all=True
@@ -219,29 +305,26 @@ def get_budget_status():
         for budget in budgets:
             spent = float(budget['spent'])
             limit = float(budget['amount_limit'])
-            percentage = (spent / limit * 100) if limit > 0 else 0
             
             budget['spent'] = spent
             budget['amount_limit'] = limit
-            budget['percentage'] = round(percentage, 2)
+            budget['percentage'] = budget_percentage(spent, limit)
             budget['remaining'] = limit - spent
-            
-            if percentage >= 100:
-                budget['status'] = 'EXCEEDED'
-            elif percentage >= 80:
-                budget['status'] = 'WARNING'
-            elif percentage >= 50:
-                budget['status'] = 'NORMAL'
-            else:
-                budget['status'] = 'SAFE'
+            budget['status'] = budget_status(budget['percentage'])
+        
+        add_burn_rates(budgets, date.today())
         
         return jsonify({'budgets': budgets}), 200
         
+    except QueryTimeoutError as e:
+        return jsonify({'error': str(e), 'code': 'QUERY_TIMEOUT'}), 504
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @analytics_bp.route('/unusual-spending', methods=['GET'])
 @require_auth
+@cache_response(fresh=600, stale=3600)
+@coalesce_requests
 def get_unusual_spending():
     """Get unusual spending alerts"""
     try:
@@ -259,16 +342,22 @@ def get_unusual_spending():
             ORDER BY v.average_spent DESC
             """,
             (request.user_id,),
-            fetch_all=True
+            fetch_all=True,
+            columnar=wants_columnar()
         )
         
         return jsonify({'alerts': alerts}), 200
         
+    except QueryTimeoutError as e:
+        return jsonify({'error': str(e), 'code': 'QUERY_TIMEOUT'}), 504
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @analytics_bp.route('/monthly-trend', methods=['GET'])
 @require_auth
+@cache_response(fresh=300, stale=3600)
+@coalesce_requests
+@throttle_query_cost(lambda: min(request.args.get('months', 6, type=int) or 6, 12) * 31)
 def get_monthly_trend():
     """Get income/expense trend for last 6 months"""
     try:
@@ -331,66 +420,479 @@ def get_monthly_trend():
             ]
         }), 200
         
+    except QueryTimeoutError as e:
+        return jsonify({'error': str(e), 'code': 'QUERY_TIMEOUT'}), 504
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @analytics_bp.route('/yearly-summary', methods=['GET'])
 @require_auth
+@cache_response(fresh=300, stale=3600)
+@coalesce_requests
+@throttle_query_cost(lambda: 366 * len(_summary_years()))
 def get_yearly_summary():
-    """Get yearly income/expense summary"""
+    """
+    Get yearly income/expense summary
+    
+    ?year=2024 returns one year. ?years=2023,2024,2025 returns aligned
+    monthly series for each year with year-over-year deltas.
+    """
     try:
-        year = request.args.get('year', datetime.now().year)
+        try:
+            years = _summary_years()
+        except ValueError:
+            return jsonify({'error': f'Years must be a comma-separated list of up to {MAX_SUMMARY_YEARS} years '
+                                     'between 1900 and 9998'}), 400
+        
+        # One date range per year keeps the filter sargable, so MySQL
+        # range-scans idx_transactions_user_date instead of applying
+        # YEAR() to every row of the user's history
+        ranges = ' OR '.join(['(t.transaction_date >= %s AND t.transaction_date < %s)'] * len(years))
+        params = [request.user_id]
+        for year in years:
+            params.extend((date(year, 1, 1), date(year + 1, 1, 1)))
         
         yearly_data = Database.execute_query(
-            """
+            f"""
             SELECT 
+                YEAR(t.transaction_date) as year,
                 MONTH(t.transaction_date) as month,
                 c.type,
                 SUM(ABS(t.amount)) as total
             FROM Transactions t
             JOIN Categories c ON t.category_id = c.category_id
             WHERE t.user_id = %s
-            AND YEAR(t.transaction_date) = %s
-            GROUP BY MONTH(t.transaction_date), c.type
-            ORDER BY month ASC
+            AND ({ranges})
+            GROUP BY YEAR(t.transaction_date), MONTH(t.transaction_date), c.type
             """,
-            (request.user_id, year),
+            tuple(params),
             fetch_all=True
         )
         
-        # Prepare data for all 12 months
-        month_names = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 
-                      'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
-        income_data = [0] * 12
-        expense_data = [0] * 12
-        
+        # Prepare data for all 12 months of every year
+        series = {year: {'Income': [0] * 12, 'Expense': [0] * 12} for year in years}
         for row in yearly_data:
-            month_idx = row['month'] - 1
-            if row['type'] == 'Income':
-                income_data[month_idx] = float(row['total'])
-            else:
-                expense_data[month_idx] = float(row['total'])
+            if row['year'] not in series:
+                continue
+            kind = 'Income' if row['type'] == 'Income' else 'Expense'
+            series[row['year']][kind][row['month'] - 1] = float(row['total'])
+        
+        if 'years' not in request.args:
+            year = years[0]
+            return jsonify({
+                'year': year,
+                'labels': MONTH_NAMES,
+                'datasets': [
+                    {
+                        'label': 'Income',
+                        'data': series[year]['Income'],
+                        'backgroundColor': 'rgba(75, 192, 192, 0.6)',
+                        'borderColor': 'rgba(75, 192, 192, 1)',
+                        'borderWidth': 2
+                    },
+                    {
+                        'label': 'Expense',
+                        'data': series[year]['Expense'],
+                        'backgroundColor': 'rgba(255, 99, 132, 0.6)',
+                        'borderColor': 'rgba(255, 99, 132, 1)',
+                        'borderWidth': 2
+                    }
+                ]
+            }), 200
+        
+        deltas = []
+        for previous, year in zip(years, years[1:]):
+            delta = {'year': year, 'previous_year': previous}
+            for kind in ('Income', 'Expense'):
+                key = kind.lower()
+                current_values, previous_values = series[year][kind], series[previous][kind]
+                delta[key] = [round(c - p, 2) for c, p in zip(current_values, previous_values)]
+                delta[f'{key}_pct'] = [_percent_change(c, p) for c, p in zip(current_values, previous_values)]
+                delta[f'total_{key}'] = round(sum(current_values) - sum(previous_values), 2)
+                delta[f'total_{key}_pct'] = _percent_change(sum(current_values), sum(previous_values))
+            deltas.append(delta)
         
         return jsonify({
-            'year': year,
-            'labels': month_names,
-            'datasets': [
-                {
-                    'label': 'Income',
-                    'data': income_data,
-                    'backgroundColor': 'rgba(75, 192, 192, 0.6)',
-                    'borderColor': 'rgba(75, 192, 192, 1)',
-                    'borderWidth': 2
-                },
+            'years': years,
+            'labels': MONTH_NAMES,
+            'series': [
                 {
-                    'label': 'Expense',
-                    'data': expense_data,
-                    'backgroundColor': 'rgba(255, 99, 132, 0.6)',
-                    'borderColor': 'rgba(255, 99, 132, 1)',
-                    'borderWidth': 2
+                    'year': year,
+                    'income': series[year]['Income'],
+                    'expense': series[year]['Expense'],
+                    'total_income': round(sum(series[year]['Income']), 2),
+                    'total_expense': round(sum(series[year]['Expense']), 2)
                 }
-            ]
+                for year in years
+            ],
+            'deltas': deltas
+        }), 200
+        
+    except QueryTimeoutError as e:
+        return jsonify({'error': str(e), 'code': 'QUERY_TIMEOUT'}), 504
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+def _summary_years():
+    """
+    Get the years requested from /yearly-summary, sorted and without repeats.
+    
+    Raises ValueError for a malformed or too long list, or a year out of range.
+    """
+    if 'years' in request.args:
+        years = sorted({int(y) for y in request.args['years'].split(',') if y.strip()})
+        if not years or len(years) > MAX_SUMMARY_YEARS:
+            raise ValueError('Invalid years')
+    else:
+        years = [request.args.get('year', datetime.now().year, type=int)]
+    
+    # date(year + 1, 1, 1) must exist for every year's range
+    if not all(1900 <= y <= 9998 for y in years):
+        raise ValueError('Invalid years')
+    return years
+
+def _percent_change(current, previous):
+    """Percentage change from previous to current, None when previous is zero"""
+    if not previous:
+        return None
+    return round((current - previous) / previous * 100, 2)
+
+def _add_months(day, months):
+    """Get the first day of the month that is a number of months after day's month"""
+    years, month = divmod(day.month - 1 + months, 12)
+    return date(day.year + years, month + 1, 1)
+
+def _compare_periods():
+    """
+    Get the current and previous date ranges for /compare, both inclusive.
+    
+    The current period runs from its first day to the reference date. The
+    previous one is offset periods earlier and covers its whole length, or
+    only as many days as the current period has had when to_date is set.
+    
+    Raises ValueError for an unknown period, offset or date.
+    """
+    period = request.args.get('period', 'month')
+    offset = int(request.args.get('offset', 1))
+    if period not in COMPARE_PERIOD_MONTHS or not 1 <= offset <= MAX_COMPARE_OFFSET:
+        raise ValueError('Invalid period')
+    
+    today = _parse_date(request.args.get('date')) or date.today()
+    months = COMPARE_PERIOD_MONTHS[period]
+    current_start = _add_months(today.replace(day=1), -((today.month - 1) % months))
+    previous_start = _add_months(current_start, -months * offset)
+    previous_end = _add_months(previous_start, months) - timedelta(days=1)
+    if request.args.get('to_date', 'false').lower() == 'true':
+        previous_end = min(previous_end, previous_start + (today - current_start))
+    
+    return period, offset, (current_start, today), (previous_start, previous_end)
+
+def _compare_totals(current, previous):
+    """Current and previous totals with their absolute and percentage change"""
+    current, previous = round(float(current or 0), 2), round(float(previous or 0), 2)
+    return {
+        'current_total': current,
+        'previous_total': previous,
+        'change': round(current - previous, 2),
+        'change_pct': _percent_change(current, previous)
+    }
+
+def _forecast_history_days():
+    """Get the days of history /forecast averages discretionary spending over"""
+    return max(7, min(request.args.get('history_days', 90, type=int) or 90, MAX_FORECAST_HISTORY_DAYS))
+
+def _stats_since():
+    """Get the first day number covered by a /stats request, None for full history"""
+    days = request.args.get('days', type=int)
+    if not days:
+        return None
+    return day_number(date.today()) - min(max(days, 1), MAX_STATS_DAYS) + 1
+
+def _stats_span_days():
+    """Span a /stats request is charged for: the whole history it loads, whatever ?days= covers"""
+    return None
+
+@analytics_bp.route('/stats/rolling-average', methods=['GET'])
+@require_auth
+@cache_response(fresh=300, stale=3600)
+@coalesce_requests
+@throttle_query_cost(_stats_span_days)
+def get_rolling_average():
+    """Get daily expense totals with a trailing moving average"""
+    try:
+        window = max(1, min(request.args.get('window', 7, type=int) or 7, MAX_ROLLING_WINDOW))
+        days = max(1, min(request.args.get('days', 90, type=int) or 90, MAX_STATS_DAYS))
+        
+        history = get_history(request.user_id)
+        series = history.rolling_average(window, days, day_number(date.today()))
+        
+        return jsonify({'window': window, 'series': series}), 200
+        
+    except RuntimeError as e:
+        return jsonify({'error': str(e)}), 503
+    except QueryTimeoutError as e:
+        return jsonify({'error': str(e), 'code': 'QUERY_TIMEOUT'}), 504
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@analytics_bp.route('/stats/percentiles', methods=['GET'])
+@require_auth
+@cache_response(fresh=300, stale=3600)
+@coalesce_requests
+@throttle_query_cost(_stats_span_days)
+def get_spending_percentiles():
+    """Get percentiles of expense amounts per category"""
+    try:
+        quantiles = DEFAULT_PERCENTILES
+        if request.args.get('p'):
+            try:
+                quantiles = [float(p) for p in request.args['p'].split(',')]
+            except ValueError:
+                return jsonify({'error': 'p must be a comma-separated list of numbers'}), 400
+            if not quantiles or len(quantiles) > 10 or not all(0 <= p <= 100 for p in quantiles):
+                return jsonify({'error': 'p must list up to 10 percentiles between 0 and 100'}), 400
+        
+        history = get_history(request.user_id)
+        categories = history.percentiles(quantiles, since=_stats_since())
+        
+        return jsonify({'categories': categories}), 200
+        
+    except RuntimeError as e:
+        return jsonify({'error': str(e)}), 503
+    except QueryTimeoutError as e:
+        return jsonify({'error': str(e), 'code': 'QUERY_TIMEOUT'}), 504
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@analytics_bp.route('/stats/day-of-week', methods=['GET'])
+@require_auth
+@cache_response(fresh=300, stale=3600)
+@coalesce_requests
+@throttle_query_cost(_stats_span_days)
+def get_day_of_week_profile():
+    """Get expense totals and daily averages by day of the week"""
+    try:
+        history = get_history(request.user_id)
+        profile = history.weekday_profile(since=_stats_since())
+        
+        return jsonify({'weekdays': profile}), 200
+        
+    except RuntimeError as e:
+        return jsonify({'error': str(e)}), 503
+    except QueryTimeoutError as e:
+        return jsonify({'error': str(e), 'code': 'QUERY_TIMEOUT'}), 504
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@analytics_bp.route('/stats/zscores', methods=['GET'])
+@require_auth
+@cache_response(fresh=300, stale=3600)
+@coalesce_requests
+@throttle_query_cost(_stats_span_days)
+def get_spending_zscores():
+    """Get recent expenses that are far from their category's average"""
+    try:
+        threshold = request.args.get('threshold', 2.0, type=float)
+        limit = max(1, min(request.args.get('limit', 50, type=int) or 50, 200))
+        days = max(1, min(request.args.get('days', 90, type=int) or 90, MAX_STATS_DAYS))
+        since = day_number(date.today()) - days + 1
+        
+        history = get_history(request.user_id)
+        outliers = history.zscores(threshold, since=since, limit=limit)
+        
+        return jsonify({'threshold': threshold, 'transactions': outliers}), 200
+        
+    except RuntimeError as e:
+        return jsonify({'error': str(e)}), 503
+    except QueryTimeoutError as e:
+        return jsonify({'error': str(e), 'code': 'QUERY_TIMEOUT'}), 504
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@analytics_bp.route('/forecast', methods=['GET'])
+@require_auth
+@cache_response(fresh=300, stale=1800)
+@coalesce_requests
+@throttle_query_cost(_forecast_history_days)
+def get_forecast():
+    """Project each account's daily balance over the next N days"""
+    try:
+        if not FORECAST_AVAILABLE:
+            return jsonify({'error': 'Forecasting requires numpy'}), 503
+        
+        days = max(1, min(request.args.get('days', 30, type=int) or 30, MAX_FORECAST_DAYS))
+        history_days = _forecast_history_days()
+        
+        accounts, recurring, discretionary = Database.run_parallel([
+            {
+                'query': """
+                    SELECT account_id, account_name, balance
+                    FROM Accounts
+                    WHERE user_id = %s
+                    ORDER BY account_id
+                """,
+                'params': (request.user_id,),
+                'fetch_all': True
+            },
+            {
+                'query': """
+                    SELECT 
+                        r.account_id,
+                        r.frequency,
+                        r.next_due_date,
+                        CASE WHEN c.type = 'Income' THEN r.amount ELSE -r.amount END as signed_amount
+                    FROM Recurring_Payments r
+                    JOIN Categories c ON r.category_id = c.category_id
+                    WHERE r.user_id = %s AND r.is_active = TRUE
+                """,
+                'params': (request.user_id,),
+                'fetch_all': True
+            },
+            {
+                # Average daily spending that is not from a recurring payment
+                'query': """
+                    SELECT 
+                        t.account_id,
+                        t.category_id,
+                        c.category_name,
+                        SUM(t.amount) / %s as daily_average
+                    FROM Transactions t
+                    JOIN Categories c ON t.category_id = c.category_id
+                    WHERE t.user_id = %s
+                    AND t.recurring_id IS NULL
+                    AND c.type = 'Expense'
+                    AND t.transaction_date >= CURDATE() - INTERVAL %s DAY
+                    AND t.transaction_date < CURDATE()
+                    GROUP BY t.account_id, t.category_id, c.category_name
+                """,
+                'params': (history_days, request.user_id, history_days),
+                'fetch_all': True
+            }
+        ])
+        
+        forecast = build_forecast(
+            accounts, recurring, discretionary, date.today() + timedelta(days=1), days
+        )
+        
+        return jsonify(forecast), 200
+        
+    except QueryTimeoutError as e:
+        return jsonify({'error': str(e), 'code': 'QUERY_TIMEOUT'}), 504
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@analytics_bp.route('/pivot', methods=['GET'])
+@require_auth
+@cache_response(fresh=300, stale=3600)
+@coalesce_requests
+@throttle_query_cost(lambda: date_span_days(request.args.get('start_date'), request.args.get('end_date')))
+def get_pivot():
+    """Group transactions by any combination of dimensions, with subtotals"""
+    try:
+        try:
+            rows = parse_dimensions(request.args.get('rows'), 'row')
+            cols = parse_dimensions(request.args.get('cols'), 'column')
+            measure = request.args.get('measure', 'sum')
+            query, params, source = build_pivot_query(
+                request.user_id,
+                rows,
+                cols,
+                measure,
+                parse_filters(request.args.get('filters')),
+                start_date=request.args.get('start_date'),
+                end_date=request.args.get('end_date'),
+                limit=MAX_PIVOT_CELLS + 1
+            )
+        except PivotError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        result = Database.execute_query(query, params, fetch_all=True)
+        if len(result) > MAX_PIVOT_CELLS:
+            return jsonify({'error': f'More than {MAX_PIVOT_CELLS} cells. Use fewer dimensions or narrower filters'}), 400
+        
+        return jsonify({
+            'rows': rows,
+            'cols': cols,
+            'measure': measure,
+            'source': source,
+            'cells': shape_pivot_rows(result, rows + cols)
+        }), 200
+        
+    except QueryTimeoutError as e:
+        return jsonify({'error': str(e), 'code': 'QUERY_TIMEOUT'}), 504
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@analytics_bp.route('/compare', methods=['GET'])
+@require_auth
+@cache_response(fresh=300, stale=3600)
+@coalesce_requests
+@throttle_query_cost(lambda: 2 * 31 * COMPARE_PERIOD_MONTHS.get(request.args.get('period', 'month'), 1))
+def get_period_comparison():
+    """
+    Compare spending per category between two periods
+    
+    ?period=month&offset=1 compares this month with last month;
+    ?period=quarter&offset=4 compares this quarter with the same quarter
+    last year.
+    """
+    try:
+        try:
+            period, offset, current, previous = _compare_periods()
+        except ValueError:
+            return jsonify({
+                'error': f'period must be month, quarter or year, offset between 1 and {MAX_COMPARE_OFFSET} '
+                         'and date in YYYY-MM-DD format'
+            }), 400
+        
+        # Both periods are summed in one pass over the daily rollups; each
+        # day is routed to its period by the CASE expressions
+        data = Database.execute_query(
+            """
+            SELECT 
+                c.category_id,
+                c.category_name,
+                c.type,
+                SUM(CASE WHEN r.day >= %s THEN r.total_amount ELSE 0 END) as current_total,
+                SUM(CASE WHEN r.day < %s THEN r.total_amount ELSE 0 END) as previous_total,
+                SUM(CASE WHEN r.day >= %s THEN r.txn_count ELSE 0 END) as current_count,
+                SUM(CASE WHEN r.day < %s THEN r.txn_count ELSE 0 END) as previous_count
+            FROM Daily_Category_Rollups r
+            JOIN Categories c ON c.category_id = r.category_id
+            WHERE r.user_id = %s
+            AND (r.day BETWEEN %s AND %s OR r.day BETWEEN %s AND %s)
+            GROUP BY c.category_id, c.category_name, c.type
+            """,
+            (current[0], current[0], current[0], current[0],
+             request.user_id, current[0], current[1], previous[0], previous[1]),
+            fetch_all=True
+        )
+        
+        categories = []
+        sums = {'Income': [0.0, 0.0], 'Expense': [0.0, 0.0]}
+        for row in data:
+            categories.append({
+                'category_id': row['category_id'],
+                'category_name': row['category_name'],
+                'type': row['type'],
+                'current_count': int(row['current_count'] or 0),
+                'previous_count': int(row['previous_count'] or 0),
+                **_compare_totals(row['current_total'], row['previous_total'])
+            })
+            sums[row['type']][0] += float(row['current_total'] or 0)
+            sums[row['type']][1] += float(row['previous_total'] or 0)
+        categories.sort(key=lambda c: -abs(c['change']))
+        
+        return jsonify({
+            'period': period,
+            'offset': offset,
+            'current': {'start_date': current[0].isoformat(), 'end_date': current[1].isoformat()},
+            'previous': {'start_date': previous[0].isoformat(), 'end_date': previous[1].isoformat()},
+            'categories': categories,
+            'totals': {kind: _compare_totals(*values) for kind, values in sums.items()}
         }), 200
         
+    except QueryTimeoutError as e:
+        return jsonify({'error': str(e), 'code': 'QUERY_TIMEOUT'}), 504
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -0,0 +1,154 @@
+"""
+Batch request routes
+Runs several read requests in one HTTP round trip.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from flask import Blueprint, current_app, jsonify, request
+from auth import require_auth, AUTH_PAYLOAD_ENVIRON_KEY
+from database import Database
+
+batch_bp = Blueprint('batch', __name__, url_prefix='/api/batch')
+
+# Most sub-requests accepted in one batch
+MAX_BATCH_REQUESTS = 20
+
+# Threads used when the client asks for parallel execution
+MAX_PARALLEL_WORKERS = 4
+
+# Headers a sub-request may set for itself
+SUB_REQUEST_HEADERS = ('Accept', 'If-None-Match')
+
+# Response headers passed back for each sub-request
+RETURNED_HEADERS = ('ETag', 'Cache-Control', 'Retry-After')
+
+
+def _parse_sub_request(item):
+    """
+    Validate one sub-request and normalise its path.
+    
+    Returns:
+        Tuple of (sub-request dict, error message or None)
+    """
+    if isinstance(item, str):
+        item = {'path': item}
+    if not isinstance(item, dict) or not isinstance(item.get('path'), str):
+        return None, 'Each request needs a path'
+    
+    if item.get('method', 'GET').upper() != 'GET':
+        return None, 'Only GET requests can be batched'
+    
+    path = item['path']
+    if not path.startswith('/api/'):
+        path = '/api' + (path if path.startswith('/') else '/' + path)
+    if path.split('?')[0].rstrip('/') == batch_bp.url_prefix:
+        return None, 'Batches cannot be nested'
+    
+    headers = item.get('headers') or {}
+    if not isinstance(headers, dict):
+        return None, 'Request headers must be an object'
+    
+    return {
+        'path': path,
+        'headers': {k: str(v) for k, v in headers.items() if k in SUB_REQUEST_HEADERS}
+    }, None
+
+
+def _run_sub_request(app, sub_request, environ_base):
+    """
+    Dispatch one sub-request through the application.
+    
+    It runs in a fresh application context, so it has its own g, and goes
+    through the same before/after request hooks as a direct request.
+    """
+    with app.app_context():
+        with app.test_request_context(
+            sub_request['path'],
+            method='GET',
+            headers=sub_request['headers'],
+            environ_base=environ_base
+        ):
+            try:
+                response = app.full_dispatch_request()
+            except Exception as e:
+                response = app.make_response(app.handle_exception(e))
+            
+            return {
+                'path': sub_request['path'],
+                'status': response.status_code,
+                'headers': {k: response.headers[k] for k in RETURNED_HEADERS if k in response.headers},
+                'body': response.get_json(silent=True)
+            }
+
+
+def _run_sequential(app, sub_requests, environ_base):
+    """Run sub-requests one after another on one shared connection."""
+    with Database.shared_connection():
+        return [_run_sub_request(app, sub, environ_base) for sub in sub_requests]
+
+
+def _run_parallel(app, sub_requests, environ_base):
+    """Spread sub-requests over worker threads, one shared connection per worker."""
+    workers = min(MAX_PARALLEL_WORKERS, len(sub_requests))
+    slices = [list(enumerate(sub_requests))[i::workers] for i in range(workers)]
+    
+    def run_slice(indexed):
+        with Database.shared_connection():
+            return [(i, _run_sub_request(app, sub, environ_base)) for i, sub in indexed]
+    
+    results = [None] * len(sub_requests)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for chunk in pool.map(run_slice, slices):
+            for i, result in chunk:
+                results[i] = result
+    return results
+
+
+@batch_bp.route('/', methods=['POST'])
+@require_auth
+def run_batch():
+    """
+    Run several GET requests and return all responses together
+    
+    Body: {"requests": [{"path": "/analytics/dashboard"}, ...], "parallel": false}
+    Paths are relative to /api. Responses come back in request order.
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        items = data.get('requests')
+        
+        if not isinstance(items, list) or not items:
+            return jsonify({'error': 'requests must be a non-empty list'}), 400
+        
+        if len(items) > MAX_BATCH_REQUESTS:
+            return jsonify({'error': f'At most {MAX_BATCH_REQUESTS} requests can be batched'}), 400
+        
+        sub_requests = []
+        for item in items:
+            sub_request, error = _parse_sub_request(item)
+            if error:
+                return jsonify({'error': error}), 400
+            sub_requests.append(sub_request)
+        
+        # Sub-requests reuse the token verified for this request
+        environ_base = {
+            AUTH_PAYLOAD_ENVIRON_KEY: {
+                'user_id': request.user_id,
+                'username': request.username,
+                'email': request.email
+            },
+            'REMOTE_ADDR': request.remote_addr or '127.0.0.1'
+        }
+        for header in ('X-Forwarded-For', 'User-Agent'):
+            if header in request.headers:
+                environ_base['HTTP_' + header.upper().replace('-', '_')] = request.headers[header]
+        
+        app = current_app._get_current_object()
+        if data.get('parallel') and len(sub_requests) > 1:
+            responses = _run_parallel(app, sub_requests, environ_base)
+        else:
+            responses = _run_sequential(app, sub_requests, environ_base)
+        
+        return jsonify({'responses': responses}), 200
+    
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
@@ -4,60 +4,189 @@ Budget management routes
 from flask import Blueprint, request, jsonify
 from database import Database
 from auth import require_auth
-from datetime import datetime
+from performance.data_version import DataVersion, conditional_get, read_only, track_writes
+from performance.burn_rate import add_burn_rates
+from datetime import date, datetime
+from functools import wraps
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
 
 budgets_bp = Blueprint('budgets', __name__, url_prefix='/api/budgets')
+track_writes(budgets_bp)
+
+# Most categories POST /check accepts in one request
+MAX_CHECK_CATEGORIES = 200
+
+# Months per budget template period
+TEMPLATE_PERIOD_MONTHS = {'Monthly': 1, 'Quarterly': 3, 'Yearly': 12}
+
+# Most periods one generation run creates per template when catching up
+MAX_TEMPLATE_ROUNDS = 36
+
+# (day, user ids) whose due templates this process generated that day
+_templates_generated = (None, set())
+_templates_generated_lock = threading.Lock()
+
+def budget_percentage(spent, limit):
+    """Share of the limit spent, as a percentage rounded to 2 places"""
+    limit = float(limit)
+    return round(float(spent) / limit * 100, 2) if limit > 0 else 0.0
+
+def budget_status(percentage):
+    """Alert status for a budget's percentage used"""
+    if percentage >= 100:
+        return 'EXCEEDED'
+    elif percentage >= 80:
+        return 'WARNING'
+    elif percentage >= 50:
+        return 'NORMAL'
+    return 'SAFE'
+
+def check_budgets(user_id, category_ids=None, day=None):
+    """
+    Get the budget status of several categories with one query.
+    
+    Args:
+        user_id: User ID
+        category_ids: Categories to check, or None for every category with
+            a budget
+        day: Check the budgets covering this date; by default, the budgets
+            covering the whole current month
+            
+    Returns:
+        Dict of category_id -> budget row with budget_limit, total_spent,
+        percentage_used, alert_status and burn-rate projections. A category
+        with overlapping budgets gets the one that started last.
+    """
+    query = """
+        SELECT 
+            b.category_id, c.category_name, b.budget_id,
+            b.start_date, b.end_date,
+            b.amount_limit as budget_limit, COALESCE(s.spent, 0) as total_spent
+        FROM Budgets b
+        JOIN Categories c ON b.category_id = c.category_id
+        LEFT JOIN Budget_Spend s ON s.budget_id = b.budget_id
+        WHERE b.user_id = %s
+    """
+    params = [user_id]
+    
+    if day:
+        query += " AND b.start_date <= %s AND b.end_date >= %s"
+        params.extend((day, day))
+    else:
+        query += """
+            AND b.start_date <= DATE_FORMAT(CURDATE(), '%%Y-%%m-01')
+            AND b.end_date >= LAST_DAY(CURDATE())
+        """
+    
+    if category_ids is not None:
+        query += f" AND b.category_id IN ({', '.join(['%s'] * len(category_ids))})"
+        params.extend(category_ids)
+    
+    # When several budgets cover the period, the most recently started
+    # one is checked
+    query += " ORDER BY b.start_date DESC, b.budget_id DESC"
+    
+    checks = {}
+    for row in Database.execute_query(query, tuple(params), fetch_all=True):
+        if row['category_id'] in checks:
+            continue
+        limit = float(row['budget_limit'])
+        if limit <= 0:
+            percentage, status = 0.0, 'NO_BUDGET'
+        else:
+            percentage = budget_percentage(row['total_spent'], limit)
+            status = budget_status(percentage)
+        checks[row['category_id']] = {
+            'category_id': row['category_id'],
+            'category_name': row['category_name'],
+            'budget_id': row['budget_id'],
+            'start_date': row['start_date'],
+            'end_date': row['end_date'],
+            'budget_limit': limit,
+            'total_spent': float(row['total_spent']),
+            'percentage_used': percentage,
+            'alert_status': status
+        }
+    
+    add_burn_rates(list(checks.values()), date.today(), 'total_spent', 'budget_limit')
+    return checks
+
+def generate_due_template_budgets(user_id):
+    """
+    Generate a user's due template budgets, at most once a day per process.
+    
+    The scheduler job only runs where the scheduler is enabled, so reads
+    and checks of budgets call this to create a period on the day it
+    starts. Failures are logged and retried on the next read.
+    """
+    global _templates_generated
+    
+    # Marked before generating, so concurrent first reads run it once
+    with _templates_generated_lock:
+        today = date.today()
+        if _templates_generated[0] != today:
+            _templates_generated = (today, set())
+        users = _templates_generated[1]
+        if user_id in users:
+            return
+        users.add(user_id)
+    
+    try:
+        due_users = generate_template_budgets(user_id)
+        if due_users:
+            DataVersion.bump(due_users)
+    except Exception as e:
+        logger.error(f"Error generating template budgets for user {user_id}: {str(e)}")
+        with _templates_generated_lock:
+            users.discard(user_id)
+
+def with_template_budgets(f):
+    """
+    Decorator generating the user's due template budgets before the view.
+    
+    Must be applied below @require_auth and above @conditional_get, so the
+    ETag covers budgets created by this request.
+    """
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        generate_due_template_budgets(request.user_id)
+        return f(*args, **kwargs)
+    
+    return decorated_function
 
 @budgets_bp.route('/', methods=['GET'])
 @require_auth
+@with_template_budgets
+@conditional_get
 def get_budgets():
     """Get all budgets for current user"""
     try:
+        # Spent amounts are kept current in Budget_Spend by triggers on
+        # Transactions, so this reads one row per budget
         query = """
             SELECT 
                 b.budget_id, b.category_id, c.category_name,
                 b.amount_limit, b.start_date, b.end_date,
                 b.created_at,
-                COALESCE(SUM(t.amount), 0) as spent
+                CASE WHEN c.type = 'Expense' THEN COALESCE(s.spent, 0) ELSE 0 END as spent
             FROM Budgets b
             JOIN Categories c ON b.category_id = c.category_id
-            LEFT JOIN Transactions t ON 
-                t.user_id = b.user_id AND 
-                t.category_id = b.category_id AND
-                t.transaction_date BETWEEN b.start_date AND b.end_date AND
-                c.type = 'Expense'
+            LEFT JOIN Budget_Spend s ON s.budget_id = b.budget_id
             WHERE b.user_id = %s
-            GROUP BY b.budget_id, b.category_id, c.category_name, 
-                     b.amount_limit, b.start_date, b.end_date, b.created_at
             ORDER BY b.start_date DESC
         """
         
         budgets = Database.execute_query(query, (request.user_id,), fetch_all=True)
         
-        # Calculate percentage and status for each budget
+        # Status based on percentage
         for budget in budgets:
-            budget['spent'] = float(budget['spent'])
-            budget['amount_limit'] = float(budget['amount_limit'])
-            
-            if budget['amount_limit'] > 0:
-                budget['percentage'] = round((budget['spent'] / budget['amount_limit']) * 100, 2)
-            else:
-                budget['percentage'] = 0
-            
-            # Status based on percentage
-            if budget['percentage'] >= 100:
-                budget['status'] = 'EXCEEDED'
-            elif budget['percentage'] >= 80:
-                budget['status'] = 'WARNING'
-            elif budget['percentage'] >= 50:
-                budget['status'] = 'NORMAL'
-            else:
-                budget['status'] = 'SAFE'
-            
-            # Convert dates to strings
-            budget['start_date'] = budget['start_date'].strftime('%Y-%m-%d')
-            budget['end_date'] = budget['end_date'].strftime('%Y-%m-%d')
-            budget['created_at'] = budget['created_at'].strftime('%Y-%m-%d %H:%M:%S')
+            budget['percentage'] = budget_percentage(budget['spent'], budget['amount_limit'])
+            budget['status'] = budget_status(budget['percentage'])
+        
+        add_burn_rates(budgets, date.today())
         
         return jsonify(budgets), 200
         
@@ -66,6 +195,7 @@ def get_budgets():
 
 @budgets_bp.route('/<int:budget_id>', methods=['GET'])
 @require_auth
+@conditional_get
 def get_budget(budget_id):
     """Get a single budget by ID"""
     try:
@@ -84,12 +214,6 @@ def get_budget(budget_id):
         if not budget:
             return jsonify({'error': 'Budget not found'}), 404
         
-        # Convert dates to strings
-        budget['start_date'] = budget['start_date'].strftime('%Y-%m-%d')
-        budget['end_date'] = budget['end_date'].strftime('%Y-%m-%d')
-        budget['created_at'] = budget['created_at'].strftime('%Y-%m-%d %H:%M:%S')
-        budget['amount_limit'] = float(budget['amount_limit'])
-        
         return jsonify(budget), 200
         
     except Exception as e:
@@ -224,27 +348,14 @@ def delete_budget(budget_id):
 
 @budgets_bp.route('/check/<int:category_id>', methods=['GET'])
 @require_auth
+@with_template_budgets
 def check_budget_status(category_id):
     """Check budget status for a category in current month"""
     try:
-        # Call stored procedure
-        query = """
-            SET @limit = 0, @spent = 0, @percentage = 0, @status = '';
-            CALL SP_Check_Budget_Alert(%s, %s, 
-                DATE_FORMAT(NOW(), '%%Y-%%m-01'),
-                LAST_DAY(NOW()),
-                @limit, @spent, @percentage, @status);
-            SELECT @limit as budget_limit, @spent as total_spent, 
-                   @percentage as percentage_used, @status as alert_status;
-        """
+        # Budget covering the whole current month, with its precomputed spend
+        result = check_budgets(request.user_id, [category_id]).get(category_id)
         
-        result = Database.execute_query(
-            query,
-            (request.user_id, category_id),
-            fetch_one=True
-        )
-        
-        if not result or result['budget_limit'] is None:
+        if not result:
             return jsonify({
                 'message': 'No budget set for this category',
                 'has_budget': False
@@ -252,11 +363,325 @@ def check_budget_status(category_id):
         
         return jsonify({
             'has_budget': True,
-            'budget_limit': float(result['budget_limit']),
-            'total_spent': float(result['total_spent']),
-            'percentage_used': float(result['percentage_used']),
+            'budget_limit': result['budget_limit'],
+            'total_spent': result['total_spent'],
+            'percentage_used': result['percentage_used'],
             'alert_status': result['alert_status']
         }), 200
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
+
+@budgets_bp.route('/check', methods=['POST'])
+@require_auth
+@with_template_budgets
+@read_only
+def check_budgets_batch():
+    """
+    Check the budget status of many categories at once
+    
+    Body: {"category_ids": [1, 2, 3]} or {"category_ids": "all"}, with an
+    optional "date" (YYYY-MM-DD) and "amount" to preview a new transaction.
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        category_ids = data.get('category_ids', 'all')
+        
+        if category_ids == 'all':
+            category_ids = None
+        elif (not isinstance(category_ids, list) or not category_ids
+              or len(category_ids) > MAX_CHECK_CATEGORIES
+              or not all(isinstance(c, int) and not isinstance(c, bool) for c in category_ids)):
+            return jsonify({
+                'error': f'category_ids must be "all" or a list of 1 to {MAX_CHECK_CATEGORIES} category ids'
+            }), 400
+        else:
+            category_ids = list(dict.fromkeys(category_ids))
+        
+        day = None
+        if data.get('date'):
+            try:
+                day = datetime.strptime(str(data['date']), '%Y-%m-%d').date()
+            except ValueError:
+                return jsonify({'error': 'Invalid date format. Use YYYY-MM-DD'}), 400
+        
+        amount = data.get('amount')
+        if amount is not None:
+            try:
+                amount = float(amount)
+            except (TypeError, ValueError):
+                return jsonify({'error': 'amount must be a number'}), 400
+        
+        checks = check_budgets(request.user_id, category_ids, day)
+        
+        results = []
+        for category_id in (category_ids if category_ids is not None else checks):
+            check = checks.get(category_id)
+            if not check:
+                results.append({'category_id': category_id, 'has_budget': False})
+                continue
+            
+            result = {'has_budget': True, **check}
+            if amount is not None and check['budget_limit'] > 0:
+                projected = check['total_spent'] + amount
+                result['projected_spent'] = projected
+                result['projected_percentage'] = budget_percentage(projected, check['budget_limit'])
+                result['projected_status'] = budget_status(result['projected_percentage'])
+            results.append(result)
+        
+        return jsonify({'budgets': results}), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+def period_start(day, period):
+    """First day of the template period containing day"""
+    months = TEMPLATE_PERIOD_MONTHS[period]
+    return date(day.year, day.month - (day.month - 1) % months, 1)
+
+def generate_template_budgets(user_id=None):
+    """
+    Create the budgets of every due budget template.
+    
+    Each round reads every due template with a single SELECT, creates one
+    period for each with a single multi-row INSERT and moves the templates
+    on by one period, in one database transaction. Templates that missed
+    several periods are caught up by further rounds. A period that
+    overlaps a budget the user already has for the category is skipped.
+    
+    The rollover amounts are read before the INSERT: each new Budgets row
+    fires TRG_Budget_Spend_Budget_Insert, which writes Budget_Spend, and
+    MySQL refuses a statement that reads a table its triggers write.
+    
+    Args:
+        user_id: Only generate this user's budgets; None for every user
+        
+    Returns:
+        Set of user ids whose templates were due
+    """
+    user_filter = " AND t.user_id = %s" if user_id is not None else ""
+    params = (user_id,) if user_id is not None else ()
+    users = set()
+    
+    with Database.shared_connection():
+        for _ in range(MAX_TEMPLATE_ROUNDS):
+            # With rollover, the unspent part of the budget that ended the
+            # day before the period is carried over; if several ended that
+            # day, the one that started last, as in check_budgets.
+            # FOR UPDATE OF t makes concurrent runs wait for this one.
+            due = Database.execute_query(
+                f"""
+                SELECT 
+                    t.template_id,
+                    t.user_id,
+                    t.category_id,
+                    t.amount_limit,
+                    t.next_start_date as start_date,
+                    FN_Template_Period_End(t.next_start_date, t.period) as end_date,
+                    CASE WHEN t.rollover
+                         THEN GREATEST(COALESCE(p.amount_limit, 0) - COALESCE(s.spent, 0), 0)
+                         ELSE 0 END as carried,
+                    EXISTS (
+                        SELECT 1 FROM Budgets o
+                        WHERE o.user_id = t.user_id
+                        AND o.category_id = t.category_id
+                        AND o.start_date <= FN_Template_Period_End(t.next_start_date, t.period)
+                        AND o.end_date >= t.next_start_date
+                    ) as overlaps
+                FROM Budget_Templates t
+                LEFT JOIN Budgets p ON p.budget_id = (
+                    SELECT pb.budget_id FROM Budgets pb
+                    WHERE pb.user_id = t.user_id
+                    AND pb.category_id = t.category_id
+                    AND pb.end_date = t.next_start_date - INTERVAL 1 DAY
+                    ORDER BY pb.start_date DESC, pb.budget_id DESC
+                    LIMIT 1
+                )
+                LEFT JOIN Budget_Spend s ON s.budget_id = p.budget_id
+                WHERE t.is_active AND t.next_start_date <= CURDATE(){user_filter}
+                FOR UPDATE OF t
+                """,
+                params,
+                fetch_all=True
+            )
+            if not due:
+                break
+            users.update(row['user_id'] for row in due)
+            
+            new_budgets = [
+                (row['user_id'], row['category_id'], row['amount_limit'] + row['carried'],
+                 row['start_date'], row['end_date'])
+                for row in due if not row['overlaps']
+            ]
+            if new_budgets:
+                Database.execute_query(
+                    "INSERT INTO Budgets (user_id, category_id, amount_limit, start_date, end_date) VALUES "
+                    + ', '.join(['(%s, %s, %s, %s, %s)'] * len(new_budgets)),
+                    tuple(value for budget in new_budgets for value in budget)
+                )
+            
+            template_ids = [row['template_id'] for row in due]
+            Database.execute_query(
+                f"""
+                UPDATE Budget_Templates
+                SET next_start_date = FN_Template_Period_End(next_start_date, period) + INTERVAL 1 DAY,
+                    last_generated_at = NOW()
+                WHERE template_id IN ({', '.join(['%s'] * len(template_ids))})
+                """,
+                tuple(template_ids),
+                commit=True
+            )
+    
+    return users
+
+@budgets_bp.route('/templates', methods=['GET'])
+@require_auth
+@conditional_get
+def get_budget_templates():
+    """Get all recurring budget templates for current user"""
+    try:
+        templates = Database.execute_query(
+            """
+            SELECT 
+                t.template_id, t.category_id, c.category_name,
+                t.amount_limit, t.period, t.rollover, t.is_active,
+                t.next_start_date, t.last_generated_at, t.created_at
+            FROM Budget_Templates t
+            JOIN Categories c ON t.category_id = c.category_id
+            WHERE t.user_id = %s
+            ORDER BY c.category_name
+            """,
+            (request.user_id,),
+            fetch_all=True
+        )
+        
+        for template in templates:
+            template['rollover'] = bool(template['rollover'])
+            template['is_active'] = bool(template['is_active'])
+        
+        return jsonify(templates), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@budgets_bp.route('/templates', methods=['POST'])
+@require_auth
+def create_budget_template():
+    """
+    Create a recurring budget template
+    
+    The current period's budget is created at once; later periods are
+    created as they start, see generate_due_template_budgets.
+    """
+    try:
+        data = request.get_json()
+        
+        # Validate required fields
+        required = ['category_id', 'amount_limit']
+        if not data or not all(field in data for field in required):
+            return jsonify({'error': 'Missing required fields'}), 400
+        
+        period = data.get('period', 'Monthly')
+        if period not in TEMPLATE_PERIOD_MONTHS:
+            return jsonify({'error': f"period must be one of: {', '.join(TEMPLATE_PERIOD_MONTHS)}"}), 400
+        
+        # Periods always start on their first day
+        try:
+            start = datetime.strptime(data['start_date'], '%Y-%m-%d').date() if data.get('start_date') else date.today()
+        except ValueError:
+            return jsonify({'error': 'Invalid date format. Use YYYY-MM-DD'}), 400
+        start = period_start(start, period)
+        
+        existing = Database.execute_query(
+            "SELECT template_id FROM Budget_Templates WHERE user_id = %s AND category_id = %s",
+            (request.user_id, data['category_id']),
+            fetch_one=True
+        )
+        
+        if existing:
+            return jsonify({'error': 'A budget template already exists for this category'}), 409
+        
+        template_id = Database.execute_query(
+            """
+            INSERT INTO Budget_Templates (user_id, category_id, amount_limit, period, rollover, next_start_date)
+            VALUES (%s, %s, %s, %s, %s, %s)
+            """,
+            (request.user_id, data['category_id'], data['amount_limit'], period,
+             bool(data.get('rollover', False)), start),
+            commit=True
+        )
+        
+        generate_template_budgets(request.user_id)
+        
+        return jsonify({
+            'message': 'Budget template created successfully',
+            'template_id': template_id
+        }), 201
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@budgets_bp.route('/templates/<int:template_id>', methods=['PUT'])
+@require_auth
+def update_budget_template(template_id):
+    """Update a recurring budget template; changes apply from the next period"""
+    try:
+        data = request.get_json() or {}
+        
+        # Verify template belongs to user
+        check_query = "SELECT template_id FROM Budget_Templates WHERE template_id = %s AND user_id = %s"
+        template = Database.execute_query(check_query, (template_id, request.user_id), fetch_one=True)
+        
+        if not template:
+            return jsonify({'error': 'Budget template not found'}), 404
+        
+        # Build update query dynamically
+        updates = []
+        params = []
+        
+        if 'amount_limit' in data:
+            updates.append("amount_limit = %s")
+            params.append(data['amount_limit'])
+        
+        if 'rollover' in data:
+            updates.append("rollover = %s")
+            params.append(bool(data['rollover']))
+        
+        if 'is_active' in data:
+            updates.append("is_active = %s")
+            params.append(bool(data['is_active']))
+        
+        if not updates:
+            return jsonify({'error': 'No fields to update'}), 400
+        
+        params.append(template_id)
+        query = f"UPDATE Budget_Templates SET {', '.join(updates)} WHERE template_id = %s"
+        
+        Database.execute_query(query, tuple(params), commit=True)
+        
+        # A reactivated template may already be due
+        generate_template_budgets(request.user_id)
+        
+        return jsonify({'message': 'Budget template updated successfully'}), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@budgets_bp.route('/templates/<int:template_id>', methods=['DELETE'])
+@require_auth
+def delete_budget_template(template_id):
+    """Delete a recurring budget template; budgets it already created are kept"""
+    try:
+        # Verify template belongs to user
+        check_query = "SELECT template_id FROM Budget_Templates WHERE template_id = %s AND user_id = %s"
+        template = Database.execute_query(check_query, (template_id, request.user_id), fetch_one=True)
+        
+        if not template:
+            return jsonify({'error': 'Budget template not found'}), 404
+        
+        Database.execute_query("DELETE FROM Budget_Templates WHERE template_id = %s", (template_id,), commit=True)
+        
+        return jsonify({'message': 'Budget template deleted successfully'}), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
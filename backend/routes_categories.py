@@ -4,11 +4,15 @@ Categories management routes
 from flask import Blueprint, request, jsonify
 from database import Database
 from auth import require_auth
+from performance.data_version import conditional_get, track_writes
+from performance.columnar import wants_columnar
 
 categories_bp = Blueprint('categories', __name__, url_prefix='/api/categories')
+track_writes(categories_bp)
 
 @categories_bp.route('/', methods=['GET'])
 @require_auth
+@conditional_get
 def get_categories():
     """Get all categories (system default + user custom)"""
     try:
@@ -21,7 +25,8 @@ def get_categories():
             ORDER BY type, category_name
             """,
             (request.user_id,),
-            fetch_all=True
+            fetch_all=True,
+            columnar=wants_columnar()
         )
         
         return jsonify({'categories': categories}), 200
@@ -31,6 +36,7 @@ def get_categories():
 
 @categories_bp.route('/<int:category_id>', methods=['GET'])
 @require_auth
+@conditional_get
 def get_category(category_id):
     """Get specific category"""
     try:
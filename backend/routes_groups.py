@@ -4,26 +4,43 @@ Group management routes for shared expenses
 from flask import Blueprint, request, jsonify
 from database import Database
 from auth import require_auth
+from performance.data_version import track_writes
 from datetime import datetime
 
 groups_bp = Blueprint('groups', __name__, url_prefix='/api/groups')
 
+
+def _group_members():
+    """Members of the group a write targets, plus a member being removed"""
+    group_id = (request.view_args or {}).get('group_id')
+    if not group_id:
+        return []
+    members = Database.execute_query(
+        "SELECT user_id FROM User_Groups WHERE group_id = %s",
+        (group_id,),
+        fetch_all=True
+    )
+    return [m['user_id'] for m in members] + [request.view_args.get('user_id')]
+
+track_writes(groups_bp, affected_users=_group_members)
+
 @groups_bp.route('/', methods=['GET'])
 @require_auth
 def get_groups():
     """Get all groups for current user"""
     try:
+        # Member counts and totals come from Group_Member_Balances, one row
+        # per member kept current by triggers, not from the transactions
         query = """
             SELECT 
                 g.group_id, g.group_name, g.created_at,
                 g.created_by, u.username as creator_name,
-                COUNT(DISTINCT ug.user_id) as member_count,
-                COALESCE(SUM(CASE WHEN c.type = 'Expense' THEN ABS(t.amount) ELSE 0 END), 0) as total_spent
+                COUNT(CASE WHEN b.is_member THEN 1 END) as member_count,
+                COALESCE(SUM(b.total_expenses), 0) as total_spent
             FROM `Groups` g
             JOIN User_Groups ug ON g.group_id = ug.group_id
             LEFT JOIN Users u ON g.created_by = u.user_id
-            LEFT JOIN Transactions t ON g.group_id = t.group_id
-            LEFT JOIN Categories c ON t.category_id = c.category_id
+            LEFT JOIN Group_Member_Balances b ON g.group_id = b.group_id
             WHERE ug.user_id = %s
             GROUP BY g.group_id, g.group_name, g.created_at, g.created_by, u.username
             ORDER BY g.created_at DESC
@@ -32,8 +49,6 @@ def get_groups():
         groups = Database.execute_query(query, (request.user_id,), fetch_all=True)
         
         for group in groups:
-            group['total_spent'] = float(group['total_spent'])
-            group['created_at'] = group['created_at'].strftime('%Y-%m-%d %H:%M:%S')
             group['is_creator'] = group['created_by'] == request.user_id
         
         return jsonify(groups), 200
@@ -62,28 +77,25 @@ def get_group_details(group_id):
         group_query = """
             SELECT g.group_id, g.group_name, g.created_at,
                    g.created_by, creator.username as creator_name,
-                   COALESCE(SUM(CASE WHEN c.type = 'Expense' THEN ABS(t.amount) ELSE 0 END), 0) as total_spent
+                   COALESCE(SUM(b.total_expenses), 0) as total_spent
             FROM `Groups` g
             LEFT JOIN Users creator ON g.created_by = creator.user_id
-            LEFT JOIN Transactions t ON g.group_id = t.group_id
-            LEFT JOIN Categories c ON t.category_id = c.category_id
+            LEFT JOIN Group_Member_Balances b ON g.group_id = b.group_id
             WHERE g.group_id = %s
             GROUP BY g.group_id, g.group_name, g.created_at, g.created_by, creator.username
         """
-        group = Database.execute_query(group_query, (group_id,), fetch_one=True)
-        
-        if not group:
-            return jsonify({'error': 'Group not found'}), 404
         
-        # Get members
+        # Get members with their totals in the group
         members_query = """
-            SELECT u.user_id, u.username, u.email, ug.joined_at
+            SELECT u.user_id, u.username, u.email, ug.joined_at,
+                   COALESCE(b.total_expenses, 0) as total_expenses,
+                   COALESCE(b.total_contributions, 0) as total_contributions
             FROM User_Groups ug
             JOIN Users u ON ug.user_id = u.user_id
+            LEFT JOIN Group_Member_Balances b ON b.group_id = ug.group_id AND b.user_id = ug.user_id
             WHERE ug.group_id = %s
             ORDER BY ug.joined_at
         """
-        members = Database.execute_query(members_query, (group_id,), fetch_all=True)
         
         # Get recent transactions
         transactions_query = """
@@ -99,20 +111,19 @@ def get_group_details(group_id):
             ORDER BY t.transaction_date DESC
             LIMIT 20
         """
-        transactions = Database.execute_query(transactions_query, (group_id,), fetch_all=True)
         
-        # Format dates and numbers
-        group['created_at'] = group['created_at'].strftime('%Y-%m-%d %H:%M:%S')
-        group['is_creator'] = group['created_by'] == request.user_id
-        group['total_spent'] = float(group['total_spent']) if group['total_spent'] else 0.0
-        group['members'] = members  # Add members to group object for easy access
+        # The three reads are independent, so they run at the same time
+        group, members, transactions = Database.run_parallel([
+            {'query': group_query, 'params': (group_id,), 'fetch_one': True},
+            {'query': members_query, 'params': (group_id,), 'fetch_all': True},
+            {'query': transactions_query, 'params': (group_id,), 'fetch_all': True}
+        ])
         
-        for member in members:
-            member['joined_at'] = member['joined_at'].strftime('%Y-%m-%d %H:%M:%S')
+        if not group:
+            return jsonify({'error': 'Group not found'}), 404
         
-        for tx in transactions:
-            tx['amount'] = float(tx['amount'])
-            tx['transaction_date'] = tx['transaction_date'].strftime('%Y-%m-%d %H:%M:%S')
+        group['is_creator'] = group['created_by'] == request.user_id
+        group['members'] = members  # Add members to group object for easy access
         
         return jsonify({
             'group': group,
@@ -262,9 +273,20 @@ def delete_group(group_id):
         if group['created_by'] != request.user_id:
             return jsonify({'error': 'Only group creator can delete group'}), 403
         
-        # Delete group (cascade will handle User_Groups)
-        delete_query = "DELETE FROM `Groups` WHERE group_id = %s"
-        Database.execute_query(delete_query, (group_id,), commit=True)
+        # The group's transactions are unlinked first, in the same
+        # database transaction: ON DELETE SET NULL would change them
+        # without firing the Transactions triggers. The cascade then
+        # handles User_Groups and Group_Member_Balances
+        with Database.shared_connection():
+            Database.execute_query(
+                "UPDATE Transactions SET group_id = NULL WHERE group_id = %s",
+                (group_id,)
+            )
+            Database.execute_query(
+                "DELETE FROM `Groups` WHERE group_id = %s",
+                (group_id,),
+                commit=True
+            )
         
         return jsonify({'message': 'Group deleted successfully'}), 200
         
@@ -273,7 +295,7 @@ def delete_group(group_id):
 @groups_bp.route('/<int:group_id>/expense-summary', methods=['GET'])
 @require_auth
 def get_group_expense_summary(group_id):
-    """Get expense summary for a group using the View_Group_Expense_Summary view"""
+    """Get expense summary for a group from the per-member balances"""
     try:
         # Verify user is member
         member_check = """
@@ -287,29 +309,40 @@ def get_group_expense_summary(group_id):
         if not is_member:
             return jsonify({'error': 'You are not a member of this group'}), 403
         
-        # Get expense summary from view
-        summary_query = """
+        # One row per current or former member, kept current by triggers;
+        # replaces View_Group_Expense_Summary's per-row member count subqueries
+        balances_query = """
             SELECT 
-                user_id, username, email,
-                transaction_count, 
-                total_expenses, 
-                total_contributions,
-                net_spending,
-                fair_share,
-                balance_owed
-            FROM View_Group_Expense_Summary
-            WHERE group_id = %s
+                b.user_id, u.username, u.email, b.is_member,
+                b.txn_count as transaction_count,
+                b.total_expenses,
+                b.total_contributions,
+                b.total_expenses - b.total_contributions as net_spending
+            FROM Group_Member_Balances b
+            JOIN Users u ON b.user_id = u.user_id
+            WHERE b.group_id = %s
             ORDER BY net_spending DESC
         """
-        summary = Database.execute_query(summary_query, (group_id,), fetch_all=True)
-        
-        # Format decimal values
-        for member in summary:
-            member['total_expenses'] = float(member['total_expenses']) if member['total_expenses'] else 0.0
-            member['total_contributions'] = float(member['total_contributions']) if member['total_contributions'] else 0.0
-            member['net_spending'] = float(member['net_spending']) if member['net_spending'] else 0.0
-            member['fair_share'] = float(member['fair_share']) if member['fair_share'] else 0.0
-            member['balance_owed'] = float(member['balance_owed']) if member['balance_owed'] else 0.0
+        balances = Database.execute_query(balances_query, (group_id,), fetch_all=True)
+        
+        member_count = sum(1 for b in balances if b['is_member'])
+        summary = []
+        for balance in balances:
+            if not balance['transaction_count']:
+                continue
+            expenses = balance['total_expenses']
+            share = expenses / member_count if member_count else 0
+            summary.append({
+                'user_id': balance['user_id'],
+                'username': balance['username'],
+                'email': balance['email'],
+                'transaction_count': balance['transaction_count'],
+                'total_expenses': expenses,
+                'total_contributions': balance['total_contributions'],
+                'net_spending': balance['net_spending'],
+                'fair_share': round(share, 2),
+                'balance_owed': round(expenses - share, 2) if member_count else 0
+            })
         
         # Get group total stats
         group_total = {
@@ -4,12 +4,15 @@ Recurring payments management routes
 from flask import Blueprint, request, jsonify
 from database import Database
 from auth import require_auth
+from performance.data_version import conditional_get, track_writes
 from datetime import datetime, timedelta
 
 recurring_bp = Blueprint('recurring', __name__, url_prefix='/api/recurring')
+track_writes(recurring_bp)
 
 @recurring_bp.route('/', methods=['GET'])
 @require_auth
+@conditional_get
 def get_recurring_payments():
     """Get all recurring payments for current user"""
     try:
@@ -41,9 +44,6 @@ def get_recurring_payments():
         payments = Database.execute_query(query, (request.user_id,), fetch_all=True)
         
         for payment in payments:
-            payment['amount'] = float(payment['amount'])
-            payment['start_date'] = payment['start_date'].strftime('%Y-%m-%d')
-            payment['next_due_date'] = payment['next_due_date'].strftime('%Y-%m-%d')
             payment['is_active'] = bool(payment['is_active'])
             payment['is_overdue'] = payment['days_until_due'] < 0
             payment['is_due_soon'] = 0 <= payment['days_until_due'] <= 7
@@ -55,6 +55,7 @@ def get_recurring_payments():
 
 @recurring_bp.route('/<int:recurring_id>', methods=['GET'])
 @require_auth
+@conditional_get
 def get_recurring_payment(recurring_id):
     """Get details of a specific recurring payment"""
     try:
@@ -77,9 +78,6 @@ def get_recurring_payment(recurring_id):
         if not payment:
             return jsonify({'error': 'Recurring payment not found'}), 404
         
-        payment['amount'] = float(payment['amount'])
-        payment['start_date'] = payment['start_date'].strftime('%Y-%m-%d')
-        payment['next_due_date'] = payment['next_due_date'].strftime('%Y-%m-%d')
         payment['is_active'] = bool(payment['is_active'])
         
         return jsonify(payment), 200
@@ -286,6 +284,7 @@ def execute_recurring_payment(recurring_id):
 
 @recurring_bp.route('/due', methods=['GET'])
 @require_auth
+@conditional_get
 def get_due_payments():
     """Get all due or overdue recurring payments"""
     try:
@@ -306,16 +305,13 @@ def get_due_payments():
         
         payments = Database.execute_query(query, (request.user_id,), fetch_all=True)
         
-        for payment in payments:
-            payment['amount'] = float(payment['amount'])
-            payment['next_due_date'] = payment['next_due_date'].strftime('%Y-%m-%d')
-        
         return jsonify(payments), 200
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 @recurring_bp.route('/upcoming', methods=['GET'])
 @require_auth
+@conditional_get
 def get_upcoming_payments():
     """Get upcoming recurring payments using View_Upcoming_Recurring_Payments"""
     try:
@@ -331,10 +327,6 @@ def get_upcoming_payments():
         
         payments = Database.execute_query(query, (request.user_id,), fetch_all=True)
         
-        for payment in payments:
-            payment['amount'] = float(payment['amount'])
-            payment['next_due_date'] = payment['next_due_date'].strftime('%Y-%m-%d')
-        
         return jsonify(payments), 200
         
     except Exception as e:
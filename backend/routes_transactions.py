@@ -4,12 +4,16 @@ Transaction management routes
 from flask import Blueprint, request, jsonify
 from database import Database
 from auth import require_auth
+from performance.data_version import conditional_get, track_writes
+from performance.columnar import wants_columnar
 from datetime import datetime
 
 transactions_bp = Blueprint('transactions', __name__, url_prefix='/api/transactions')
+track_writes(transactions_bp)
 
 @transactions_bp.route('/', methods=['GET'])
 @require_auth
+@conditional_get
 def get_transactions():
     """Get all transactions for current user with optional filters"""
     try:
@@ -60,15 +64,7 @@ def get_transactions():
         query += " ORDER BY t.transaction_date DESC LIMIT %s OFFSET %s"
         params.extend([limit, offset])
         
-        transactions = Database.execute_query(query, tuple(params), fetch_all=True)
-        # Ensure transaction_date stays in local datetime string format (YYYY-MM-DD HH:mm:ss)
-        for t in transactions:
-            if t.get('transaction_date') is not None:
-                try:
-                    t['transaction_date'] = t['transaction_date'].strftime('%Y-%m-%d %H:%M:%S')
-                except Exception:
-                    # If already a string, leave as-is
-                    pass
+        transactions = Database.execute_query(query, tuple(params), fetch_all=True, columnar=wants_columnar())
         
         # Get total count
         count_query = """
@@ -112,6 +108,7 @@ def get_transactions():
 
 @transactions_bp.route('/<int:transaction_id>', methods=['GET'])
 @require_auth
+@conditional_get
 def get_transaction(transaction_id):
     """Get specific transaction"""
     try:
@@ -135,13 +132,6 @@ def get_transaction(transaction_id):
         if not transaction:
             return jsonify({'error': 'Transaction not found'}), 404
         
-        # Format transaction_date to local string
-        if transaction.get('transaction_date') is not None:
-            try:
-                transaction['transaction_date'] = transaction['transaction_date'].strftime('%Y-%m-%d %H:%M:%S')
-            except Exception:
-                pass
-
         return jsonify({'transaction': transaction}), 200
         
     except Exception as e:
@@ -5,10 +5,14 @@ from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.cron import CronTrigger
 from datetime import datetime, date
 from database import Database
+from monitoring.metrics import timed_job
+from performance.data_version import DataVersion
+from routes_budgets import generate_template_budgets
 import logging
 
 logger = logging.getLogger(__name__)
 
+@timed_job
 def process_due_recurring_payments():
     """Check and process recurring payments that are due"""
     try:
@@ -30,6 +34,7 @@ def process_due_recurring_payments():
             return
         
         logger.info(f"Processing {len(due_payments)} due recurring payments")
+        processed_users = set()
         
         for payment in due_payments:
             try:
@@ -69,14 +74,19 @@ def process_due_recurring_payments():
                 )
                 
                 logger.info(f"Processed recurring payment ID {payment['recurring_id']}")
+                processed_users.add(payment['user_id'])
                 
             except Exception as e:
                 logger.error(f"Error processing recurring payment ID {payment['recurring_id']}: {str(e)}")
                 continue
+        
+        # Cached lists of these users are now out of date
+        DataVersion.bump(processed_users)
                 
     except Exception as e:
         logger.error(f"Error in process_due_recurring_payments: {str(e)}")
 
+@timed_job
 def check_upcoming_bills():
     """Check for upcoming recurring bills in the next 3 days and create notifications"""
     try:
@@ -128,6 +138,7 @@ def check_upcoming_bills():
     except Exception as e:
         logger.error(f"Error checking upcoming bills: {str(e)}")
 
+@timed_job
 def check_unusual_spending():
     """Check for unusual spending patterns and create notifications"""
     try:
@@ -184,6 +195,23 @@ def check_unusual_spending():
     except Exception as e:
         logger.error(f"Error checking unusual spending: {str(e)}")
 
+@timed_job
+def generate_recurring_budgets():
+    """Create the budgets of every budget template whose next period has started"""
+    try:
+        # One set-based INSERT per period for all users, not one per template
+        users = generate_template_budgets()
+        
+        if not users:
+            logger.info("No budget templates due")
+            return
+        
+        logger.info(f"Generated template budgets for {len(users)} users")
+        DataVersion.bump(users)
+        
+    except Exception as e:
+        logger.error(f"Error generating recurring budgets: {str(e)}")
+
 # Initialize scheduler
 scheduler = BackgroundScheduler()
 
@@ -199,6 +227,15 @@ def start_scheduler():
             replace_existing=True
         )
         
+        # Create budgets from templates every day just after midnight
+        scheduler.add_job(
+            generate_recurring_budgets,
+            CronTrigger(hour=0, minute=5),
+            id='recurring_budgets',
+            name='Generate budgets from templates',
+            replace_existing=True
+        )
+        
         # Check upcoming bills every day at 9 AM
         scheduler.add_job(
             check_upcoming_bills,
@@ -11,6 +11,7 @@ from .headers import init_security_headers
 from .account_lockout import AccountLockout
 from .audit_logger import AuditLogger, AuditEventType
 from .rate_limiter import init_rate_limiter, RateLimiterConfig
+from .query_budget import QueryCostBudget, throttle_query_cost
 
 __all__ = [
     'InputValidator',
@@ -24,4 +25,6 @@ __all__ = [
     'AuditEventType',
     'init_rate_limiter',
     'RateLimiterConfig',
+    'QueryCostBudget',
+    'throttle_query_cost',
 ]
@@ -1,13 +1,30 @@
 """
 Security audit logging for MoneyMinder
 Logs security-relevant events for monitoring and investigation.
+
+Events are queued by the request thread and written by a background
+listener in batches, so audit I/O never adds latency to the login path.
+Each batch goes to a rotating, gzip-compressed JSON-lines file and, when
+enabled, to the Security_Audit_Log table as one multi-row INSERT.
 """
+import atexit
+import gzip
+import json
 import logging
+import logging.handlers
 import os
-from datetime import datetime
+import queue
+import shutil
+import threading
+import time
+from datetime import datetime, timezone
 from enum import Enum
 
 
+# Module logger for failures of the audit pipeline itself
+logger = logging.getLogger(__name__)
+
+
 class AuditEventType(Enum):
     """Types of security audit events"""
     LOGIN_SUCCESS = "LOGIN_SUCCESS"
@@ -20,18 +37,209 @@ class AuditEventType(Enum):
     INVALID_TOKEN = "INVALID_TOKEN"
 
 
+class JsonLinesFormatter(logging.Formatter):
+    """Formats audit records as one JSON object per line"""
+    
+    def format(self, record: logging.LogRecord) -> str:
+        return json.dumps({
+            'timestamp': datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            'level': record.levelname,
+            'event_type': getattr(record, 'event_type', None),
+            'message': record.getMessage(),
+            'details': getattr(record, 'details', {}),
+        }, default=str)
+
+
+def _gzip_rotator(source: str, dest: str) -> None:
+    """Compress a rotated log file and remove the original."""
+    with open(source, 'rb') as f_in, gzip.open(dest, 'wb') as f_out:
+        shutil.copyfileobj(f_in, f_out)
+    os.remove(source)
+
+
+class AuditBatchListener:
+    """
+    Drains queued audit records on a background thread.
+    
+    Records are collected into a batch that is flushed when it reaches
+    ``batch_size`` records or when ``flush_interval`` seconds have passed
+    since the first record of the batch was queued.
+    """
+    
+    _STOP = object()
+    
+    def __init__(self, record_queue, handlers, db_writer=None,
+                 batch_size: int = 50, flush_interval: float = 1.0):
+        self.queue = record_queue
+        self.handlers = handlers
+        self.db_writer = db_writer
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._thread = None
+    
+    def start(self) -> None:
+        """Start the background writer thread."""
+        self._thread = threading.Thread(
+            target=self._run, name='audit-log-writer', daemon=True
+        )
+        self._thread.start()
+    
+    def stop(self) -> None:
+        """Flush pending records and stop the writer thread."""
+        if self._thread is None:
+            return
+        self.queue.put_nowait(self._STOP)
+        self._thread.join(timeout=5)
+        self._thread = None
+    
+    def flush(self, timeout: float = 5.0) -> bool:
+        """
+        Block until every record queued so far has been written.
+        
+        Returns:
+            True if the flush completed within the timeout
+        """
+        if self._thread is None:
+            return False
+        done = threading.Event()
+        self.queue.put_nowait(done)
+        return done.wait(timeout)
+    
+    def _run(self) -> None:
+        batch = []
+        deadline = None
+        
+        while True:
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                item = self.queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+            
+            if item is self._STOP:
+                self._write_batch(batch)
+                return
+            
+            if isinstance(item, threading.Event):
+                self._write_batch(batch)
+                batch, deadline = [], None
+                item.set()
+                continue
+            
+            if item is not None:
+                batch.append(item)
+                if deadline is None:
+                    deadline = time.monotonic() + self.flush_interval
+            
+            if batch and (len(batch) >= self.batch_size or time.monotonic() >= deadline):
+                self._write_batch(batch)
+                batch, deadline = [], None
+    
+    def _write_batch(self, batch: list) -> None:
+        if not batch:
+            return
+        
+        for handler in self.handlers:
+            try:
+                for record in batch:
+                    if record.levelno >= handler.level:
+                        handler.handle(record)
+                handler.flush()
+            except Exception as e:
+                logger.warning(f"Audit log handler failed: {e}")
+        
+        if self.db_writer is not None:
+            try:
+                self.db_writer(batch)
+            except Exception as e:
+                logger.warning(f"Dropped {len(batch)} audit events, database write failed: {e}")
+
+
+# Widths of the Security_Audit_Log columns filled from request input
+AUDIT_COLUMN_WIDTHS = {'email': 100, 'ip_address': 45, 'endpoint': 255}
+
+AUDIT_INSERT = """
+    INSERT INTO Security_Audit_Log
+    (event_type, user_id, email, ip_address, endpoint, details)
+    VALUES (%s, %s, %s, %s, %s, %s)
+"""
+
+
+def _fit_column(value, column: str):
+    """Coerce a request-supplied value to a string that fits its column."""
+    if value is None:
+        return None
+    return str(value)[:AUDIT_COLUMN_WIDTHS[column]]
+
+
+def _audit_row(record) -> tuple:
+    """Build the Security_Audit_Log parameters for one audit record."""
+    details = getattr(record, 'details', {})
+    return (
+        record.event_type,
+        details.get('user_id'),
+        _fit_column(details.get('email'), 'email'),
+        _fit_column(details.get('ip_address'), 'ip_address') or 'unknown',
+        _fit_column(details.get('endpoint'), 'endpoint'),
+        json.dumps(details, default=str),
+    )
+
+
+def write_batch_to_database(records: list) -> None:
+    """
+    Persist a batch of audit records with a single multi-row INSERT.
+    
+    Values taken from request input are cut to their column widths first.
+    If the batch INSERT is rejected for its data, the rows are retried one
+    at a time so a single bad record cannot take the rest of the batch
+    down with it. Any other failure, such as the database being down,
+    gives up at once; the events are still in the file log.
+    
+    Args:
+        records: Log records produced by AuditLogger.log_event
+    """
+    import pymysql
+    from database import Database
+    
+    rows = [_audit_row(record) for record in records]
+    data_errors = (pymysql.err.DataError, pymysql.err.IntegrityError)
+    
+    try:
+        Database.execute_many(AUDIT_INSERT, rows)
+        return
+    except data_errors as e:
+        logger.warning(f"Audit batch insert rejected, retrying {len(rows)} rows one by one: {e}")
+    except Exception as e:
+        logger.warning(f"Audit batch of {len(rows)} events not written to the database: {e}")
+        return
+    
+    for row in rows:
+        try:
+            Database.execute_query(AUDIT_INSERT, row, commit=True)
+        except data_errors as e:
+            logger.warning(f"Dropped audit event {row[0]}, database write failed: {e}")
+        except Exception as e:
+            logger.warning(f"Audit events not written to the database: {e}")
+            return
+
+
 class AuditLogger:
     """Logs security-relevant events"""
     
+    BATCH_SIZE = int(os.getenv('AUDIT_LOG_BATCH_SIZE', 50))
+    FLUSH_INTERVAL_SECONDS = float(os.getenv('AUDIT_LOG_FLUSH_INTERVAL', 1.0))
+    MAX_BYTES = int(os.getenv('AUDIT_LOG_MAX_BYTES', 10 * 1024 * 1024))
+    BACKUP_COUNT = int(os.getenv('AUDIT_LOG_BACKUP_COUNT', 10))
+    
     _instance = None
     
-    def __new__(cls, log_file: str = None):
+    def __new__(cls, log_file: str = None, persist_to_db: bool = None):
         if cls._instance is None:
             cls._instance = super().__new__(cls)
             cls._instance._initialized = False
         return cls._instance
     
-    def __init__(self, log_file: str = None):
+    def __init__(self, log_file: str = None, persist_to_db: bool = None):
         if self._initialized:
             return
         
@@ -43,22 +251,22 @@ class AuditLogger:
             os.makedirs(log_dir, exist_ok=True)
             log_file = os.path.join(log_dir, 'security_audit.log')
         
-        self.log_file = log_file
-        
-        # Create dedicated security logger
-        self.logger = logging.getLogger("security_audit")
-        self.logger.setLevel(logging.INFO)
+        if persist_to_db is None:
+            persist_to_db = os.getenv('AUDIT_LOG_DB', 'true').lower() == 'true'
         
-        # Clear existing handlers to avoid duplicates
-        self.logger.handlers = []
+        self.log_file = log_file
         
-        # File handler - always add
-        file_handler = logging.FileHandler(log_file)
+        # Rotating JSON-lines file, rotated files are gzip-compressed
+        file_handler = logging.handlers.RotatingFileHandler(
+            log_file,
+            maxBytes=self.MAX_BYTES,
+            backupCount=self.BACKUP_COUNT
+        )
+        file_handler.namer = lambda name: name + '.gz'
+        file_handler.rotator = _gzip_rotator
         file_handler.setLevel(logging.INFO)
-        file_handler.setFormatter(logging.Formatter(
-            '%(asctime)s - %(levelname)s - [%(event_type)s] %(message)s'
-        ))
-        self.logger.addHandler(file_handler)
+        file_handler.setFormatter(JsonLinesFormatter())
+        handlers = [file_handler]
         
         # Also log to console in development
         if os.getenv('FLASK_ENV', 'development') == 'development':
@@ -67,17 +275,53 @@ class AuditLogger:
             console_handler.setFormatter(logging.Formatter(
                 '%(asctime)s - SECURITY - [%(event_type)s] %(message)s'
             ))
-            self.logger.addHandler(console_handler)
+            handlers.append(console_handler)
+        
+        # Request threads only enqueue; the listener does all the I/O
+        record_queue = queue.Queue()
+        self.listener = AuditBatchListener(
+            record_queue,
+            handlers,
+            db_writer=write_batch_to_database if persist_to_db else None,
+            batch_size=self.BATCH_SIZE,
+            flush_interval=self.FLUSH_INTERVAL_SECONDS
+        )
+        self.listener.start()
+        atexit.register(self.listener.stop)
+        
+        # Create dedicated security logger
+        self.logger = logging.getLogger("security_audit")
+        self.logger.setLevel(logging.INFO)
+        self.logger.propagate = False
+        
+        # Clear existing handlers to avoid duplicates
+        self.logger.handlers = []
+        self.logger.addHandler(logging.handlers.QueueHandler(record_queue))
+    
+    def flush(self, timeout: float = 5.0) -> bool:
+        """
+        Wait until all queued events have been written.
+        
+        Args:
+            timeout: Maximum seconds to wait
+            
+        Returns:
+            True if all events were written within the timeout
+        """
+        return self.listener.flush(timeout)
     
     def log_event(self, event_type: AuditEventType, details: dict) -> None:
         """
         Log a security event.
         
+        The event is only queued here; the background listener writes it
+        to the log file and database with the next batch.
+        
         Args:
             event_type: Type of security event
             details: Dictionary of event details
         """
-        extra = {'event_type': event_type.value}
+        extra = {'event_type': event_type.value, 'details': dict(details)}
         message = ' | '.join(f"{k}={v}" for k, v in details.items())
         self.logger.info(message, extra=extra)
     
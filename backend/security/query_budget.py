@@ -0,0 +1,224 @@
+"""
+Query cost budgeting for MoneyMinder
+Throttles expensive analytics requests per user based on estimated cost.
+
+The global rate limit counts requests, so a full-history aggregation costs
+the same as a cheap lookup. Here each request is priced by how many of the
+user's transaction rows it is likely to scan, and that cost is debited from
+a per-user token bucket.
+"""
+import os
+import threading
+import time
+from datetime import datetime
+from functools import wraps
+
+from flask import g, jsonify, request
+
+
+class QueryCostBudget:
+    """Per-user token bucket charged with estimated query cost"""
+    
+    # Bucket size and refill rate, in cost units
+    CAPACITY = float(os.getenv('QUERY_BUDGET_CAPACITY', 2000))
+    REFILL_PER_SECOND = float(os.getenv('QUERY_BUDGET_REFILL_PER_SECOND', 10))
+    
+    # Every request costs at least BASE_COST, plus one unit per ROWS_PER_UNIT rows
+    BASE_COST = 1.0
+    ROWS_PER_UNIT = 100
+    
+    # How long a user's row count is reused before it is queried again
+    ROW_STATS_TTL_SECONDS = 300
+    
+    # In-memory storage, per process
+    _buckets = {}    # {user_id: {'tokens': float, 'updated': float}}
+    _row_stats = {}  # {user_id: {'rows': int, 'history_days': int, 'fetched': float}}
+    _lock = threading.Lock()
+    
+    @classmethod
+    def get_row_stats(cls, user_id: int) -> dict:
+        """
+        Get the user's transaction count and history length in days.
+        
+        Args:
+            user_id: User ID
+            
+        Returns:
+            Dictionary with 'rows' and 'history_days'
+        """
+        from monitoring.metrics import record_cache_lookup
+        
+        cached = cls._row_stats.get(user_id)
+        now = time.monotonic()
+        hit = bool(cached) and now - cached['fetched'] < cls.ROW_STATS_TTL_SECONDS
+        record_cache_lookup('query_budget_row_stats', hit)
+        if hit:
+            return cached
+        
+        from database import Database
+        
+        result = Database.execute_query(
+            """
+            SELECT COUNT(*) as row_count, MIN(transaction_date) as first_date
+            FROM Transactions
+            WHERE user_id = %s
+            """,
+            (user_id,),
+            fetch_one=True
+        ) or {}
+        
+        first_date = result.get('first_date')
+        history_days = (datetime.now() - first_date).days + 1 if first_date else 1
+        
+        stats = {
+            'rows': int(result.get('row_count') or 0),
+            'history_days': max(1, history_days),
+            'fetched': now
+        }
+        cls._row_stats[user_id] = stats
+        return stats
+    
+    @classmethod
+    def estimate_cost(cls, user_id: int, span_days: int = None) -> float:
+        """
+        Estimate the cost of a query over a date span.
+        
+        Args:
+            user_id: User ID
+            span_days: Number of days the query covers, None for full history
+            
+        Returns:
+            Estimated cost in budget units
+        """
+        stats = cls.get_row_stats(user_id)
+        rows = stats['rows']
+        
+        if span_days is not None and span_days < stats['history_days']:
+            rows = rows * max(span_days, 1) / stats['history_days']
+        
+        return cls.BASE_COST + rows / cls.ROWS_PER_UNIT
+    
+    @classmethod
+    def try_charge(cls, user_id: int, cost: float) -> tuple:
+        """
+        Debit cost from the user's budget if enough is available.
+        
+        A cost larger than the whole bucket is capped at the capacity, so
+        such a request can still run once the bucket is full.
+        
+        Args:
+            user_id: User ID
+            cost: Estimated cost in budget units
+            
+        Returns:
+            Tuple of (allowed: bool, retry_after_seconds: int)
+        """
+        cost = min(cost, cls.CAPACITY)
+        now = time.monotonic()
+        
+        with cls._lock:
+            bucket = cls._buckets.get(user_id)
+            if bucket is None:
+                bucket = {'tokens': cls.CAPACITY, 'updated': now}
+                cls._buckets[user_id] = bucket
+            
+            elapsed = now - bucket['updated']
+            bucket['tokens'] = min(cls.CAPACITY, bucket['tokens'] + elapsed * cls.REFILL_PER_SECOND)
+            bucket['updated'] = now
+            
+            if bucket['tokens'] >= cost:
+                bucket['tokens'] -= cost
+                return (True, 0)
+            
+            shortfall = cost - bucket['tokens']
+            retry_after = int(shortfall / cls.REFILL_PER_SECOND) + 1
+            return (False, retry_after)
+    
+    @classmethod
+    def get_remaining(cls, user_id: int) -> float:
+        """Get the user's current budget without charging it."""
+        bucket = cls._buckets.get(user_id)
+        if bucket is None:
+            return cls.CAPACITY
+        elapsed = time.monotonic() - bucket['updated']
+        return min(cls.CAPACITY, bucket['tokens'] + elapsed * cls.REFILL_PER_SECOND)
+    
+    @classmethod
+    def reset(cls) -> None:
+        """Clear all buckets and cached row counts."""
+        with cls._lock:
+            cls._buckets.clear()
+            cls._row_stats.clear()
+
+
+def date_span_days(start_date: str = None, end_date: str = None):
+    """
+    Get the number of days between two YYYY-MM-DD dates.
+    
+    A missing end date means today. A missing or invalid start date means
+    the query is unbounded, which is returned as None.
+    """
+    if not start_date:
+        return None
+    try:
+        start = datetime.strptime(start_date[:10], '%Y-%m-%d')
+        end = datetime.strptime(end_date[:10], '%Y-%m-%d') if end_date else datetime.now()
+    except ValueError:
+        return None
+    return max((end - start).days + 1, 1)
+
+
+def throttle_query_cost(span_days_func):
+    """
+    Decorator that charges the request's estimated cost to the user's budget.
+    
+    Must be applied below @require_auth so request.user_id is available.
+    Background refreshes of cached responses (g.cache_refresh) are not
+    charged.
+    
+    Args:
+        span_days_func: Callable returning the request's date span in days,
+            or None when it covers the full history
+            
+    Returns:
+        Decorator function
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            if g.get('cache_refresh'):
+                return f(*args, **kwargs)
+            
+            try:
+                cost = QueryCostBudget.estimate_cost(request.user_id, span_days_func())
+            except Exception:
+                # Never block a request because the estimate itself failed
+                return f(*args, **kwargs)
+            
+            allowed, retry_after = QueryCostBudget.try_charge(request.user_id, cost)
+            if not allowed:
+                from security.audit_logger import audit_logger
+                from security.rate_limiter import get_remote_address
+                from monitoring.metrics import record_rate_limit_rejection
+                
+                record_rate_limit_rejection('query cost budget')
+                audit_logger.log_rate_limit(
+                    ip=get_remote_address(),
+                    endpoint=request.path,
+                    limit='query cost budget'
+                )
+                
+                response = jsonify({
+                    'error': 'Query budget exceeded',
+                    'code': 'QUERY_BUDGET_EXCEEDED',
+                    'message': 'Too many expensive reports requested. Please try again later.',
+                    'retry_after': retry_after
+                })
+                response.headers['Retry-After'] = str(retry_after)
+                return response, 429
+            
+            return f(*args, **kwargs)
+        
+        return decorated_function
+    
+    return decorator
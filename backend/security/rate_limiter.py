@@ -53,6 +53,9 @@ def init_rate_limiter(app):
         @app.errorhandler(429)
         def rate_limit_exceeded(e):
             from security.audit_logger import audit_logger
+            from monitoring.metrics import record_rate_limit_rejection
+            
+            record_rate_limit_rejection('request rate')
             
             # Log the rate limit event
             audit_logger.log_rate_limit(
@@ -0,0 +1,36 @@
+"""
+Shared fixtures for MoneyMinder backend tests.
+"""
+import pytest
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+
+from auth import AuthManager
+
+
+@pytest.fixture
+def blueprints():
+    """Blueprints served by the client fixture; test modules override this."""
+    return []
+
+
+@pytest.fixture
+def client(blueprints):
+    """Test client of a bare app serving the module's blueprints."""
+    app = Flask(__name__)
+    app.config['TESTING'] = True
+    for blueprint in blueprints:
+        app.register_blueprint(blueprint)
+    return app.test_client()
+
+
+@pytest.fixture
+def auth_headers():
+    """Authorization header for user 7."""
+    token = AuthManager.generate_token(7, 'tester', 'tester@example.com')
+    return {'Authorization': f'Bearer {token}'}
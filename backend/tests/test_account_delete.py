@@ -0,0 +1,87 @@
+"""
+Unit tests for deleting accounts.
+Tests that an account's transactions are deleted by a statement of their
+own, before the account and in the same database transaction, so the
+Transactions triggers in Performance_Tables.sql see every removed row.
+"""
+import pytest
+import sys
+import os
+from contextlib import contextmanager
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import Database
+from routes_accounts import accounts_bp
+
+
+class FakeDatabase:
+    """Records each statement, its commit flag and whether it ran on the shared connection."""
+    
+    def __init__(self, accounts):
+        self.accounts = set(accounts)
+        self.shared = False
+        self.statements = []
+    
+    @contextmanager
+    def shared_connection(self):
+        self.shared = True
+        try:
+            yield
+        finally:
+            self.shared = False
+    
+    def execute_query(self, query, params=None, fetch_one=False, fetch_all=False, commit=False, **kwargs):
+        sql = ' '.join(query.split())
+        self.statements.append({'sql': sql, 'params': params, 'commit': commit, 'shared': self.shared})
+        if sql.startswith('SELECT account_id FROM Accounts'):
+            return {'account_id': params[0]} if params[0] in self.accounts else None
+        return 1
+
+
+@pytest.fixture
+def blueprints():
+    return [accounts_bp]
+
+
+@pytest.fixture
+def db(monkeypatch):
+    fake = FakeDatabase(accounts=[1, 2])
+    monkeypatch.setattr(Database, 'execute_query', staticmethod(fake.execute_query))
+    monkeypatch.setattr(Database, 'shared_connection', staticmethod(fake.shared_connection))
+    monkeypatch.setattr(Database, 'execute_many', staticmethod(lambda query, seq_params: len(seq_params)))
+    return fake
+
+
+def deletes(db):
+    return [s for s in db.statements if s['sql'].startswith('DELETE')]
+
+
+class TestDeleteAccount:
+    """Tests for deleting an account and its transactions"""
+    
+    def test_transactions_deleted_first(self, db, client, auth_headers):
+        response = client.delete('/api/accounts/2', headers=auth_headers)
+        
+        assert response.status_code == 200
+        assert [(s['sql'], s['params']) for s in deletes(db)] == [
+            ('DELETE FROM Transactions WHERE account_id = %s AND user_id = %s', (2, 7)),
+            ('DELETE FROM Accounts WHERE account_id = %s AND user_id = %s', (2, 7)),
+        ]
+    
+    def test_deletes_commit_together(self, db, client, auth_headers):
+        client.delete('/api/accounts/2', headers=auth_headers)
+        
+        # One connection, committed only by the last statement
+        assert [(s['shared'], s['commit']) for s in deletes(db)] == [(True, False), (True, True)]
+    
+    def test_unknown_account(self, db, client, auth_headers):
+        response = client.delete('/api/accounts/99', headers=auth_headers)
+        
+        assert response.status_code == 404
+        assert deletes(db) == []
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
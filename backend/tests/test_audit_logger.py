@@ -3,6 +3,7 @@ Unit tests for audit logger.
 Tests security event logging.
 """
 import pytest
+import json
 import os
 import tempfile
 import sys
@@ -34,7 +35,7 @@ class TestAuditLogger:
         """Create a fresh audit logger instance."""
         # Reset singleton
         AuditLogger._instance = None
-        return AuditLogger(log_file=temp_log_file)
+        return AuditLogger(log_file=temp_log_file, persist_to_db=False)
     
     def test_log_login_success(self, logger, temp_log_file):
         """
@@ -49,6 +50,7 @@ class TestAuditLogger:
         )
         
         # Read log file
+        logger.flush()
         with open(temp_log_file, 'r') as f:
             log_content = f.read()
         
@@ -70,6 +72,7 @@ class TestAuditLogger:
         )
         
         # Read log file
+        logger.flush()
         with open(temp_log_file, 'r') as f:
             log_content = f.read()
         
@@ -90,6 +93,7 @@ class TestAuditLogger:
         )
         
         # Read log file
+        logger.flush()
         with open(temp_log_file, 'r') as f:
             log_content = f.read()
         
@@ -109,6 +113,7 @@ class TestAuditLogger:
         )
         
         # Read log file
+        logger.flush()
         with open(temp_log_file, 'r') as f:
             log_content = f.read()
         
@@ -125,6 +130,7 @@ class TestAuditLogger:
         )
         
         # Read log file
+        logger.flush()
         with open(temp_log_file, 'r') as f:
             log_content = f.read()
         
@@ -138,6 +144,7 @@ class TestAuditLogger:
         Validates: Requirements 8.4
         """
         logger.log_event(AuditEventType.LOGIN_SUCCESS, {'test': 'data'})
+        logger.flush()
         
         assert os.path.exists(temp_log_file)
         
@@ -146,6 +153,19 @@ class TestAuditLogger:
         
         assert len(content) > 0
     
+    def test_log_lines_are_json(self, logger, temp_log_file):
+        """Each event should be written as one JSON object per line."""
+        logger.log_login_attempt(email="a@example.com", ip="10.0.0.1", success=True, user_id=1)
+        logger.log_registration(email="b@example.com", ip="10.0.0.2", user_id=2)
+        logger.flush()
+        
+        with open(temp_log_file, 'r') as f:
+            lines = [json.loads(line) for line in f if line.strip()]
+        
+        assert [line['event_type'] for line in lines] == ['LOGIN_SUCCESS', 'REGISTRATION']
+        assert lines[0]['details']['email'] == 'a@example.com'
+        assert lines[1]['details']['user_id'] == 2
+    
     def test_event_types(self):
         """All event types should be defined."""
         expected_types = [
@@ -163,6 +183,148 @@ class TestAuditLogger:
             assert hasattr(AuditEventType, event_type)
 
 
+class TestAuditBatchListener:
+    """Tests for the background batching pipeline."""
+    
+    def _make_record(self, n):
+        import logging
+        record = logging.LogRecord('security_audit', logging.INFO, __file__, 0,
+                                   f'event {n}', None, None)
+        record.event_type = 'LOGIN_SUCCESS'
+        record.details = {'ip_address': '10.0.0.1', 'user_id': n}
+        return record
+    
+    def test_flushes_when_batch_is_full(self):
+        """A full batch should be written as a single database call."""
+        import queue
+        from security.audit_logger import AuditBatchListener
+        
+        batches = []
+        listener = AuditBatchListener(queue.Queue(), [], db_writer=batches.append,
+                                      batch_size=3, flush_interval=60)
+        listener.start()
+        for n in range(3):
+            listener.queue.put(self._make_record(n))
+        
+        listener.flush()
+        listener.stop()
+        
+        assert len(batches) == 1
+        assert [r.details['user_id'] for r in batches[0]] == [0, 1, 2]
+    
+    def test_flushes_after_interval(self):
+        """A partial batch should be written once the interval elapses."""
+        import queue
+        import time
+        from security.audit_logger import AuditBatchListener
+        
+        batches = []
+        listener = AuditBatchListener(queue.Queue(), [], db_writer=batches.append,
+                                      batch_size=100, flush_interval=0.05)
+        listener.start()
+        listener.queue.put(self._make_record(1))
+        
+        time.sleep(0.3)
+        listener.stop()
+        
+        assert len(batches) == 1
+        assert len(batches[0]) == 1
+    
+    def test_database_failure_does_not_stop_listener(self):
+        """A failing database write should not kill the writer thread."""
+        import queue
+        from security.audit_logger import AuditBatchListener
+        
+        calls = []
+        
+        def failing_writer(batch):
+            calls.append(len(batch))
+            raise RuntimeError("database unavailable")
+        
+        listener = AuditBatchListener(queue.Queue(), [], db_writer=failing_writer,
+                                      batch_size=1, flush_interval=60)
+        listener.start()
+        listener.queue.put(self._make_record(1))
+        listener.queue.put(self._make_record(2))
+        
+        assert listener.flush()
+        listener.stop()
+        assert calls == [1, 1]
+
+
+class TestWriteBatchToDatabase:
+    """Tests for persisting audit batches."""
+    
+    def _make_record(self, email, ip='10.0.0.1'):
+        import logging
+        record = logging.LogRecord('security_audit', logging.INFO, __file__, 0,
+                                   'event', None, None)
+        record.event_type = 'LOGIN_FAILURE'
+        record.details = {'email': email, 'ip_address': ip}
+        return record
+    
+    def test_request_values_fit_their_columns(self, monkeypatch):
+        """Over-long emails and IPs should be cut to the column widths."""
+        from database import Database
+        from security.audit_logger import write_batch_to_database
+        
+        batches = []
+        monkeypatch.setattr(Database, 'execute_many',
+                            staticmethod(lambda query, rows: batches.append(rows)))
+        
+        write_batch_to_database([self._make_record('a' * 500, ip='1' * 500)])
+        
+        row = batches[0][0]
+        assert len(row[2]) == 100
+        assert len(row[3]) == 45
+    
+    def test_failed_batch_is_retried_row_by_row(self, monkeypatch):
+        """One bad row should not drop the other events of its batch."""
+        import pymysql
+        from database import Database
+        from security.audit_logger import write_batch_to_database
+        
+        written = []
+        
+        def failing_execute_many(query, rows):
+            raise pymysql.err.DataError(1406, "Data too long for column 'email'")
+        
+        def execute_query(query, params=None, commit=False, **kwargs):
+            if params[2] == 'bad@example.com':
+                raise pymysql.err.DataError(1406, "Data too long for column 'email'")
+            written.append(params[2])
+        
+        monkeypatch.setattr(Database, 'execute_many', staticmethod(failing_execute_many))
+        monkeypatch.setattr(Database, 'execute_query', staticmethod(execute_query))
+        
+        write_batch_to_database([
+            self._make_record('first@example.com'),
+            self._make_record('bad@example.com'),
+            self._make_record('last@example.com'),
+        ])
+        
+        assert written == ['first@example.com', 'last@example.com']
+    
+    def test_connection_error_skips_row_retries(self, monkeypatch):
+        """With the database down, a batch should cost one attempt, not one per row."""
+        import pymysql
+        from database import Database
+        from security.audit_logger import write_batch_to_database
+        
+        attempts = []
+        
+        def unreachable(*args, **kwargs):
+            attempts.append(args[0])
+            raise pymysql.err.OperationalError(2003, "Can't connect to MySQL server")
+        
+        monkeypatch.setattr(Database, 'execute_many', staticmethod(unreachable))
+        monkeypatch.setattr(Database, 'execute_query', staticmethod(unreachable))
+        
+        write_batch_to_database([self._make_record(f'user{n}@example.com') for n in range(5)])
+        
+        assert len(attempts) == 1
+
+
 class TestAuditLoggerSingleton:
     """Tests for audit logger singleton behavior."""
     
@@ -171,7 +333,7 @@ class TestAuditLoggerSingleton:
         # Reset singleton
         AuditLogger._instance = None
         
-        logger1 = AuditLogger()
+        logger1 = AuditLogger(persist_to_db=False)
         logger2 = AuditLogger()
         
         assert logger1 is logger2
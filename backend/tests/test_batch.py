@@ -0,0 +1,137 @@
+"""
+Unit tests for the batch endpoint.
+Tests sub-request dispatch, validation and connection sharing.
+"""
+import pytest
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from auth import AuthManager
+from database import Database
+
+
+class FakeConnection:
+    """Connection that only records that it was opened and closed."""
+    
+    def __init__(self):
+        self.open = True
+    
+    def close(self):
+        self.open = False
+
+
+class TestBatchEndpoint:
+    """Tests for POST /api/batch."""
+    
+    def test_responses_in_request_order(self, client, auth_headers):
+        """Every sub-request should be answered, in the order given."""
+        response = client.post('/api/batch', headers=auth_headers, json={
+            'requests': [{'path': '/items/1'}, '/items/2?verbose=1', {'path': '/api/items/missing'}]
+        })
+        
+        assert response.status_code == 200
+        responses = response.get_json()['responses']
+        assert [r['status'] for r in responses] == [200, 200, 404]
+        assert responses[0]['body'] == {'id': 1, 'user_id': 7, 'verbose': False}
+        assert responses[1]['body']['verbose'] is True
+    
+    def test_token_decoded_once(self, client, auth_headers, monkeypatch):
+        """Sub-requests should reuse the batch's verified token."""
+        calls = []
+        original = AuthManager.decode_token
+        monkeypatch.setattr(AuthManager, 'decode_token',
+                            staticmethod(lambda token: calls.append(token) or original(token)))
+        
+        client.post('/api/batch', headers=auth_headers, json={'requests': ['/items/1', '/items/2']})
+        
+        assert len(calls) == 1
+    
+    def test_requires_auth(self, client):
+        """The batch itself should require a valid token."""
+        response = client.post('/api/batch', json={'requests': ['/items/1']})
+        assert response.status_code == 401
+    
+    @pytest.mark.parametrize('requests', [
+        [],
+        [{'path': '/items/1', 'method': 'DELETE'}],
+        ['/batch'],
+        ['/items/1'] * 21,
+    ])
+    def test_invalid_batches_rejected(self, client, auth_headers, requests):
+        """Empty, oversized, nested and write batches should be refused."""
+        response = client.post('/api/batch', headers=auth_headers, json={'requests': requests})
+        assert response.status_code == 400
+    
+    def test_sequential_batch_shares_connection(self, client, auth_headers, monkeypatch):
+        """All sub-requests of a sequential batch should use one connection."""
+        opened = []
+        monkeypatch.setattr(Database, '_connect',
+                            staticmethod(lambda read_timeout=None: opened.append(FakeConnection()) or opened[-1]))
+        
+        response = client.post('/api/batch', headers=auth_headers, json={
+            'requests': ['/items/db', '/items/db', '/items/db']
+        })
+        
+        bodies = [r['body'] for r in response.get_json()['responses']]
+        assert len(opened) == 1
+        assert len({b['connection'] for b in bodies}) == 1
+        assert not opened[0].open
+    
+    def test_parallel_batch_keeps_order(self, client, auth_headers, monkeypatch):
+        """Parallel batches should return responses in request order."""
+        monkeypatch.setattr(Database, '_connect', staticmethod(lambda read_timeout=None: FakeConnection()))
+        paths = [f'/items/{i}' for i in range(1, 9)]
+        
+        response = client.post('/api/batch', headers=auth_headers, json={
+            'requests': paths,
+            'parallel': True
+        })
+        
+        assert [r['body']['id'] for r in response.get_json()['responses']] == list(range(1, 9))
+
+
+# Pytest fixtures
+@pytest.fixture
+def app():
+    """Create test Flask application."""
+    from flask import Flask, Blueprint, jsonify, request
+    from auth import require_auth
+    from routes_batch import batch_bp
+    
+    app = Flask(__name__)
+    app.config['TESTING'] = True
+    app.url_map.strict_slashes = False
+    items_bp = Blueprint('items', __name__, url_prefix='/api/items')
+    
+    @items_bp.route('/<int:item_id>', methods=['GET'])
+    @require_auth
+    def get_item(item_id):
+        return jsonify({'id': item_id, 'user_id': request.user_id,
+                        'verbose': request.args.get('verbose') == '1'}), 200
+    
+    @items_bp.route('/db', methods=['GET'])
+    @require_auth
+    def get_with_connection():
+        with Database.get_connection() as conn:
+            return jsonify({'connection': id(conn)}), 200
+    
+    @app.errorhandler(404)
+    def not_found(error):
+        return jsonify({'error': 'Endpoint not found'}), 404
+    
+    app.register_blueprint(items_bp)
+    app.register_blueprint(batch_bp)
+    return app
+
+
+@pytest.fixture
+def client(app):
+    """Create test client."""
+    return app.test_client()
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,160 @@
+"""
+Unit tests for checking budgets.
+Tests which budget is checked when several cover the same period, and
+that reads create the budgets of due templates.
+"""
+import pytest
+import sys
+import os
+import threading
+import time
+from datetime import date
+from decimal import Decimal
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import routes_budgets
+from database import Database
+from performance.data_version import DataVersion
+from routes_budgets import budgets_bp, check_budgets
+
+
+def budget(budget_id, start_date, end_date, limit, spent):
+    return {
+        'category_id': 10, 'category_name': 'Food', 'budget_id': budget_id,
+        'start_date': start_date, 'end_date': end_date,
+        'budget_limit': Decimal(limit), 'total_spent': Decimal(spent),
+    }
+
+
+# A yearly budget and two monthly ones all cover March 2024
+BUDGETS = [
+    budget(1, date(2024, 1, 1), date(2024, 12, 31), '6000.00', '450.00'),
+    budget(3, date(2024, 3, 1), date(2024, 3, 31), '500.00', '450.00'),
+    budget(2, date(2024, 3, 1), date(2024, 3, 31), '800.00', '450.00'),
+]
+
+
+@pytest.fixture
+def queries(monkeypatch):
+    """Return the budgets in MySQL's order: the ORDER BY, else any order."""
+    calls = []
+    
+    def fake_execute_query(query, params=None, **kwargs):
+        calls.append(' '.join(query.split()))
+        if 'ORDER BY b.start_date DESC, b.budget_id DESC' in query:
+            return sorted(BUDGETS, key=lambda b: (b['start_date'], b['budget_id']), reverse=True)
+        return list(BUDGETS)
+    
+    monkeypatch.setattr(Database, 'execute_query', staticmethod(fake_execute_query))
+    return calls
+
+
+class TestOverlappingBudgets:
+    """Tests for picking one of several budgets of a category"""
+    
+    def test_latest_started_budget_is_checked(self, queries):
+        check = check_budgets(7, [10], date(2024, 3, 15))[10]
+        
+        # Both monthly budgets started last; the higher id breaks the tie
+        assert check['budget_id'] == 3
+        assert check['budget_limit'] == 500.0
+        assert check['alert_status'] == 'WARNING'
+    
+    def test_pick_does_not_depend_on_row_order(self, queries):
+        first = check_budgets(7, [10], date(2024, 3, 15))[10]['budget_id']
+        BUDGETS.reverse()
+        try:
+            second = check_budgets(7, [10], date(2024, 3, 15))[10]['budget_id']
+        finally:
+            BUDGETS.reverse()
+        
+        assert first == second == 3
+        assert all(q.endswith('ORDER BY b.start_date DESC, b.budget_id DESC') for q in queries)
+
+
+@pytest.fixture
+def generated(monkeypatch):
+    """Record template generation runs and data version bumps."""
+    calls = {'generate': [], 'bump': [], 'due': {7}}
+    
+    def fake_generate(user_id=None):
+        calls['generate'].append(user_id)
+        if isinstance(calls['due'], Exception):
+            raise calls['due']
+        return calls['due']
+    
+    monkeypatch.setattr(routes_budgets, 'generate_template_budgets', fake_generate)
+    monkeypatch.setattr(routes_budgets, '_templates_generated', (None, set()))
+    monkeypatch.setattr(DataVersion, 'bump', staticmethod(lambda user_ids: calls['bump'].append(set(user_ids))))
+    monkeypatch.setattr(DataVersion, 'get', staticmethod(lambda user_id: 0))
+    monkeypatch.setattr(Database, 'execute_query', staticmethod(lambda query, params=None, **kwargs: []))
+    return calls
+
+
+@pytest.fixture
+def blueprints():
+    return [budgets_bp]
+
+
+class TestTemplateBudgetsOnRead:
+    """Tests for creating due template budgets when budgets are read"""
+    
+    def test_reads_generate_due_budgets(self, generated, client, auth_headers):
+        response = client.get('/api/budgets/', headers=auth_headers)
+        
+        assert response.status_code == 200
+        assert generated['generate'] == [7]
+        assert generated['bump'] == [{7}]
+    
+    def test_generated_once_a_day(self, generated, client, auth_headers):
+        client.get('/api/budgets/', headers=auth_headers)
+        client.get('/api/budgets/check/10', headers=auth_headers)
+        client.post('/api/budgets/check', json={'category_ids': [10]}, headers=auth_headers)
+        
+        assert generated['generate'] == [7]
+    
+    def test_nothing_due_keeps_data_version(self, generated, client, auth_headers):
+        generated['due'] = set()
+        
+        client.post('/api/budgets/check', json={'category_ids': [10]}, headers=auth_headers)
+        
+        assert generated['generate'] == [7]
+        assert generated['bump'] == []
+    
+    def test_failure_does_not_fail_read(self, generated, client, auth_headers):
+        generated['due'] = RuntimeError('database unavailable')
+        
+        first = client.get('/api/budgets/', headers=auth_headers)
+        second = client.get('/api/budgets/', headers=auth_headers)
+        
+        assert first.status_code == second.status_code == 200
+        # Retried on the next read
+        assert generated['generate'] == [7, 7]
+    
+    def test_concurrent_first_reads_generate_once(self, generated, monkeypatch):
+        slow_generate = routes_budgets.generate_template_budgets
+        
+        def fake_generate(user_id=None):
+            time.sleep(0.05)
+            return slow_generate(user_id)
+        
+        monkeypatch.setattr(routes_budgets, 'generate_template_budgets', fake_generate)
+        start = threading.Barrier(4)
+        
+        def read():
+            start.wait()
+            routes_budgets.generate_due_template_budgets(7)
+        
+        threads = [threading.Thread(target=read) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        assert generated['generate'] == [7]
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
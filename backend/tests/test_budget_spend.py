@@ -0,0 +1,141 @@
+"""
+Unit tests for the budget reads served from Budget_Spend.
+Tests that budget lists, checks and the budget status report read the
+trigger-maintained spend instead of summing transactions.
+"""
+import pytest
+import sys
+import os
+from datetime import date
+from decimal import Decimal
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import routes_budgets
+from database import Database
+from performance.data_version import DataVersion
+from routes_analytics import analytics_bp
+from routes_budgets import MAX_CHECK_CATEGORIES, budgets_bp
+
+
+START, END = date(2024, 3, 1), date(2024, 3, 31)
+
+
+@pytest.fixture
+def queries(monkeypatch):
+    """Record queries and answer each budget read with one budget of category 10."""
+    calls = []
+    
+    def fake_execute_query(query, params=None, **kwargs):
+        query = ' '.join(query.split())
+        calls.append((query, params))
+        if 'Budget_Spend' not in query:
+            return []
+        row = {
+            'budget_id': 4, 'category_id': 10, 'category_name': 'Food',
+            'start_date': START, 'end_date': END, 'created_at': None,
+        }
+        if 'as total_spent' in query:
+            row.update(budget_limit=Decimal('500.00'), total_spent=Decimal('450.00'))
+        else:
+            row.update(amount_limit=Decimal('500.00'), spent=Decimal('450.00'))
+        return [row]
+    
+    monkeypatch.setattr(Database, 'execute_query', staticmethod(fake_execute_query))
+    monkeypatch.setattr(routes_budgets, 'generate_due_template_budgets', lambda user_id: None)
+    monkeypatch.setattr(DataVersion, 'get', staticmethod(lambda user_id: 0))
+    return calls
+
+
+def spend_reads(queries):
+    return [(query, params) for query, params in queries if 'Budget_Spend' in query]
+
+
+@pytest.fixture
+def blueprints():
+    return [budgets_bp, analytics_bp]
+
+
+class TestBudgetReads:
+    """Tests for budget lists and the status report"""
+    
+    def test_list_reads_spend_counters(self, queries, client, auth_headers):
+        response = client.get('/api/budgets/', headers=auth_headers)
+        
+        assert response.status_code == 200
+        [(query, params)] = spend_reads(queries)
+        assert 'LEFT JOIN Budget_Spend s ON s.budget_id = b.budget_id' in query
+        assert 'Transactions' not in query
+        assert params == (7,)
+        [budget] = response.get_json()
+        assert budget['percentage'] == 90.0
+        assert budget['status'] == 'WARNING'
+    
+    def test_budget_status_report(self, queries, client, auth_headers):
+        response = client.get('/api/analytics/budget-status', headers=auth_headers)
+        
+        assert response.status_code == 200
+        [(query, _)] = spend_reads(queries)
+        assert 'Transactions' not in query
+        [budget] = response.get_json()['budgets']
+        assert budget['spent'] == 450.0
+        assert budget['remaining'] == 50.0
+        assert budget['percentage'] == 90.0
+        assert budget['status'] == 'WARNING'
+
+
+class TestBudgetChecks:
+    """Tests for checking one or many categories"""
+    
+    def test_check_one_category(self, queries, client, auth_headers):
+        response = client.get('/api/budgets/check/10', headers=auth_headers)
+        
+        assert response.status_code == 200
+        body = response.get_json()
+        assert body == {
+            'has_budget': True, 'budget_limit': 500.0, 'total_spent': 450.0,
+            'percentage_used': 90.0, 'alert_status': 'WARNING',
+        }
+        [(query, params)] = spend_reads(queries)
+        assert 'Transactions' not in query
+        assert params == (7, 10)
+    
+    def test_check_category_without_budget(self, queries, client, auth_headers):
+        response = client.get('/api/budgets/check/11', headers=auth_headers)
+        
+        assert response.status_code == 200
+        assert response.get_json()['has_budget'] is False
+    
+    def test_batch_check_with_preview(self, queries, client, auth_headers):
+        response = client.post('/api/budgets/check', headers=auth_headers, json={
+            'category_ids': [10, 11, 10], 'date': '2024-03-15', 'amount': 100
+        })
+        
+        assert response.status_code == 200
+        found, missing = response.get_json()['budgets']
+        assert missing == {'category_id': 11, 'has_budget': False}
+        assert found['projected_spent'] == 550.0
+        assert found['projected_status'] == 'EXCEEDED'
+        [(_, params)] = spend_reads(queries)
+        # Duplicates are checked once
+        assert params == (7, date(2024, 3, 15), date(2024, 3, 15), 10, 11)
+    
+    @pytest.mark.parametrize('body', [
+        {'category_ids': []},
+        {'category_ids': 'some'},
+        {'category_ids': [1, '2']},
+        {'category_ids': [True]},
+        {'category_ids': list(range(MAX_CHECK_CATEGORIES + 1))},
+        {'category_ids': [10], 'date': '15/03/2024'},
+        {'category_ids': [10], 'amount': 'ten'},
+    ])
+    def test_batch_check_rejects_invalid(self, queries, client, auth_headers, body):
+        response = client.post('/api/budgets/check', json=body, headers=auth_headers)
+        
+        assert response.status_code == 400
+        assert spend_reads(queries) == []
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,231 @@
+"""
+Unit tests for recurring budget templates.
+Tests the statements generate_template_budgets sends and the template
+routes.
+"""
+import pytest
+import sys
+import os
+from contextlib import contextmanager
+from datetime import date
+from decimal import Decimal
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import Database
+from routes_budgets import MAX_TEMPLATE_ROUNDS, budgets_bp, generate_template_budgets
+
+
+DUE_SELECT = 'SELECT t.template_id, t.user_id'
+
+
+class FakeDatabase:
+    """Answers queries by their leading SQL and records every statement."""
+    
+    def __init__(self):
+        self.rounds = []  # Rows returned by successive due-template SELECTs
+        self.answers = {}
+        self.shared = False
+        self.statements = []
+    
+    @contextmanager
+    def shared_connection(self):
+        self.shared = True
+        try:
+            yield
+        finally:
+            self.shared = False
+    
+    def execute_query(self, query, params=None, fetch_one=False, fetch_all=False, commit=False, **kwargs):
+        sql = ' '.join(query.split())
+        self.statements.append({'sql': sql, 'params': params, 'commit': commit, 'shared': self.shared})
+        if sql.startswith(DUE_SELECT):
+            return self.rounds.pop(0) if self.rounds else []
+        for prefix, answer in self.answers.items():
+            if sql.startswith(prefix):
+                return answer
+        return [] if fetch_all else None if fetch_one else 1
+    
+    def run(self, prefix):
+        return [s for s in self.statements if s['sql'].startswith(prefix)]
+
+
+def due(template_id, carried='0.00', overlaps=0, user_id=7, category_id=10, start=date(2024, 4, 1)):
+    return {
+        'template_id': template_id, 'user_id': user_id, 'category_id': category_id,
+        'amount_limit': Decimal('1000.00'), 'start_date': start,
+        'end_date': date(start.year, start.month + 1, 1) if start.month < 12 else date(start.year, 12, 31),
+        'carried': Decimal(carried), 'overlaps': overlaps,
+    }
+
+
+@pytest.fixture
+def db(monkeypatch):
+    fake = FakeDatabase()
+    monkeypatch.setattr(Database, 'execute_query', staticmethod(fake.execute_query))
+    monkeypatch.setattr(Database, 'shared_connection', staticmethod(fake.shared_connection))
+    monkeypatch.setattr(Database, 'execute_many', staticmethod(lambda query, seq_params: len(seq_params)))
+    return fake
+
+
+class TestGenerateTemplateBudgets:
+    """Tests for the statements of one generation run"""
+    
+    def test_rollover_read_before_insert(self, db):
+        db.rounds = [[due(1, carried='150.00')]]
+        
+        generate_template_budgets(7)
+        
+        select, insert, update, last = db.statements
+        assert select['sql'].startswith(DUE_SELECT) and 'Budget_Spend' in select['sql']
+        # The Budgets insert trigger writes Budget_Spend, so the INSERT must not read it
+        assert insert['sql'].startswith('INSERT INTO Budgets') and 'Budget_Spend' not in insert['sql']
+        assert insert['params'] == (7, 10, Decimal('1150.00'), date(2024, 4, 1), date(2024, 5, 1))
+        assert update['sql'].startswith('UPDATE Budget_Templates')
+        assert last['sql'].startswith(DUE_SELECT)
+    
+    def test_one_previous_budget_per_template(self, db):
+        generate_template_budgets(7)
+        
+        [select] = db.statements
+        assert 'LEFT JOIN Budgets p ON p.budget_id = ( SELECT pb.budget_id' in select['sql']
+        assert 'ORDER BY pb.start_date DESC, pb.budget_id DESC LIMIT 1 )' in select['sql']
+        assert select['sql'].endswith('FOR UPDATE OF t')
+        assert select['params'] == (7,)
+    
+    def test_overlapping_period_skipped_but_advanced(self, db):
+        db.rounds = [[due(1), due(2, overlaps=1, category_id=11), due(3, category_id=12)]]
+        
+        generate_template_budgets(7)
+        
+        [insert] = db.run('INSERT INTO Budgets')
+        assert insert['params'][1::5] == (10, 12)
+        [update] = db.run('UPDATE Budget_Templates')
+        assert update['params'] == (1, 2, 3)
+        assert update['sql'].endswith('WHERE template_id IN (%s, %s, %s)')
+    
+    def test_rounds_commit_on_one_connection(self, db):
+        db.rounds = [[due(1, user_id=7)], [due(1, user_id=7, start=date(2024, 5, 1)), due(4, user_id=8)]]
+        
+        users = generate_template_budgets()
+        
+        assert users == {7, 8}
+        assert len(db.run('INSERT INTO Budgets')) == 2
+        assert all(s['shared'] for s in db.statements)
+        assert [s['commit'] for s in db.statements if s['commit']] == [True, True]
+        assert [s['sql'].startswith('UPDATE') for s in db.statements if s['commit']] == [True, True]
+        # Every user's templates without a user filter
+        assert db.statements[0]['params'] == ()
+    
+    def test_nothing_due(self, db):
+        assert generate_template_budgets(7) == set()
+        assert len(db.statements) == 1
+    
+    def test_rounds_are_bounded(self, db):
+        db.rounds = [[due(1)] for _ in range(MAX_TEMPLATE_ROUNDS + 5)]
+        
+        generate_template_budgets(7)
+        
+        assert len(db.run(DUE_SELECT)) == MAX_TEMPLATE_ROUNDS
+
+
+@pytest.fixture
+def blueprints():
+    return [budgets_bp]
+
+
+class TestTemplateRoutes:
+    """Tests for listing, creating, updating and deleting templates"""
+    
+    def test_list(self, db, client, auth_headers):
+        db.answers['SELECT t.template_id, t.category_id'] = [{
+            'template_id': 1, 'category_id': 10, 'category_name': 'Food',
+            'amount_limit': Decimal('1000.00'), 'period': 'Monthly', 'rollover': 1, 'is_active': 0,
+            'next_start_date': date(2024, 5, 1), 'last_generated_at': None, 'created_at': None,
+        }]
+        
+        response = client.get('/api/budgets/templates', headers=auth_headers)
+        
+        assert response.status_code == 200
+        [template] = response.get_json()
+        assert template['rollover'] is True and template['is_active'] is False
+    
+    @pytest.mark.parametrize('body', [
+        {'amount_limit': 100},
+        {'category_id': 10, 'amount_limit': 100, 'period': 'Weekly'},
+        {'category_id': 10, 'amount_limit': 100, 'start_date': '05/17/2024'},
+    ])
+    def test_create_rejects_invalid(self, db, client, auth_headers, body):
+        response = client.post('/api/budgets/templates', json=body, headers=auth_headers)
+        
+        assert response.status_code == 400
+        assert not db.run('INSERT')
+    
+    def test_create_rejects_second_template(self, db, client, auth_headers):
+        db.answers['SELECT template_id FROM Budget_Templates WHERE user_id'] = {'template_id': 1}
+        
+        response = client.post('/api/budgets/templates', json={'category_id': 10, 'amount_limit': 100},
+                               headers=auth_headers)
+        
+        assert response.status_code == 409
+    
+    def test_create_starts_period_and_generates(self, db, client, auth_headers):
+        db.answers['INSERT INTO Budget_Templates'] = 12
+        
+        response = client.post('/api/budgets/templates', headers=auth_headers, json={
+            'category_id': 10, 'amount_limit': 900, 'period': 'Quarterly',
+            'rollover': True, 'start_date': '2024-05-17'
+        })
+        
+        assert response.status_code == 201
+        assert response.get_json()['template_id'] == 12
+        [insert] = db.run('INSERT INTO Budget_Templates')
+        assert insert['params'] == (7, 10, 900, 'Quarterly', True, date(2024, 4, 1))
+        # The current period is generated at once
+        generated = db.run(DUE_SELECT)
+        assert generated and db.statements.index(generated[0]) > db.statements.index(insert)
+    
+    def test_update_unknown_template(self, db, client, auth_headers):
+        response = client.put('/api/budgets/templates/3', json={'amount_limit': 5}, headers=auth_headers)
+        
+        assert response.status_code == 404
+    
+    def test_update_without_fields(self, db, client, auth_headers):
+        db.answers['SELECT template_id FROM Budget_Templates WHERE template_id'] = {'template_id': 3}
+        
+        response = client.put('/api/budgets/templates/3', json={'period': 'Yearly'}, headers=auth_headers)
+        
+        assert response.status_code == 400
+    
+    def test_reactivation_generates_due_periods(self, db, client, auth_headers):
+        db.answers['SELECT template_id FROM Budget_Templates WHERE template_id'] = {'template_id': 3}
+        db.rounds = [[due(3)]]
+        
+        response = client.put('/api/budgets/templates/3', json={'is_active': True}, headers=auth_headers)
+        
+        assert response.status_code == 200
+        [update, advance] = db.run('UPDATE Budget_Templates')
+        assert update['sql'] == 'UPDATE Budget_Templates SET is_active = %s WHERE template_id = %s'
+        assert update['params'] == (True, 3)
+        assert db.run('INSERT INTO Budgets')
+    
+    def test_delete(self, db, client, auth_headers):
+        db.answers['SELECT template_id FROM Budget_Templates WHERE template_id'] = {'template_id': 3}
+        
+        response = client.delete('/api/budgets/templates/3', headers=auth_headers)
+        
+        assert response.status_code == 200
+        [delete] = db.run('DELETE')
+        assert delete['sql'] == 'DELETE FROM Budget_Templates WHERE template_id = %s'
+        assert delete['params'] == (3,)
+    
+    def test_delete_unknown_template(self, db, client, auth_headers):
+        response = client.delete('/api/budgets/templates/3', headers=auth_headers)
+        
+        assert response.status_code == 404
+        assert not db.run('DELETE')
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,100 @@
+"""
+Unit tests for budget burn rates.
+Tests the daily rate, the end-of-window projection and the exceed date.
+"""
+import pytest
+import sys
+import os
+from datetime import date
+from decimal import Decimal
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+np = pytest.importorskip('numpy')
+
+from performance.burn_rate import add_burn_rates, project_budgets
+
+
+TODAY = date(2024, 3, 10)
+
+
+def project(spent, limit, start=date(2024, 3, 1), end=date(2024, 3, 31)):
+    return project_budgets([spent], [limit], [start], [end], TODAY)[0]
+
+
+class TestProjectBudgets:
+    """Test projecting budgets at their current rate"""
+    
+    def test_rate_and_projected_total(self):
+        projection = project(Decimal('100.00'), Decimal('1000.00'))
+        
+        # 1st to 10th March, today included
+        assert projection['days_elapsed'] == 10
+        assert projection['days_remaining'] == 21
+        assert projection['burn_rate'] == 10.0
+        assert projection['projected_total'] == 310.0
+        assert projection['projected_total_percentage'] == 31.0
+        assert projection['projected_exceed_date'] is None
+    
+    def test_exceed_date_within_window(self):
+        projection = project(500, 1000)
+        
+        # 50 a day, so 500 more is reached after 10 more days
+        assert projection['projected_total'] == 1550.0
+        assert projection['projected_exceed_date'] == '2024-03-20'
+    
+    def test_exceed_date_rounds_up_to_whole_day(self):
+        assert project(500, 1001)['projected_exceed_date'] == '2024-03-21'
+    
+    def test_already_exceeded_has_no_exceed_date(self):
+        projection = project(1200, 1000)
+        
+        assert projection['projected_total_percentage'] > 100
+        assert projection['projected_exceed_date'] is None
+    
+    def test_not_started_and_ended_windows(self):
+        future = project(0, 1000, start=date(2024, 4, 1), end=date(2024, 4, 30))
+        past = project(800, 1000, start=date(2024, 2, 1), end=date(2024, 2, 29))
+        
+        assert future['days_elapsed'] == 0 and future['burn_rate'] == 0.0
+        assert future['days_remaining'] == 30
+        assert past['days_remaining'] == 0
+        assert past['projected_total'] == 800.0
+        assert past['projected_exceed_date'] is None
+    
+    def test_zero_limit(self):
+        projection = project(50, 0)
+        
+        assert projection['projected_total_percentage'] == 0.0
+        assert projection['projected_exceed_date'] is None
+    
+    def test_many_budgets_at_once(self):
+        projections = project_budgets(
+            [10.0 * i for i in range(500)],
+            [1000.0] * 500,
+            [date(2024, 3, 1)] * 500,
+            [date(2024, 3, 31)] * 500,
+            TODAY
+        )
+        
+        assert len(projections) == 500
+        assert projections[0]['burn_rate'] == 0.0
+        assert projections[499]['burn_rate'] == 499.0
+
+
+class TestAddBurnRates:
+    """Test adding projections to budget rows"""
+    
+    def test_rows_are_updated_in_place(self):
+        budgets = [{'budget_id': 1, 'total_spent': 100.0, 'budget_limit': 1000.0,
+                    'start_date': '2024-03-01', 'end_date': '2024-03-31'}]
+        
+        result = add_burn_rates(budgets, TODAY, 'total_spent', 'budget_limit')
+        
+        assert result is budgets
+        assert budgets[0]['budget_id'] == 1
+        assert budgets[0]['burn_rate'] == 10.0
+    
+    def test_no_budgets(self):
+        assert add_burn_rates([], TODAY) == []
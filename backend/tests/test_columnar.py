@@ -0,0 +1,93 @@
+"""
+Unit tests for columnar list responses.
+Tests format negotiation and columnar query results.
+"""
+import pytest
+import sys
+import os
+from contextlib import contextmanager
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+from pymysql.cursors import Cursor
+
+from database import Database
+from performance.columnar import COLUMNAR_MEDIA_TYPE, wants_columnar
+
+
+class FakeCursor:
+    """Tuple cursor returning two fixed rows."""
+    
+    description = (('account_id',), ('balance',))
+    rowcount = 2
+    
+    def __init__(self, cursor_class):
+        self.cursor_class = cursor_class
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        return False
+    
+    def execute(self, query, params):
+        pass
+    
+    def fetchall(self):
+        return ((1, 100), (2, 250))
+
+
+class FakeConnection:
+    """Records the cursor class requested by execute_query."""
+    
+    def __init__(self):
+        self.cursors = []
+    
+    def thread_id(self):
+        return 1
+    
+    def cursor(self, cursor_class=None):
+        self.cursors.append(cursor_class)
+        return FakeCursor(cursor_class)
+
+
+class TestWantsColumnar:
+    """Tests for detecting a columnar request."""
+    
+    @pytest.mark.parametrize('url,headers,expected', [
+        ('/?format=columnar', {}, True),
+        ('/', {}, False),
+        ('/', {'Accept': COLUMNAR_MEDIA_TYPE}, True),
+        ('/', {'Accept': 'application/json'}, False),
+        ('/', {'Accept': f'application/json;q=0.5, {COLUMNAR_MEDIA_TYPE}'}, True),
+    ])
+    def test_negotiation(self, url, headers, expected):
+        """Query parameter and Accept header should both select columnar output."""
+        app = Flask(__name__)
+        with app.test_request_context(url, headers=headers):
+            assert wants_columnar() is expected
+
+
+class TestColumnarQuery:
+    """Tests for reading results into columns."""
+    
+    def test_returns_columns_and_tuples(self, monkeypatch):
+        """Columnar results should come from a tuple cursor with column names once."""
+        conn = FakeConnection()
+        
+        @contextmanager
+        def fake_connection(read_timeout=None):
+            yield conn
+        
+        monkeypatch.setattr(Database, 'get_connection', staticmethod(fake_connection))
+        
+        result = Database.execute_query("SELECT account_id, balance FROM Accounts", fetch_all=True, columnar=True)
+        
+        assert conn.cursors == [Cursor]
+        assert result == {'columns': ['account_id', 'balance'], 'data': ((1, 100), (2, 250))}
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
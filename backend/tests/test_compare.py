@@ -0,0 +1,127 @@
+"""
+Unit tests for the period comparison report.
+Tests period validation, the date ranges compared and the response shape.
+"""
+import pytest
+import sys
+import os
+from datetime import date
+from decimal import Decimal
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import Database
+from performance.data_version import DataVersion
+from performance.response_cache import analytics_cache
+from routes_analytics import MAX_COMPARE_OFFSET, analytics_bp
+
+
+def row(category_id, name, kind, current, previous):
+    return {
+        'category_id': category_id, 'category_name': name, 'type': kind,
+        'current_total': Decimal(current), 'previous_total': Decimal(previous),
+        'current_count': 2, 'previous_count': None,
+    }
+
+
+ROWS = [
+    row(1, 'Salary', 'Income', '3000.00', '3000.00'),
+    row(2, 'Food', 'Expense', '150.00', '100.00'),
+    row(3, 'Rent', 'Expense', '0', '1200.00'),
+]
+
+
+@pytest.fixture
+def queries(monkeypatch):
+    """Record queries and answer the rollup read."""
+    calls = []
+    
+    def fake_execute_query(query, params=None, **kwargs):
+        query = ' '.join(query.split())
+        if 'Daily_Category_Rollups' in query:
+            calls.append((query, params))
+            return ROWS
+        return []
+    
+    monkeypatch.setattr(Database, 'execute_query', staticmethod(fake_execute_query))
+    monkeypatch.setattr(DataVersion, 'get', staticmethod(lambda user_id: 0))
+    analytics_cache.clear()
+    yield calls
+    analytics_cache.clear()
+
+
+@pytest.fixture
+def blueprints():
+    return [analytics_bp]
+
+
+class TestCompareValidation:
+    """Tests for rejecting periods that cannot be compared"""
+    
+    @pytest.mark.parametrize('query', [
+        'period=week', 'period=', 'offset=0', 'offset=-1', 'offset=abc',
+        f'offset={MAX_COMPARE_OFFSET + 1}', 'date=2024-02-30', 'date=03/15/2024',
+    ])
+    def test_bad_periods_rejected(self, queries, client, auth_headers, query):
+        response = client.get(f'/api/analytics/compare?{query}', headers=auth_headers)
+        
+        assert response.status_code == 400
+        assert 'error' in response.get_json()
+        assert queries == []
+
+
+class TestComparePeriods:
+    """Tests for the date ranges compared"""
+    
+    @pytest.mark.parametrize('query, current, previous', [
+        ('period=month&date=2024-03-15',
+         (date(2024, 3, 1), date(2024, 3, 15)), (date(2024, 2, 1), date(2024, 2, 29))),
+        ('period=quarter&offset=4&date=2024-05-10',
+         (date(2024, 4, 1), date(2024, 5, 10)), (date(2023, 4, 1), date(2023, 6, 30))),
+        ('period=year&date=2024-07-01',
+         (date(2024, 1, 1), date(2024, 7, 1)), (date(2023, 1, 1), date(2023, 12, 31))),
+        ('period=month&date=2024-03-15&to_date=true',
+         (date(2024, 3, 1), date(2024, 3, 15)), (date(2024, 2, 1), date(2024, 2, 15))),
+    ])
+    def test_ranges(self, queries, client, auth_headers, query, current, previous):
+        response = client.get(f'/api/analytics/compare?{query}', headers=auth_headers)
+        
+        assert response.status_code == 200
+        body = response.get_json()
+        assert body['current'] == {'start_date': current[0].isoformat(), 'end_date': current[1].isoformat()}
+        assert body['previous'] == {'start_date': previous[0].isoformat(), 'end_date': previous[1].isoformat()}
+        [(_, params)] = queries
+        assert params == (current[0],) * 4 + (7, *current, *previous)
+
+
+class TestCompareResponse:
+    """Tests for the per-category and total changes returned"""
+    
+    def test_shape(self, queries, client, auth_headers):
+        response = client.get('/api/analytics/compare?period=month&offset=2&date=2024-03-15',
+                              headers=auth_headers)
+        
+        body = response.get_json()
+        assert body['period'] == 'month' and body['offset'] == 2
+        assert set(body) == {'period', 'offset', 'current', 'previous', 'categories', 'totals'}
+        # Largest absolute change first
+        assert [c['category_name'] for c in body['categories']] == ['Rent', 'Food', 'Salary']
+        food = body['categories'][1]
+        assert food == {
+            'category_id': 2, 'category_name': 'Food', 'type': 'Expense',
+            'current_count': 2, 'previous_count': 0,
+            'current_total': 150.0, 'previous_total': 100.0, 'change': 50.0, 'change_pct': 50.0,
+        }
+    
+    def test_totals_per_type(self, queries, client, auth_headers):
+        response = client.get('/api/analytics/compare?date=2024-03-15', headers=auth_headers)
+        
+        totals = response.get_json()['totals']
+        assert totals['Income']['change'] == 0.0
+        assert totals['Expense']['current_total'] == 150.0
+        assert totals['Expense']['previous_total'] == 1300.0
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,96 @@
+"""
+Unit tests for response compression.
+Tests encoding negotiation, the size threshold and streamed responses.
+"""
+import pytest
+import sys
+import os
+import gzip
+import zlib
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask, Response, jsonify
+
+from performance.compression import BROTLI_AVAILABLE, init_compression
+
+
+@pytest.fixture
+def client():
+    app = Flask(__name__)
+    app.config['COMPRESS_MIN_SIZE'] = 500
+    init_compression(app)
+    
+    @app.route('/large')
+    def large():
+        return jsonify([{'transaction_id': i, 'description': 'Groceries'} for i in range(200)])
+    
+    @app.route('/small')
+    def small():
+        return jsonify({'ok': True})
+    
+    @app.route('/export')
+    def export():
+        def rows():
+            yield 'id,amount\n'
+            for i in range(100):
+                yield f'{i},1000\n'
+        return Response(rows(), mimetype='text/csv')
+    
+    return app.test_client()
+
+
+class TestCompression:
+    """Tests for compressing responses."""
+    
+    def test_large_json_gzipped(self, client):
+        """Large responses should be gzipped when the client accepts it."""
+        response = client.get('/large', headers={'Accept-Encoding': 'gzip'})
+        
+        assert response.headers['Content-Encoding'] == 'gzip'
+        assert 'Accept-Encoding' in response.headers['Vary']
+        body = gzip.decompress(response.get_data())
+        assert body.startswith(b'[{"')
+        assert len(response.get_data()) < len(body)
+    
+    def test_small_response_not_compressed(self, client):
+        """Responses under the threshold should be sent as they are."""
+        response = client.get('/small', headers={'Accept-Encoding': 'gzip'})
+        assert 'Content-Encoding' not in response.headers
+    
+    def test_no_accept_encoding(self, client):
+        """Clients that do not accept compression should get plain bodies."""
+        response = client.get('/large')
+        
+        assert 'Content-Encoding' not in response.headers
+        assert response.get_json()[0]['transaction_id'] == 0
+    
+    def test_streamed_response_compressed_per_chunk(self, client):
+        """Streamed exports should be compressed on the fly."""
+        response = client.get('/export', headers={'Accept-Encoding': 'gzip'}, buffered=False)
+        
+        assert response.headers['Content-Encoding'] == 'gzip'
+        assert 'Content-Length' not in response.headers
+        
+        decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        chunks = list(response.response)
+        first = decompressor.decompress(chunks[0])
+        assert first == b'id,amount\n'
+        
+        body = first + b''.join(decompressor.decompress(c) for c in chunks[1:])
+        assert body.count(b'\n') == 101
+    
+    @pytest.mark.skipif(not BROTLI_AVAILABLE, reason='brotli not installed')
+    def test_brotli_preferred(self, client):
+        """Brotli should be used when both encodings are accepted."""
+        import brotli
+        
+        response = client.get('/large', headers={'Accept-Encoding': 'gzip, br'})
+        
+        assert response.headers['Content-Encoding'] == 'br'
+        assert brotli.decompress(response.get_data()).startswith(b'[{"')
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,132 @@
+"""
+Unit tests for data versions and conditional GET.
+Tests ETag generation, 304 responses and version bumps on writes.
+"""
+import pytest
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask, Blueprint, jsonify, request
+
+from performance.data_version import DataVersion, conditional_get, read_only, track_writes
+
+
+@pytest.fixture
+def versions(monkeypatch):
+    """Keep data versions in memory instead of MySQL."""
+    store = {}
+    
+    def fake_get(user_id):
+        return store.get(user_id, 0)
+    
+    def fake_execute_many(query, seq_params):
+        for (user_id,) in seq_params:
+            store[user_id] = store.get(user_id, 0) + 1
+        return len(seq_params)
+    
+    from database import Database
+    monkeypatch.setattr(DataVersion, 'get', staticmethod(fake_get))
+    monkeypatch.setattr(Database, 'execute_many', staticmethod(fake_execute_many))
+    return store
+
+
+@pytest.fixture
+def app(versions):
+    app = Flask(__name__)
+    app.config['TESTING'] = True
+    app.view_calls = 0
+    bp = Blueprint('items', __name__, url_prefix='/api/items')
+    track_writes(bp)
+    
+    @bp.before_request
+    def fake_auth():
+        request.user_id = int(request.headers.get('X-User', 1))
+    
+    @bp.route('/', methods=['GET'])
+    @conditional_get
+    def list_items():
+        app.view_calls += 1
+        return jsonify({'items': []}), 200
+    
+    @bp.route('/', methods=['POST'])
+    def create_item():
+        if request.args.get('fail'):
+            return jsonify({'error': 'Invalid item'}), 400
+        return jsonify({'message': 'created'}), 201
+    
+    @bp.route('/search', methods=['POST'])
+    @read_only
+    def search_items():
+        return jsonify({'items': []}), 200
+    
+    app.register_blueprint(bp)
+    return app
+
+
+class TestConditionalGet:
+    """Tests for answering If-None-Match."""
+    
+    def test_matching_etag_skips_view(self, app):
+        """A current ETag should get a 304 without running the view."""
+        client = app.test_client()
+        first = client.get('/api/items/')
+        etag = first.headers['ETag']
+        
+        second = client.get('/api/items/', headers={'If-None-Match': etag})
+        
+        assert first.status_code == 200
+        assert second.status_code == 304
+        assert second.headers['ETag'] == etag
+        assert app.view_calls == 1
+    
+    def test_write_changes_etag(self, app):
+        """A successful write should invalidate earlier ETags."""
+        client = app.test_client()
+        etag = client.get('/api/items/').headers['ETag']
+        
+        assert client.post('/api/items/').status_code == 201
+        
+        response = client.get('/api/items/', headers={'If-None-Match': etag})
+        assert response.status_code == 200
+        assert response.headers['ETag'] != etag
+    
+    def test_failed_write_keeps_version(self, app, versions):
+        """Rejected writes should not bump the version."""
+        client = app.test_client()
+        client.post('/api/items/?fail=1')
+        assert versions == {}
+    
+    def test_read_only_post_keeps_version(self, app, versions):
+        """POST views marked read-only should not bump the version."""
+        client = app.test_client()
+        assert client.post('/api/items/search').status_code == 200
+        assert versions == {}
+    
+    def test_etag_differs_by_user_and_url(self, app):
+        """Different users and filters should never share an ETag."""
+        client = app.test_client()
+        tags = {
+            client.get('/api/items/').headers['ETag'],
+            client.get('/api/items/?limit=5').headers['ETag'],
+            client.get('/api/items/', headers={'X-User': '2'}).headers['ETag'],
+        }
+        assert len(tags) == 3
+    
+    def test_listeners_notified(self, versions):
+        """Listeners should receive the bumped user ids."""
+        seen = []
+        DataVersion.add_listener(seen.append)
+        try:
+            DataVersion.bump([3, 3, 4])
+        finally:
+            DataVersion._listeners.remove(seen.append)
+        
+        assert seen == [[3, 4]]
+        assert versions == {3: 1, 4: 1}
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
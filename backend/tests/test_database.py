@@ -0,0 +1,308 @@
+"""
+Unit tests for database statement time limits and parallel reads.
+Tests timeout resolution, SELECT hints, timeout error translation and
+Database.run_parallel.
+"""
+import pytest
+import pymysql
+import sys
+import os
+import time
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import Config
+from database import Database, QueryTimeoutError
+
+
+class FakeConnection:
+    """Stands in for a PyMySQL connection inside _statement_guard."""
+    
+    def thread_id(self):
+        return 42
+
+
+class TestExecutionTimeHint:
+    """Tests for adding MAX_EXECUTION_TIME to SELECT statements."""
+    
+    def test_hint_added_to_select(self):
+        """SELECT statements should get the optimizer hint in milliseconds."""
+        query = Database.add_execution_time_hint("\n  SELECT * FROM Accounts WHERE user_id = %s", 2.5)
+        assert query.startswith('SELECT /*+ MAX_EXECUTION_TIME(2500) */ * FROM Accounts')
+    
+    def test_other_statements_unchanged(self):
+        """Writes and procedure calls cannot take the hint."""
+        for query in ("INSERT INTO Accounts VALUES (%s)", "CALL SP_Check_Budget_Alert(%s)"):
+            assert Database.add_execution_time_hint(query, 5) == query
+    
+    def test_no_hint_without_timeout(self):
+        """A disabled timeout should leave the query alone."""
+        assert Database.add_execution_time_hint("SELECT 1", None) == "SELECT 1"
+    
+    def test_existing_hint_kept(self):
+        """A query that already sets its own limit should not get a second hint."""
+        query = "SELECT /*+ MAX_EXECUTION_TIME(100) */ 1"
+        assert Database.add_execution_time_hint(query, 5) == query
+
+
+class TestResolveTimeout:
+    """Tests for choosing the timeout of a call."""
+    
+    def test_explicit_timeout_wins(self):
+        """A per-call timeout should override every default."""
+        assert Database.resolve_timeout(3) == 3
+    
+    def test_zero_disables(self):
+        """A timeout of 0 should mean no limit."""
+        assert Database.resolve_timeout(0) is None
+    
+    def test_default_outside_request(self):
+        """Outside a request the global default should apply."""
+        assert Database.resolve_timeout() == Config.QUERY_TIMEOUT_SECONDS
+    
+    def test_blueprint_override(self, monkeypatch):
+        """Requests in a blueprint with its own limit should use it."""
+        from flask import Flask, Blueprint
+        
+        monkeypatch.setattr(Config, 'BLUEPRINT_QUERY_TIMEOUTS', {'reports': 4})
+        
+        app = Flask(__name__)
+        bp = Blueprint('reports', __name__)
+        seen = {}
+        
+        @bp.route('/report')
+        def report():
+            seen['timeout'] = Database.resolve_timeout()
+            return 'ok'
+        
+        app.register_blueprint(bp)
+        app.test_client().get('/report')
+        
+        assert seen['timeout'] == 4
+
+
+class TestStatementGuard:
+    """Tests for translating timeout errors."""
+    
+    def test_server_timeout_raises_query_timeout(self):
+        """MySQL's max execution time error should become QueryTimeoutError."""
+        with pytest.raises(QueryTimeoutError):
+            with Database._statement_guard(FakeConnection(), 5):
+                raise pymysql.err.OperationalError(3024, 'maximum statement execution time exceeded')
+    
+    def test_client_timeout_kills_server_query(self, monkeypatch):
+        """A client read timeout should kill the statement still running on the server."""
+        killed = []
+        monkeypatch.setattr(Database, 'kill_query', staticmethod(lambda thread_id: killed.append(thread_id)))
+        
+        with pytest.raises(QueryTimeoutError):
+            with Database._statement_guard(FakeConnection(), 5):
+                raise pymysql.err.OperationalError(2013, 'Lost connection to MySQL server during query (timed out)')
+        
+        assert killed == [42]
+    
+    def test_other_errors_pass_through(self):
+        """Unrelated database errors should not be reported as timeouts."""
+        with pytest.raises(pymysql.err.OperationalError) as exc_info:
+            with Database._statement_guard(FakeConnection(), 5):
+                raise pymysql.err.OperationalError(1045, 'Access denied')
+        
+        assert not isinstance(exc_info.value, QueryTimeoutError)
+    
+    def test_tracks_running_statement_for_request(self, monkeypatch):
+        """Statements should be registered for the request while they run."""
+        from flask import Flask
+        
+        app = Flask(__name__)
+        killed = []
+        monkeypatch.setattr(Database, 'kill_query', staticmethod(lambda thread_id: killed.append(thread_id) or True))
+        
+        with app.test_request_context('/'):
+            with Database._statement_guard(FakeConnection(), 5):
+                assert Database.cancel_request_queries() == 1
+        
+        assert killed == [42]
+    
+    def test_kill_uses_its_own_connection(self, monkeypatch):
+        """Inside shared_connection() the KILL must not go out on the busy shared connection."""
+        opened = []
+        
+        class RecordingCursor:
+            def __init__(self, statements):
+                self.statements = statements
+            
+            def __enter__(self):
+                return self
+            
+            def __exit__(self, *exc):
+                return False
+            
+            def execute(self, query, params=()):
+                self.statements.append((query, params))
+        
+        class RecordingConnection(FakeConnection):
+            open = True
+            
+            def __init__(self):
+                self.statements = []
+                opened.append(self)
+            
+            def cursor(self, cursor_class=None):
+                return RecordingCursor(self.statements)
+            
+            def close(self):
+                self.open = False
+        
+        monkeypatch.setattr(Database, '_connect', staticmethod(lambda read_timeout=None: RecordingConnection()))
+        
+        with Database.shared_connection():
+            with Database.get_connection() as shared:
+                assert Database.kill_query(42)
+            with Database.get_connection() as still_shared:
+                assert still_shared is shared
+        
+        [killer] = [c for c in opened if c is not shared]
+        assert killer.statements == [("KILL QUERY %s", (42,))]
+        assert shared.statements == []
+        assert not killer.open
+    
+    def test_interrupted_statement_is_killed(self, monkeypatch):
+        """A request aborted mid-statement should not leave it running."""
+        killed = []
+        monkeypatch.setattr(Database, 'kill_query', staticmethod(lambda thread_id: killed.append(thread_id)))
+        
+        with pytest.raises(SystemExit):
+            with Database._statement_guard(FakeConnection(), 5):
+                raise SystemExit(1)
+        
+        assert killed == [42]
+
+
+class TestRequestAbort:
+    """Tests for aborting timed-out requests through the whole app."""
+    
+    class TimingOutCursor:
+        def __init__(self, *args):
+            pass
+        
+        def __enter__(self):
+            return self
+        
+        def __exit__(self, *exc):
+            return False
+        
+        def execute(self, query, params=()):
+            raise pymysql.err.OperationalError(2013, 'Lost connection to MySQL server during query (timed out)')
+    
+    class TimingOutConnection(FakeConnection):
+        open = True
+        
+        def cursor(self, cursor_class=None):
+            return TestRequestAbort.TimingOutCursor()
+        
+        def rollback(self):
+            pass
+        
+        def close(self):
+            self.open = False
+    
+    @pytest.fixture
+    def client(self, monkeypatch):
+        monkeypatch.setenv('JWT_SECRET_KEY', 'a' * 64)
+        import importlib
+        import app as app_module
+        importlib.reload(app_module)
+        
+        monkeypatch.setattr(Database, '_connect',
+                            staticmethod(lambda read_timeout=None: self.TimingOutConnection()))
+        return app_module.create_app('development').test_client()
+    
+    def test_timed_out_statement_is_killed_and_reported(self, client, auth_headers, monkeypatch):
+        """A route outside analytics should answer a timeout with 504 after killing the query."""
+        killed = []
+        monkeypatch.setattr(Database, 'kill_query', staticmethod(lambda thread_id: killed.append(thread_id) or True))
+        
+        response = client.get('/api/accounts/', headers=auth_headers)
+        
+        assert response.status_code == 504
+        assert response.get_json()['code'] == 'QUERY_TIMEOUT'
+        assert killed and set(killed) == {42}
+    
+    def test_abandoned_parallel_calls_are_killed(self, monkeypatch):
+        """Calls still running at the run_parallel deadline should be killed."""
+        import database
+        from flask import Flask
+        
+        monkeypatch.setattr(database, 'CLIENT_TIMEOUT_GRACE_SECONDS', 0)
+        killed = []
+        monkeypatch.setattr(Database, 'kill_query', staticmethod(lambda thread_id: killed.append(thread_id) or True))
+        
+        def slow_query(query, timeout=None, **kwargs):
+            with Database._statement_guard(FakeConnection(), timeout):
+                time.sleep(0.5)
+        
+        monkeypatch.setattr(Database, 'execute_query', staticmethod(slow_query))
+        
+        with Flask(__name__).test_request_context('/'):
+            with pytest.raises(QueryTimeoutError):
+                Database.run_parallel([{'query': 'slow'}], deadline=0.1)
+        
+        assert killed == [42]
+
+
+class TestRunParallel:
+    """Tests for running independent reads concurrently."""
+    
+    @pytest.fixture
+    def slow_queries(self, monkeypatch):
+        calls = []
+        
+        def fake_execute_query(query, params=None, timeout=None, **kwargs):
+            calls.append({'query': query, 'timeout': timeout})
+            time.sleep(params[0])
+            return query
+        
+        monkeypatch.setattr(Database, 'execute_query', staticmethod(fake_execute_query))
+        return calls
+    
+    def test_results_in_call_order(self, slow_queries):
+        """Results should follow the order of the calls, not completion."""
+        results = Database.run_parallel([
+            {'query': 'slow', 'params': (0.2,)},
+            {'query': 'fast', 'params': (0.01,)},
+        ])
+        assert results == ['slow', 'fast']
+    
+    def test_latency_is_slowest_query(self, slow_queries):
+        """Total time should be close to the slowest call, not the sum."""
+        started = time.perf_counter()
+        Database.run_parallel([{'query': f'q{i}', 'params': (0.2,)} for i in range(3)], deadline=5)
+        assert time.perf_counter() - started < 0.5
+    
+    def test_calls_limited_by_remaining_deadline(self, slow_queries):
+        """Each call should get at most the time left before the deadline."""
+        Database.run_parallel([{'query': 'q', 'params': (0,), 'timeout': 60}], deadline=3)
+        assert 0 < slow_queries[0]['timeout'] <= 3
+    
+    def test_deadline_exceeded(self, slow_queries, monkeypatch):
+        """Calls still running at the deadline should raise QueryTimeoutError."""
+        import database
+        monkeypatch.setattr(database, 'CLIENT_TIMEOUT_GRACE_SECONDS', 0)
+        
+        with pytest.raises(QueryTimeoutError):
+            Database.run_parallel([{'query': 'slow', 'params': (0.5,)}], deadline=0.1)
+    
+    def test_errors_propagate(self, monkeypatch):
+        """An error in one call should be raised to the caller."""
+        def failing(query, **kwargs):
+            raise pymysql.err.ProgrammingError(1064, 'syntax error')
+        
+        monkeypatch.setattr(Database, 'execute_query', staticmethod(failing))
+        
+        with pytest.raises(pymysql.err.ProgrammingError):
+            Database.run_parallel([{'query': 'SELECT'}])
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,110 @@
+"""
+Unit tests for the cash-flow forecast.
+Tests schedule expansion, balance projection and the forecast response.
+"""
+import pytest
+import sys
+import os
+from datetime import date
+from decimal import Decimal
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+np = pytest.importorskip('numpy')
+
+from performance.forecast import build_forecast, expand_occurrences, project_balances
+
+
+def occurrences(next_due, frequency, last_day):
+    index, dates = expand_occurrences([next_due], [frequency], np.datetime64(last_day, 'D'))
+    return dates.astype(str).tolist()
+
+
+class TestExpandOccurrences:
+    """Test expanding recurring schedules"""
+    
+    def test_daily_and_weekly(self):
+        assert occurrences(date(2024, 3, 1), 'Daily', date(2024, 3, 3)) == ['2024-03-01', '2024-03-02', '2024-03-03']
+        assert occurrences(date(2024, 3, 1), 'Weekly', date(2024, 3, 20)) == ['2024-03-01', '2024-03-08', '2024-03-15']
+    
+    def test_monthly_keeps_day_and_clamps_short_months(self):
+        assert occurrences(date(2024, 1, 31), 'Monthly', date(2024, 4, 30)) == [
+            '2024-01-31', '2024-02-29', '2024-03-31', '2024-04-30'
+        ]
+    
+    def test_monthly_stops_at_last_day(self):
+        assert occurrences(date(2024, 1, 15), 'Monthly', date(2024, 3, 14)) == ['2024-01-15', '2024-02-15']
+    
+    def test_yearly(self):
+        assert occurrences(date(2024, 2, 29), 'Yearly', date(2026, 12, 31)) == [
+            '2024-02-29', '2025-02-28', '2026-02-28'
+        ]
+    
+    def test_due_after_horizon(self):
+        assert occurrences(date(2025, 1, 1), 'Daily', date(2024, 12, 31)) == []
+    
+    def test_many_payments_at_once(self):
+        index, dates = expand_occurrences(
+            [date(2024, 1, 1)] * 300 + [date(2024, 1, 5)] * 300,
+            ['Monthly'] * 300 + ['Weekly'] * 300,
+            np.datetime64('2024-12-31')
+        )
+        
+        assert np.bincount(index).tolist() == [12] * 300 + [52] * 300
+        assert len(dates) == 300 * 12 + 300 * 52
+    
+    def test_no_payments(self):
+        index, dates = expand_occurrences([], [], np.datetime64('2024-12-31'))
+        
+        assert len(index) == 0 and len(dates) == 0
+
+
+class TestProjectBalances:
+    """Test daily balance projection"""
+    
+    def test_events_and_daily_changes(self):
+        balances = project_balances(
+            start_balances=[100.0, 50.0],
+            event_accounts=[0, 1, 0],
+            event_offsets=[1, 0, 1],
+            event_amounts=[-30.0, 20.0, 10.0],
+            daily_changes=[-1.0, 0.0],
+            days=3
+        )
+        
+        assert balances.tolist() == [[99.0, 78.0, 77.0], [70.0, 70.0, 70.0]]
+
+
+class TestBuildForecast:
+    """Test the forecast response"""
+    
+    def test_forecast(self):
+        forecast = build_forecast(
+            accounts=[
+                {'account_id': 1, 'account_name': 'Bank', 'balance': Decimal('1000.00')},
+                {'account_id': 2, 'account_name': 'Cash', 'balance': Decimal('50.00')},
+            ],
+            recurring=[
+                {'account_id': 1, 'frequency': 'Monthly', 'next_due_date': date(2024, 3, 2),
+                 'signed_amount': Decimal('-200.00')},
+                # Overdue, so it is counted on the first day
+                {'account_id': 2, 'frequency': 'Weekly', 'next_due_date': date(2024, 2, 28),
+                 'signed_amount': Decimal('10.00')},
+            ],
+            discretionary=[
+                {'account_id': 1, 'category_id': 1, 'category_name': 'Food & Beverage',
+                 'daily_average': Decimal('5.00')},
+            ],
+            first_day=date(2024, 3, 1),
+            days=3
+        )
+        
+        assert forecast['dates'] == ['2024-03-01', '2024-03-02', '2024-03-03']
+        bank, cash = forecast['accounts']
+        assert bank['daily_balances'] == [995.0, 790.0, 785.0]
+        assert bank['lowest_balance'] == 785.0
+        assert cash['daily_balances'] == [60.0, 60.0, 60.0]
+        assert forecast['total_daily_balances'] == [1055.0, 850.0, 845.0]
+        assert forecast['recurring'] == {'occurrences': 2, 'income': 10.0, 'expense': 200.0}
+        assert forecast['discretionary'][0]['daily_average'] == 5.0
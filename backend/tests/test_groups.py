@@ -0,0 +1,148 @@
+"""
+Unit tests for group routes.
+Tests deleting a group and the reads served from Group_Member_Balances.
+"""
+import pytest
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import Database
+from routes_groups import groups_bp
+
+
+class FakeDatabase:
+    """Answers queries by their leading SQL and records every statement."""
+    
+    def __init__(self, answers):
+        self.answers = answers
+        self.statements = []
+    
+    def execute_query(self, query, params=None, fetch_one=False, fetch_all=False, commit=False, **kwargs):
+        sql = ' '.join(query.split())
+        self.statements.append((sql, params, commit))
+        for prefix, answer in self.answers.items():
+            if sql.startswith(prefix):
+                return answer
+        return [] if fetch_all else None if fetch_one else 1
+
+
+@pytest.fixture
+def blueprints():
+    return [groups_bp]
+
+
+@pytest.fixture
+def db(monkeypatch):
+    fake = FakeDatabase({
+        'SELECT created_by FROM `Groups`': {'created_by': 7},
+        'SELECT user_id FROM User_Groups WHERE group_id = %s AND user_id': {'user_id': 7},
+        'SELECT user_id FROM User_Groups': [{'user_id': 7}, {'user_id': 8}],
+    })
+    monkeypatch.setattr(Database, 'execute_query', staticmethod(fake.execute_query))
+    monkeypatch.setattr(Database, 'execute_many', staticmethod(lambda query, seq_params: len(seq_params)))
+    return fake
+
+
+class TestDeleteGroup:
+    """Tests for deleting a group"""
+    
+    def test_transactions_unlinked_first_in_one_transaction(self, db, client, auth_headers):
+        response = client.delete('/api/groups/5', headers=auth_headers)
+        
+        assert response.status_code == 200
+        writes = [(sql, params, commit) for sql, params, commit in db.statements
+                  if sql.startswith(('UPDATE', 'DELETE'))]
+        assert writes == [
+            ('UPDATE Transactions SET group_id = NULL WHERE group_id = %s', (5,), False),
+            ('DELETE FROM `Groups` WHERE group_id = %s', (5,), True),
+        ]
+    
+    def test_only_creator_may_delete(self, db, client, auth_headers):
+        db.answers['SELECT created_by FROM `Groups`'] = {'created_by': 8}
+        
+        response = client.delete('/api/groups/5', headers=auth_headers)
+        
+        assert response.status_code == 403
+        assert not [sql for sql, _, _ in db.statements if sql.startswith(('UPDATE', 'DELETE'))]
+
+
+def balance(user_id, txn_count, expenses, contributions, is_member=1):
+    return {
+        'user_id': user_id, 'username': f'user{user_id}', 'email': f'user{user_id}@example.com',
+        'is_member': is_member, 'transaction_count': txn_count,
+        'total_expenses': expenses, 'total_contributions': contributions,
+        'net_spending': expenses - contributions,
+    }
+
+
+class TestGroupBalanceReads:
+    """Tests for the group reads served from Group_Member_Balances"""
+    
+    def test_list_reads_balances(self, db, client, auth_headers):
+        db.answers['SELECT g.group_id'] = [
+            {'group_id': 5, 'group_name': 'Flat', 'created_at': None, 'created_by': 7,
+             'creator_name': 'tester', 'member_count': 2, 'total_spent': 400.0},
+            {'group_id': 6, 'group_name': 'Trip', 'created_at': None, 'created_by': 8,
+             'creator_name': 'other', 'member_count': 3, 'total_spent': 0},
+        ]
+        
+        response = client.get('/api/groups/', headers=auth_headers)
+        
+        assert response.status_code == 200
+        assert [g['is_creator'] for g in response.get_json()] == [True, False]
+        [(sql, params, _)] = db.statements
+        assert 'LEFT JOIN Group_Member_Balances b ON g.group_id = b.group_id' in sql
+        assert 'COUNT(CASE WHEN b.is_member THEN 1 END) as member_count' in sql
+        assert 'Transactions' not in sql
+        assert params == (7,)
+    
+    def test_expense_summary(self, db, client, auth_headers):
+        db.answers['SELECT b.user_id'] = [
+            balance(7, 2, 300.0, 0.0),
+            balance(8, 1, 90.0, 30.0),
+            balance(9, 1, 60.0, 0.0, is_member=0),  # Left the group, keeps their totals
+            balance(10, 0, 0.0, 0.0),  # No transactions, so not summarised
+        ]
+        
+        response = client.get('/api/groups/5/expense-summary', headers=auth_headers)
+        
+        assert response.status_code == 200
+        body = response.get_json()
+        assert body['group_id'] == 5
+        assert [m['user_id'] for m in body['members']] == [7, 8, 9]
+        # Shares are split between the three current members
+        first = body['members'][0]
+        assert first['fair_share'] == 100.0 and first['balance_owed'] == 200.0
+        assert body['members'][1]['net_spending'] == 60.0
+        assert body['group_total'] == {
+            'total_expenses': 450.0, 'total_contributions': 30.0,
+            'member_count': 3, 'average_per_member': 150.0,
+        }
+        sql, params, _ = db.statements[-1]
+        assert sql.startswith('SELECT b.user_id') and 'FROM Group_Member_Balances b' in sql
+        assert 'Transactions' not in sql
+        assert params == (5,)
+    
+    def test_expense_summary_of_empty_group(self, db, client, auth_headers):
+        response = client.get('/api/groups/5/expense-summary', headers=auth_headers)
+        
+        assert response.status_code == 200
+        assert response.get_json()['group_total'] == {
+            'total_expenses': 0, 'total_contributions': 0, 'member_count': 0, 'average_per_member': 0,
+        }
+    
+    @pytest.mark.parametrize('path', ['/api/groups/5', '/api/groups/5/expense-summary'])
+    def test_only_members_may_read(self, db, client, auth_headers, path):
+        db.answers['SELECT user_id FROM User_Groups WHERE group_id = %s AND user_id'] = None
+        
+        response = client.get(path, headers=auth_headers)
+        
+        assert response.status_code == 403
+        assert not [sql for sql, _, _ in db.statements if 'Group_Member_Balances' in sql]
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,206 @@
+"""
+Unit tests for the columnar transaction history.
+Tests array loading, the statistics and the per-version cache.
+"""
+import pytest
+import sys
+import os
+from datetime import date, datetime
+from decimal import Decimal
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+np = pytest.importorskip('numpy')
+
+from performance.data_version import DataVersion
+from performance import history as history_module
+from performance.history import HistoryCache, UserHistory, day_number
+
+
+TODAY = date(2024, 3, 31)
+
+
+def row(transaction_id, day, amount, category_id=1, expense=True):
+    names = {1: 'Food & Beverage', 2: 'Transportation', 9: 'Salary'}
+    return (transaction_id, datetime.combine(day, datetime.min.time()), Decimal(amount),
+            category_id, names[category_id], 1 if expense else 0)
+
+
+@pytest.fixture
+def history():
+    return UserHistory.from_rows([
+        row(1, date(2024, 3, 25), '10.00'),
+        row(2, date(2024, 3, 25), '20.50', category_id=2),
+        row(3, date(2024, 3, 27), '30.00'),
+        row(4, date(2024, 3, 31), '40.00'),
+        row(5, date(2024, 3, 31), '5000.00', category_id=9, expense=False),
+    ])
+
+
+class TestFromRows:
+    """Test loading rows into arrays"""
+    
+    def test_compact_dtypes(self, history):
+        assert history.days.dtype == np.int64
+        assert history.amounts.dtype == np.int64
+        assert history.codes.dtype == np.int16
+    
+    def test_amounts_in_minor_units(self, history):
+        assert history.amounts.tolist() == [1000, 2050, 3000, 4000, 500000]
+    
+    def test_categories_stored_once(self, history):
+        assert history.category_ids.tolist() == [1, 2, 9]
+        assert history.category_names == ['Food & Beverage', 'Transportation', 'Salary']
+        assert history.codes.tolist() == [0, 1, 0, 0, 2]
+    
+    def test_empty_history(self):
+        empty = UserHistory.from_rows([])
+        
+        assert len(empty) == 0
+        assert empty.percentiles([50]) == []
+        assert empty.zscores(2.0) == []
+
+
+class TestStatistics:
+    """Test the vectorized statistics"""
+    
+    def test_rolling_average(self, history):
+        series = history.rolling_average(window=3, days=3, today=day_number(TODAY))
+        
+        assert [p['date'] for p in series] == ['2024-03-29', '2024-03-30', '2024-03-31']
+        assert [p['total'] for p in series] == [0.0, 0.0, 40.0]
+        # Window for 2024-03-29 covers the 27th to the 29th
+        assert series[0]['average'] == 10.0
+        assert series[2]['average'] == round(40 / 3, 2)
+    
+    def test_percentiles_match_numpy(self, history):
+        result = {c['category_id']: c for c in history.percentiles([0, 50, 90])}
+        food = np.array([10.0, 30.0, 40.0])
+        
+        assert set(result) == {1, 2}
+        assert result[1]['transaction_count'] == 3
+        assert result[1]['percentiles']['p50'] == np.percentile(food, 50)
+        assert result[1]['percentiles']['p90'] == round(np.percentile(food, 90), 2)
+        assert result[2]['percentiles'] == {'p0': 20.5, 'p50': 20.5, 'p90': 20.5}
+    
+    def test_percentiles_since(self, history):
+        result = history.percentiles([50], since=day_number(date(2024, 3, 26)))
+        
+        assert result == [{'category_id': 1, 'category_name': 'Food & Beverage',
+                           'transaction_count': 2, 'percentiles': {'p50': 35.0}}]
+    
+    def test_weekday_profile(self, history):
+        profile = {d['weekday']: d for d in history.weekday_profile()}
+        
+        # 2024-03-25 was a Monday, 2024-03-31 a Sunday
+        assert profile['Monday']['total'] == 30.5
+        assert profile['Monday']['transaction_count'] == 2
+        assert profile['Wednesday']['total'] == 30.0
+        assert profile['Sunday']['total'] == 40.0
+        assert profile['Tuesday']['average'] == 0.0
+    
+    def test_zscores(self):
+        rows = [row(i, date(2024, 3, 1 + i), '10.00') for i in range(1, 10)]
+        rows.append(row(10, date(2024, 3, 20), '100.00'))
+        history = UserHistory.from_rows(rows)
+        
+        outliers = history.zscores(threshold=2.0)
+        
+        assert [t['transaction_id'] for t in outliers] == [10]
+        assert outliers[0]['z_score'] == 3.0
+        assert outliers[0]['category_mean'] == 19.0
+    
+    def test_zscores_since(self):
+        rows = [row(i, date(2024, 3, 1 + i), '10.00') for i in range(1, 10)]
+        rows.append(row(10, date(2024, 3, 2), '100.00'))
+        history = UserHistory.from_rows(rows)
+        
+        assert history.zscores(threshold=2.0, since=day_number(date(2024, 3, 5))) == []
+
+
+class TestHistoryCache:
+    """Test caching histories by data version"""
+    
+    def test_version_mismatch_is_a_miss(self, history):
+        cache = HistoryCache(max_users=2)
+        cache.put(1, 5, history)
+        
+        assert cache.get(1, 5) is history
+        assert cache.get(1, 6) is None
+    
+    def test_least_recently_used_user_is_evicted(self, history):
+        cache = HistoryCache(max_users=2)
+        cache.put(1, 0, history)
+        cache.put(2, 0, history)
+        cache.get(1, 0)
+        cache.put(3, 0, history)
+        
+        assert cache.get(2, 0) is None
+        assert cache.get(1, 0) is history
+    
+    def test_get_history_reloads_after_write(self, monkeypatch, history):
+        versions = {1: 0}
+        loads = []
+        monkeypatch.setattr(DataVersion, 'get', staticmethod(lambda user_id: versions[user_id]))
+        monkeypatch.setattr(history_module, 'load_history', lambda user_id: loads.append(user_id) or history)
+        history_module.history_cache.clear()
+        
+        history_module.get_history(1)
+        history_module.get_history(1)
+        versions[1] = 1
+        history_module.get_history(1)
+        
+        assert loads == [1, 1]
+        history_module.history_cache.clear()
+
+
+class TestStatsRoutes:
+    """Tests for the /stats endpoints"""
+    
+    @pytest.fixture
+    def blueprints(self):
+        from routes_analytics import analytics_bp
+        return [analytics_bp]
+    
+    @pytest.fixture
+    def loads(self, monkeypatch, history):
+        from performance.response_cache import analytics_cache
+        from security.query_budget import QueryCostBudget
+        import routes_analytics
+        
+        loads = []
+        monkeypatch.setattr(DataVersion, 'get', staticmethod(lambda user_id: 0))
+        monkeypatch.setattr(routes_analytics, 'get_history', lambda user_id: loads.append(user_id) or history)
+        monkeypatch.setattr(QueryCostBudget, '_buckets', {})
+        monkeypatch.setattr(QueryCostBudget, '_row_stats', {7: {'rows': 5, 'history_days': 7, 'fetched': float('inf')}})
+        analytics_cache.clear()
+        yield loads
+        analytics_cache.clear()
+    
+    @pytest.mark.parametrize('path', ['/stats/rolling-average', '/stats/percentiles',
+                                      '/stats/day-of-week', '/stats/zscores'])
+    def test_responses_are_cached(self, loads, client, auth_headers, path):
+        first = client.get(f'/api/analytics{path}?days=30', headers=auth_headers)
+        second = client.get(f'/api/analytics{path}?days=30', headers=auth_headers)
+        
+        assert first.status_code == second.status_code == 200
+        assert (first.headers['X-Cache'], second.headers['X-Cache']) == ('MISS', 'HIT')
+        assert second.get_json() == first.get_json()
+        assert loads == [7]
+    
+    def test_charged_for_whole_history(self, loads, client, auth_headers, monkeypatch):
+        from security.query_budget import QueryCostBudget
+        from security.audit_logger import audit_logger
+        
+        monkeypatch.setattr(audit_logger, 'log_rate_limit', lambda **kwargs: None)
+        spans = []
+        monkeypatch.setattr(QueryCostBudget, 'estimate_cost',
+                            classmethod(lambda cls, user_id, span_days: spans.append(span_days) or 10.0))
+        monkeypatch.setattr(QueryCostBudget, 'try_charge', classmethod(lambda cls, user_id, cost: (False, 30)))
+        
+        response = client.get('/api/analytics/stats/percentiles?days=7', headers=auth_headers)
+        
+        assert response.status_code == 429
+        assert spans == [None]
+        assert loads == []
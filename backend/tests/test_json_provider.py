@@ -0,0 +1,115 @@
+"""
+Unit tests for the fast JSON provider.
+Tests that database values are serialized in the API's formats.
+"""
+import pytest
+import sys
+import os
+from datetime import date, datetime
+from decimal import Decimal
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask, json, jsonify
+
+from performance.json_provider import init_json_provider
+
+
+@pytest.fixture
+def app():
+    app = Flask(__name__)
+    init_json_provider(app)
+    return app
+
+
+ROW = {
+    'transaction_id': 1,
+    'amount': Decimal('-125000.50'),
+    'transaction_date': datetime(2024, 3, 5, 14, 30, 15),
+    'start_date': date(2024, 3, 1),
+    'description': 'Cà phê',
+    'group_id': None,
+}
+
+
+class TestFastJSONProvider:
+    """Tests for serializing database rows."""
+    
+    def test_row_values_use_api_formats(self, app):
+        """Decimal, date and datetime should match the formats routes used to produce."""
+        with app.app_context():
+            data = jsonify([ROW]).get_json()
+        
+        assert data == [{
+            'transaction_id': 1,
+            'amount': -125000.5,
+            'transaction_date': '2024-03-05 14:30:15',
+            'start_date': '2024-03-01',
+            'description': 'Cà phê',
+            'group_id': None,
+        }]
+    
+    def test_keys_keep_column_order(self, app):
+        """Keys should stay in the order the query returned them."""
+        with app.app_context():
+            body = jsonify(ROW).get_data(as_text=True)
+        
+        assert body.index('transaction_id') < body.index('amount') < body.index('group_id')
+    
+    def test_dumps_matches_response(self, app):
+        """json.dumps should give the same values as responses."""
+        with app.app_context():
+            assert json.loads(json.dumps(ROW)) == jsonify(ROW).get_json()
+    
+    def test_non_string_keys(self, app):
+        """Integer keys such as month numbers should be accepted."""
+        with app.app_context():
+            assert jsonify({1: Decimal('2.5')}).get_json() == {'1': 2.5}
+    
+    def test_unknown_types_rejected(self, app):
+        """Values with no JSON form should still raise TypeError."""
+        with app.app_context():
+            with pytest.raises(TypeError):
+                jsonify({'value': object()})
+
+
+class TestDashboardWireFormat:
+    """Pins the date format of the dashboard's recent transactions."""
+    
+    def test_recent_transaction_dates_are_local_mysql_strings(self, app, monkeypatch):
+        """
+        The frontend's parseLocalMySQLDate reads 'YYYY-MM-DD HH:MM:SS';
+        plain jsonify used to send RFC 822 dates here instead.
+        """
+        import re
+        from auth import AuthManager
+        from database import Database
+        from routes_analytics import analytics_bp
+        
+        recent = [{
+            'transaction_id': 1,
+            'amount': Decimal('45000.00'),
+            'transaction_date': datetime(2024, 3, 5, 14, 30, 15),
+            'description': 'Lunch',
+            'account_name': 'Wallet',
+            'category_name': 'Food',
+            'category_type': 'Expense',
+        }]
+        monkeypatch.setattr(Database, 'run_parallel', staticmethod(
+            lambda calls, deadline=None: [{'total_accounts': 1, 'total_balance': Decimal('10')}, [], recent]
+        ))
+        app.register_blueprint(analytics_bp)
+        token = AuthManager.generate_token(7, 'tester', 'tester@example.com')
+        
+        response = app.test_client().get('/api/analytics/dashboard',
+                                         headers={'Authorization': f'Bearer {token}'})
+        
+        [transaction] = response.get_json()['recent_transactions']
+        assert transaction['transaction_date'] == '2024-03-05 14:30:15'
+        assert re.fullmatch(r'\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}', transaction['transaction_date'])
+        assert transaction['amount'] == 45000.0
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,102 @@
+"""
+Unit tests for Prometheus metrics.
+Tests request instrumentation and the /metrics endpoint.
+"""
+import pytest
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+pytest.importorskip('prometheus_client')
+
+from prometheus_client import REGISTRY
+
+from monitoring.metrics import init_metrics, record_cache_lookup, timed_job
+
+
+def _sample(name, labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+@pytest.fixture
+def client():
+    from flask import Flask, Blueprint, jsonify
+    
+    app = Flask(__name__)
+    app.config['TESTING'] = True
+    bp = Blueprint('items', __name__, url_prefix='/api/items')
+    
+    @bp.route('/<int:item_id>')
+    def get_item(item_id):
+        return jsonify({'id': item_id}), 200
+    
+    app.register_blueprint(bp)
+    init_metrics(app)
+    return app.test_client()
+
+
+class TestRequestMetrics:
+    """Tests for per-request metrics."""
+    
+    def test_latency_labelled_by_route_template(self, client):
+        """Requests for different ids should share one route series."""
+        labels = {'blueprint': 'items', 'route': '/api/items/<int:item_id>', 'method': 'GET'}
+        before = _sample('moneyminder_http_request_duration_seconds_count', labels)
+        
+        client.get('/api/items/1')
+        client.get('/api/items/2')
+        
+        assert _sample('moneyminder_http_request_duration_seconds_count', labels) == before + 2
+    
+    def test_status_codes_counted(self, client):
+        """Unmatched requests should be counted with their status."""
+        labels = {'blueprint': 'app', 'route': 'unmatched', 'method': 'GET', 'status': '404'}
+        before = _sample('moneyminder_http_responses_total', labels)
+        
+        client.get('/does-not-exist')
+        
+        assert _sample('moneyminder_http_responses_total', labels) == before + 1
+    
+    def test_in_flight_returns_to_zero(self, client):
+        """The in-flight gauge should drop back once a request finishes."""
+        client.get('/api/items/1')
+        assert _sample('moneyminder_http_requests_in_flight', {}) == 0
+
+
+class TestMetricsEndpoint:
+    """Tests for the scrape endpoint."""
+    
+    def test_exposes_text_format(self, client):
+        """The endpoint should serve every registered metric."""
+        record_cache_lookup('test_cache', hit=True)
+        response = client.get('/metrics')
+        
+        assert response.status_code == 200
+        assert response.content_type.startswith('text/plain')
+        body = response.get_data(as_text=True)
+        assert 'moneyminder_http_request_duration_seconds' in body
+        assert 'moneyminder_cache_lookups_total{cache="test_cache",result="hit"}' in body
+    
+    def test_token_required_when_configured(self, client, monkeypatch):
+        """A configured token should be required to scrape."""
+        monkeypatch.setenv('METRICS_TOKEN', 'secret')
+        
+        assert client.get('/metrics').status_code == 401
+        assert client.get('/metrics', headers={'Authorization': 'Bearer secret'}).status_code == 200
+    
+    def test_job_duration_recorded(self):
+        """Decorated jobs should record their duration even when they fail."""
+        @timed_job
+        def failing_job():
+            raise RuntimeError('boom')
+        
+        with pytest.raises(RuntimeError):
+            failing_job()
+        
+        assert _sample('moneyminder_scheduler_job_duration_seconds_count', {'job': 'failing_job'}) == 1
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,78 @@
+"""
+Unit tests for notification routes.
+Tests that the budget_alert notifications the Budget_Spend trigger
+creates are listed and counted.
+"""
+import pytest
+import sys
+import os
+from datetime import datetime
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import Database
+from routes_notifications import notifications_bp
+
+
+ALERT = {
+    'notification_id': 3, 'type': 'budget_alert', 'title': 'Food budget exceeded',
+    'message': 'You have spent 520 of your 500 Food budget (104%).', 'severity': 'danger',
+    'is_read': 0, 'related_id': 4, 'created_at': datetime(2024, 3, 15, 12, 30),
+}
+
+
+@pytest.fixture
+def queries(monkeypatch):
+    """Record queries and answer the notification reads."""
+    calls = []
+    
+    def fake_execute_query(query, params=None, **kwargs):
+        query = ' '.join(query.split())
+        calls.append((query, params))
+        if query.startswith('SELECT notification_id'):
+            return [ALERT]
+        if query.startswith('SELECT COUNT(*)'):
+            return {'count': 3}
+        if query.startswith('SELECT type, COUNT(*)'):
+            return [{'type': 'budget_alert', 'count': 2}, {'type': 'upcoming_bill', 'count': 1}]
+        return 1
+    
+    monkeypatch.setattr(Database, 'execute_query', staticmethod(fake_execute_query))
+    return calls
+
+
+@pytest.fixture
+def blueprints():
+    return [notifications_bp]
+
+
+class TestBudgetAlertNotifications:
+    """Tests for reading budget alerts"""
+    
+    def test_listed_with_their_budget(self, queries, client, auth_headers):
+        response = client.get('/api/notifications/', headers=auth_headers)
+        
+        assert response.status_code == 200
+        body = response.get_json()
+        assert body['count'] == 1
+        assert body['notifications'] == [{
+            'id': 3, 'type': 'budget_alert', 'title': 'Food budget exceeded',
+            'message': ALERT['message'], 'severity': 'danger', 'is_read': False,
+            'related_id': 4, 'date': '2024-03-15T12:30:00',
+        }]
+        [(_, params)] = queries
+        assert params == (7,)
+    
+    def test_counted_in_summary(self, queries, client, auth_headers):
+        response = client.get('/api/notifications/summary', headers=auth_headers)
+        
+        assert response.status_code == 200
+        assert response.get_json() == {
+            'unread_count': 3, 'upcoming_bills': 1, 'unusual_spending': 0,
+            'budget_alerts': 2, 'total': 3,
+        }
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,126 @@
+"""
+Unit tests for Performance_Tables.sql.
+Tests that the script can be re-run to rebuild its routines and triggers,
+and the trigger paths the routes rely on.
+"""
+import pytest
+import re
+import os
+
+
+SQL_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+                        'Performance_Tables.sql')
+
+
+@pytest.fixture(scope='module')
+def sql():
+    with open(SQL_PATH, encoding='utf-8') as f:
+        return f.read()
+
+
+def definitions(sql):
+    """(kind, name) of every function, procedure and trigger the script creates"""
+    return re.findall(r'^CREATE (FUNCTION|PROCEDURE|TRIGGER) (?:IF NOT EXISTS )?(\w+)', sql, re.MULTILINE)
+
+
+class TestRerunnable:
+    """Tests for rebuilding the script's definitions"""
+    
+    def test_definitions_are_replaced_not_skipped(self, sql):
+        """CREATE ... IF NOT EXISTS would keep an outdated definition on re-run."""
+        assert definitions(sql)
+        assert not re.search(r'CREATE (FUNCTION|PROCEDURE|TRIGGER) IF NOT EXISTS', sql)
+    
+    def test_every_definition_is_dropped_first(self, sql):
+        for kind, name in definitions(sql):
+            drop = sql.find(f'DROP {kind} IF EXISTS {name} //')
+            create = sql.find(f'CREATE {kind} {name}')
+            assert 0 <= drop < create, f'{kind} {name} is not dropped before it is created'
+    
+    def test_names_are_unique(self, sql):
+        names = [name for _, name in definitions(sql)]
+        assert len(names) == len(set(names))
+
+
+def trigger_body(sql, name):
+    """SQL of one trigger, from its CREATE to its END"""
+    start = sql.index(f'CREATE TRIGGER {name}')
+    return sql[start:sql.index('END //', start)]
+
+
+class TestTransactionDeleteTriggers:
+    """Tests for the triggers delete_account relies on"""
+    
+    @pytest.mark.parametrize('name, call', [
+        ('TRG_Rollup_Transaction_Delete', 'CALL SP_Rollup_Remove_Transaction(OLD.'),
+        ('TRG_Budget_Spend_Transaction_Delete', 'CALL SP_Budget_Spend_Apply(OLD.'),
+        ('TRG_Group_Balance_Transaction_Delete', 'CALL SP_Group_Balance_Apply(OLD.'),
+    ])
+    def test_deleted_transactions_leave_every_aggregate(self, sql, name, call):
+        body = trigger_body(sql, name)
+        
+        assert 'AFTER DELETE ON Transactions' in body
+        assert call in body
+
+
+class TestGroupBalanceTriggers:
+    """Tests for the paths that keep Group_Member_Balances current"""
+    
+    def test_category_type_change_moves_totals(self, sql):
+        body = trigger_body(sql, 'TRG_Group_Balance_Category_Update')
+        
+        assert 'AFTER UPDATE ON Categories' in body
+        assert 'IF NOT (OLD.type <=> NEW.type)' in body
+        assert 'UPDATE Group_Member_Balances' in body
+        # Both columns lose the old type's share and gain the new one's
+        for column in ('total_expenses', 'total_contributions'):
+            assert f'gb.{column} = gb.{column}' in body
+        assert body.count('OLD.type = ') == body.count('NEW.type = ') == 2
+
+
+class TestBudgetAlertTrigger:
+    """Tests for the budget_alert notifications raised as spend grows"""
+    
+    def test_thresholds(self, sql):
+        start = sql.index('CREATE FUNCTION FN_Budget_Alert_Level')
+        body = sql[start:sql.index('END //', start)]
+        
+        assert 'WHEN p_limit IS NULL OR p_limit <= 0 THEN 0' in body
+        assert 'WHEN p_spent >= p_limit THEN 100' in body
+        assert 'WHEN p_spent >= p_limit * 0.8 THEN 80' in body
+    
+    def test_alerts_once_per_threshold(self, sql):
+        body = trigger_body(sql, 'TRG_Budget_Spend_Alert')
+        
+        # BEFORE, so the trigger can record the level on the row being written
+        assert 'BEFORE UPDATE ON Budget_Spend' in body
+        assert 'IF NEW.spent > OLD.spent THEN' in body
+        assert 'IF v_level > NEW.alert_level THEN' in body
+        assert body.index('SET NEW.alert_level = v_level') < body.index('INSERT INTO Notifications')
+    
+    def test_notification(self, sql):
+        body = trigger_body(sql, 'TRG_Budget_Spend_Alert')
+        
+        assert "c.type = 'Expense'" in body
+        assert "'budget_alert'" in body
+        assert "IF(v_level = 100, 'danger', 'warning')" in body
+        # The notification links to its budget
+        assert 'INSERT INTO Notifications (user_id, type, title, message, severity, related_id)' in body
+    
+    def test_limit_change_resets_level_without_alert(self, sql):
+        body = trigger_body(sql, 'TRG_Budget_Spend_Budget_Update')
+        
+        assert 'SET alert_level = FN_Budget_Alert_Level(spent, NEW.amount_limit)' in body
+        assert 'Notifications' not in body
+    
+    def test_notifications_schema_allows_alerts(self):
+        path = os.path.join(os.path.dirname(SQL_PATH), 'Notifications_Schema.sql')
+        with open(path, encoding='utf-8') as f:
+            schema = f.read()
+        
+        assert "'budget_alert'" in schema
+        assert "'danger'" in schema and "'warning'" in schema
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
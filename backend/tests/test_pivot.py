@@ -0,0 +1,105 @@
+"""
+Unit tests for pivot query building.
+Tests dimension and filter parsing, source selection and subtotal cells.
+"""
+import pytest
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from performance.pivot import PivotError, build_pivot_query, parse_dimensions, parse_filters, shape_pivot_rows
+
+
+def placeholders(query):
+    """Count the %s placeholders left after escaped percent signs."""
+    return query.replace('%%', '').count('%s')
+
+
+class TestParsing:
+    """Test request parameter parsing"""
+    
+    def test_dimensions(self):
+        assert parse_dimensions('month, category', 'row') == ['month', 'category']
+        assert parse_dimensions('', 'row') == []
+    
+    def test_unknown_dimension_rejected(self):
+        with pytest.raises(PivotError):
+            parse_dimensions('month,user_id', 'row')
+    
+    def test_filters(self):
+        assert parse_filters('type:Expense,category:3,category:5') == {
+            'type': ['Expense'],
+            'category': [3, 5]
+        }
+    
+    @pytest.mark.parametrize('value', ['type:Other', 'category:abc', 'user:1', 'category'])
+    def test_invalid_filters_rejected(self, value):
+        with pytest.raises(PivotError):
+            parse_filters(value)
+
+
+class TestBuildPivotQuery:
+    """Test the generated query"""
+    
+    def test_rollup_source_for_time_and_category(self):
+        query, params, source = build_pivot_query(
+            1, ['month'], ['category'], 'sum', {'type': ['Expense']}, '2024-01-01', '2024-12-31'
+        )
+        
+        assert source == 'rollup'
+        assert 'FROM Daily_Category_Rollups r' in query
+        assert 'SUM(r.total_amount)' in query
+        assert 'WITH ROLLUP' in query
+        assert placeholders(query) == len(params)
+        assert params[0] == 1
+    
+    def test_transaction_source_for_account(self):
+        query, params, source = build_pivot_query(1, ['account'], ['type'], 'avg', {})
+        
+        assert source == 'transactions'
+        assert 'FROM Transactions t' in query
+        assert 'AVG(t.amount)' in query
+    
+    def test_transaction_source_for_account_filter(self):
+        query, params, source = build_pivot_query(1, ['month'], [], 'count', {'account': [4]}, limit=10)
+        
+        assert source == 'transactions'
+        assert params == (1, 4, 10)
+        assert placeholders(query) == len(params)
+    
+    def test_grouping_columns_for_every_dimension(self):
+        query, _, _ = build_pivot_query(1, ['year', 'quarter'], ['type'], 'max', {})
+        
+        for dimension in ('year', 'quarter', 'type'):
+            assert f'AS `_total_{dimension}`' in query
+    
+    @pytest.mark.parametrize('rows,cols,measure', [
+        ([], [], 'sum'),
+        (['month', 'category'], ['type', 'year'], 'sum'),
+        (['month'], ['month'], 'sum'),
+        (['month'], [], 'median'),
+    ])
+    def test_invalid_combinations_rejected(self, rows, cols, measure):
+        with pytest.raises(PivotError):
+            build_pivot_query(1, rows, cols, measure, {})
+    
+    def test_invalid_date_rejected(self):
+        with pytest.raises(PivotError):
+            build_pivot_query(1, ['month'], [], 'sum', {}, start_date='01/02/2024')
+
+
+class TestShapePivotRows:
+    """Test turning rows into cells"""
+    
+    def test_subtotals_marked(self):
+        cells = shape_pivot_rows([
+            {'month': '2024-01', 'group': None, 'value': 10, '_total_month': 0, '_total_group': 0},
+            {'month': '2024-01', 'group': None, 'value': 10, '_total_month': 0, '_total_group': 1},
+            {'month': None, 'group': None, 'value': 10, '_total_month': 1, '_total_group': 1},
+        ], ['month', 'group'])
+        
+        assert cells[0] == {'month': '2024-01', 'group': None, 'value': 10}
+        assert cells[1] == {'month': '2024-01', 'group': None, 'value': 10, 'total': True}
+        assert cells[2] == {'month': None, 'group': None, 'value': 10, 'total': True}
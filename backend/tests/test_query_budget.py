@@ -0,0 +1,128 @@
+"""
+Unit tests for query cost budgeting.
+Tests cost estimation and per-user budget enforcement.
+"""
+import pytest
+import sys
+import os
+import time
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from security.query_budget import QueryCostBudget, date_span_days, throttle_query_cost
+
+
+@pytest.fixture(autouse=True)
+def reset_budget():
+    """Reset budget state before each test."""
+    QueryCostBudget.reset()
+    yield
+    QueryCostBudget.reset()
+
+
+def _set_row_stats(user_id, rows, history_days):
+    QueryCostBudget._row_stats[user_id] = {
+        'rows': rows,
+        'history_days': history_days,
+        'fetched': time.monotonic()
+    }
+
+
+class TestCostEstimation:
+    """Tests for estimating query cost."""
+    
+    def test_full_history_costs_all_rows(self):
+        """An unbounded query should be priced on every row."""
+        _set_row_stats(1, rows=10000, history_days=1000)
+        cost = QueryCostBudget.estimate_cost(1, None)
+        assert cost == QueryCostBudget.BASE_COST + 10000 / QueryCostBudget.ROWS_PER_UNIT
+    
+    def test_narrow_span_costs_less(self):
+        """A query over part of the history should cost proportionally less."""
+        _set_row_stats(1, rows=10000, history_days=1000)
+        full = QueryCostBudget.estimate_cost(1, None)
+        month = QueryCostBudget.estimate_cost(1, 31)
+        assert month < full / 10
+    
+    def test_span_longer_than_history(self):
+        """A span longer than the history should cost the same as full history."""
+        _set_row_stats(1, rows=500, history_days=30)
+        assert QueryCostBudget.estimate_cost(1, 3650) == QueryCostBudget.estimate_cost(1, None)
+    
+    def test_date_span_days(self):
+        """Date spans should be inclusive and unbounded without a start."""
+        assert date_span_days('2024-01-01', '2024-01-31') == 31
+        assert date_span_days(None, '2024-01-31') is None
+        assert date_span_days('not-a-date', '2024-01-31') is None
+
+
+class TestBudgetEnforcement:
+    """Tests for debiting the per-user budget."""
+    
+    def test_charges_within_budget(self):
+        """Requests within the budget should be allowed."""
+        allowed, retry_after = QueryCostBudget.try_charge(1, 10)
+        assert allowed
+        assert retry_after == 0
+        assert QueryCostBudget.get_remaining(1) == pytest.approx(QueryCostBudget.CAPACITY - 10, abs=1)
+    
+    def test_refuses_when_exhausted(self, monkeypatch):
+        """Requests beyond the remaining budget should be refused with a retry time."""
+        monkeypatch.setattr(QueryCostBudget, 'REFILL_PER_SECOND', 1.0)
+        assert QueryCostBudget.try_charge(1, QueryCostBudget.CAPACITY)[0]
+        
+        allowed, retry_after = QueryCostBudget.try_charge(1, 50)
+        assert not allowed
+        assert retry_after >= 49
+    
+    def test_budgets_are_per_user(self):
+        """One user exhausting their budget should not affect another."""
+        QueryCostBudget.try_charge(1, QueryCostBudget.CAPACITY)
+        assert not QueryCostBudget.try_charge(1, 100)[0]
+        assert QueryCostBudget.try_charge(2, 100)[0]
+    
+    def test_oversized_cost_is_capped(self):
+        """A request costing more than the capacity should still run on a full bucket."""
+        assert QueryCostBudget.try_charge(1, QueryCostBudget.CAPACITY * 10)[0]
+
+
+class TestThrottleDecorator:
+    """Tests for the throttle_query_cost decorator."""
+    
+    @pytest.fixture
+    def client(self):
+        from flask import Flask, jsonify, request
+        
+        app = Flask(__name__)
+        app.config['TESTING'] = True
+        
+        @app.route('/report')
+        @throttle_query_cost(lambda: None)
+        def report():
+            return jsonify({'ok': True}), 200
+        
+        @app.before_request
+        def fake_auth():
+            request.user_id = 7
+        
+        return app.test_client()
+    
+    def test_returns_429_when_budget_exhausted(self, client, monkeypatch):
+        """An expensive request on an empty budget should get a 429."""
+        from security.audit_logger import audit_logger
+        
+        monkeypatch.setattr(audit_logger, 'log_rate_limit', lambda **kwargs: None)
+        _set_row_stats(7, rows=QueryCostBudget.CAPACITY * QueryCostBudget.ROWS_PER_UNIT,
+                       history_days=365)
+        
+        assert client.get('/report').status_code == 200
+        
+        response = client.get('/report')
+        assert response.status_code == 429
+        assert response.get_json()['code'] == 'QUERY_BUDGET_EXCEEDED'
+        assert 'Retry-After' in response.headers
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,153 @@
+"""
+Unit tests for query instrumentation.
+Tests fingerprinting, parameter redaction and statistics aggregation.
+"""
+import pytest
+import logging
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from monitoring.query_stats import QueryStats, fingerprint, redact_params, init_query_stats
+
+
+@pytest.fixture(autouse=True)
+def reset_stats():
+    """Reset collected statistics before each test."""
+    QueryStats.reset()
+    yield
+    QueryStats.reset()
+
+
+class TestFingerprint:
+    """Tests for SQL fingerprinting."""
+    
+    def test_whitespace_and_placeholders_normalised(self):
+        """Formatting differences should not create separate fingerprints."""
+        a = fingerprint("""
+            SELECT account_id FROM Accounts
+            WHERE user_id = %s
+        """)
+        b = fingerprint("SELECT account_id FROM Accounts WHERE user_id = 42")
+        assert a == b == "SELECT account_id FROM Accounts WHERE user_id = ?"
+    
+    def test_string_literals_and_in_lists(self):
+        """String literals and IN lists of any length should collapse."""
+        a = fingerprint("SELECT * FROM Categories WHERE type = 'Expense' AND category_id IN (%s, %s, %s)")
+        b = fingerprint("SELECT * FROM Categories WHERE type = 'Income' AND category_id IN (%s, %s)")
+        assert a == b
+    
+    def test_optimizer_hint_removed(self):
+        """Time limit hints should not change the fingerprint."""
+        assert fingerprint("SELECT /*+ MAX_EXECUTION_TIME(10000) */ 1") == fingerprint("SELECT 1")
+
+
+class TestRedaction:
+    """Tests for slow-query parameter redaction."""
+    
+    def test_values_not_included(self):
+        """Only parameter types should be logged."""
+        redacted = redact_params(('secret@example.com', 42, None))
+        assert 'secret' not in redacted
+        assert redacted == '(str, int, NoneType)'
+    
+    def test_slow_query_logged_redacted(self, monkeypatch, caplog):
+        """Slow statements should be logged without their parameter values."""
+        monkeypatch.setattr(QueryStats, 'SLOW_QUERY_MS', 10)
+        
+        with caplog.at_level(logging.WARNING, logger='slow_query'):
+            QueryStats.record("SELECT * FROM Users WHERE email = %s", ('secret@example.com',), 25.0, 1)
+        
+        assert 'Slow query' in caplog.text
+        assert 'secret@example.com' not in caplog.text
+
+
+class TestAggregation:
+    """Tests for aggregating statistics."""
+    
+    def test_counts_per_fingerprint(self):
+        """Calls with the same fingerprint should be aggregated."""
+        for user_id in (1, 2, 3):
+            QueryStats.record("SELECT * FROM Accounts WHERE user_id = %s", (user_id,), 2.0, 4, endpoint='accounts.get_accounts')
+        
+        [stats] = QueryStats.snapshot()['queries']
+        assert stats['count'] == 3
+        assert stats['rows'] == 12
+        assert stats['avg_ms'] == 2.0
+        assert stats['endpoints'] == ['accounts.get_accounts']
+    
+    def test_measure_records_failures(self):
+        """A call that raises should still be recorded as an error."""
+        with pytest.raises(RuntimeError):
+            with QueryStats.measure("SELECT 1", endpoint='test'):
+                raise RuntimeError("boom")
+        
+        [stats] = QueryStats.snapshot()['queries']
+        assert stats['errors'] == 1
+    
+    def test_per_request_counters(self):
+        """Each request should report its own query count."""
+        from flask import Flask
+        
+        app = Flask(__name__)
+        init_query_stats(app)
+        
+        @app.route('/details')
+        def details():
+            for _ in range(4):
+                QueryStats.record("SELECT 1", None, 1.5, 1)
+            return 'ok'
+        
+        response = app.test_client().get('/details')
+        
+        assert response.headers['Server-Timing'] == 'db;dur=6.0;desc="4 queries"'
+        endpoint = QueryStats.snapshot()['endpoints']['details']
+        assert endpoint['requests'] == 1
+        assert endpoint['max_queries'] == 4
+
+
+
+class TestQueryStatsEndpoint:
+    """Tests for exporting the statistics from /metrics/queries."""
+    
+    @pytest.fixture
+    def client(self):
+        from flask import Flask
+        
+        app = Flask(__name__)
+        init_query_stats(app)
+        return app.test_client()
+    
+    def test_exports_snapshot(self, client, monkeypatch):
+        """The endpoint should return the per-fingerprint aggregates."""
+        monkeypatch.setenv('METRICS_TOKEN', 'scrape-secret')
+        QueryStats.record("SELECT * FROM Budgets WHERE user_id = %s", (1,), 3.0, 2, endpoint='budgets.get_budgets')
+        
+        response = client.get('/metrics/queries', headers={'Authorization': 'Bearer scrape-secret'})
+        
+        assert response.status_code == 200
+        [stats] = response.get_json()['queries']
+        assert stats['fingerprint'] == 'SELECT * FROM Budgets WHERE user_id = ?'
+        assert stats['count'] == 1
+        assert stats['max_ms'] == 3.0
+        assert stats['rows'] == 2
+    
+    def test_token_required(self, client, monkeypatch):
+        """Requests without the metrics token should be rejected."""
+        monkeypatch.setenv('METRICS_TOKEN', 'scrape-secret')
+        
+        assert client.get('/metrics/queries').status_code == 401
+        assert client.get('/metrics/queries', headers={'Authorization': 'Bearer wrong'}).status_code == 401
+    
+    def test_closed_outside_development_without_token(self, client, monkeypatch):
+        """Without a configured token only development serves the statistics."""
+        monkeypatch.delenv('METRICS_TOKEN', raising=False)
+        monkeypatch.setenv('FLASK_ENV', 'production')
+        
+        assert client.get('/metrics/queries').status_code == 401
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,203 @@
+"""
+Unit tests for the stale-while-revalidate response cache.
+Tests fresh and stale hits, background refresh, invalidation and eviction.
+"""
+import pytest
+import sys
+import os
+import time
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask, Blueprint, jsonify, request
+
+from performance.data_version import DataVersion
+from performance import response_cache
+from performance.response_cache import CacheEntry, ResponseCache, analytics_cache, cache_response
+from security.query_budget import QueryCostBudget, throttle_query_cost
+
+
+@pytest.fixture
+def versions(monkeypatch):
+    """Keep data versions in memory instead of MySQL."""
+    store = {}
+    
+    def fake_execute_many(query, seq_params):
+        for (user_id,) in seq_params:
+            store[user_id] = store.get(user_id, 0) + 1
+        return len(seq_params)
+    
+    from database import Database
+    monkeypatch.setattr(DataVersion, 'get', staticmethod(lambda user_id: store.get(user_id, 0)))
+    monkeypatch.setattr(Database, 'execute_many', staticmethod(fake_execute_many))
+    return store
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Control the cache's notion of time."""
+    now = [1000.0]
+    monkeypatch.setattr(response_cache.time, 'monotonic', lambda: now[0])
+    return now
+
+
+@pytest.fixture
+def app(versions, clock):
+    analytics_cache.clear()
+    app = Flask(__name__)
+    app.config['TESTING'] = True
+    app.view_calls = 0
+    bp = Blueprint('analytics', __name__, url_prefix='/api/analytics')
+    
+    @bp.before_request
+    def fake_auth():
+        request.user_id = int(request.headers.get('X-User', 1))
+        request.username = 'user'
+        request.email = 'user@example.com'
+    
+    @bp.route('/report', methods=['GET'])
+    @cache_response(fresh=60, stale=600)
+    def report():
+        app.view_calls += 1
+        if request.args.get('fail'):
+            return jsonify({'error': 'failed'}), 500
+        return jsonify({'call': app.view_calls}), 200
+    
+    @bp.route('/costly', methods=['GET'])
+    @cache_response(fresh=60, stale=600)
+    @throttle_query_cost(lambda: None)
+    def costly():
+        app.view_calls += 1
+        return jsonify({'call': app.view_calls}), 200
+    
+    app.register_blueprint(bp)
+    yield app
+    analytics_cache.clear()
+
+
+def wait_for_refresh():
+    response_cache._refresher.submit(lambda: None).result(timeout=5)
+
+
+class TestCacheResponse:
+    """Test the view decorator"""
+    
+    def test_fresh_response_is_served_from_cache(self, app):
+        client = app.test_client()
+        first = client.get('/api/analytics/report')
+        second = client.get('/api/analytics/report')
+        
+        assert first.headers['X-Cache'] == 'MISS'
+        assert second.headers['X-Cache'] == 'HIT'
+        assert second.get_json() == {'call': 1}
+        assert app.view_calls == 1
+    
+    def test_stale_response_is_served_then_refreshed(self, app, clock):
+        client = app.test_client()
+        client.get('/api/analytics/report')
+        clock[0] += 120
+        
+        stale = client.get('/api/analytics/report')
+        wait_for_refresh()
+        refreshed = client.get('/api/analytics/report')
+        
+        assert stale.headers['X-Cache'] == 'STALE'
+        assert stale.get_json() == {'call': 1}
+        assert refreshed.headers['X-Cache'] == 'HIT'
+        assert refreshed.get_json() == {'call': 2}
+    
+    def test_refresh_is_not_charged_to_query_budget(self, app, clock, monkeypatch):
+        charges = []
+        monkeypatch.setattr(QueryCostBudget, 'estimate_cost', classmethod(lambda cls, user_id, span: 50.0))
+        monkeypatch.setattr(QueryCostBudget, 'try_charge',
+                            classmethod(lambda cls, user_id, cost: charges.append(user_id) or (True, 0)))
+        client = app.test_client()
+        client.get('/api/analytics/costly')
+        clock[0] += 120
+        
+        client.get('/api/analytics/costly')
+        wait_for_refresh()
+        refreshed = client.get('/api/analytics/costly')
+        
+        assert refreshed.get_json() == {'call': 2}
+        assert charges == [1]
+    
+    def test_expired_response_is_recomputed(self, app, clock):
+        client = app.test_client()
+        client.get('/api/analytics/report')
+        clock[0] += 601
+        
+        response = client.get('/api/analytics/report')
+        
+        assert response.headers['X-Cache'] == 'MISS'
+        assert response.get_json() == {'call': 2}
+    
+    def test_write_invalidates_users_entries(self, app, versions):
+        client = app.test_client()
+        client.get('/api/analytics/report')
+        DataVersion.bump(1)
+        
+        response = client.get('/api/analytics/report')
+        
+        assert response.headers['X-Cache'] == 'MISS'
+        assert app.view_calls == 2
+    
+    def test_version_change_elsewhere_is_not_served(self, app, versions):
+        client = app.test_client()
+        client.get('/api/analytics/report')
+        # Bumped by another worker process, so no listener ran here
+        versions[1] = 5
+        
+        assert client.get('/api/analytics/report').headers['X-Cache'] == 'MISS'
+    
+    def test_users_and_params_are_cached_separately(self, app):
+        client = app.test_client()
+        client.get('/api/analytics/report?months=6', headers={'X-User': '1'})
+        
+        other_user = client.get('/api/analytics/report?months=6', headers={'X-User': '2'})
+        other_params = client.get('/api/analytics/report?months=12', headers={'X-User': '1'})
+        
+        assert other_user.headers['X-Cache'] == 'MISS'
+        assert other_params.headers['X-Cache'] == 'MISS'
+    
+    def test_errors_are_not_cached(self, app):
+        client = app.test_client()
+        client.get('/api/analytics/report?fail=1')
+        client.get('/api/analytics/report?fail=1')
+        
+        assert app.view_calls == 2
+
+
+class TestResponseCache:
+    """Test the LRU store"""
+    
+    def entry(self, size):
+        return CacheEntry(b'x' * size, 200, [], 0, time.monotonic())
+    
+    def test_least_recently_used_is_evicted(self):
+        cache = ResponseCache(max_bytes=250)
+        cache.put((1, 'a'), self.entry(100))
+        cache.put((1, 'b'), self.entry(100))
+        cache.get((1, 'a'))
+        cache.put((1, 'c'), self.entry(100))
+        
+        assert cache.get((1, 'b')) is None
+        assert cache.get((1, 'a')) is not None
+        assert cache.size == 200
+    
+    def test_oversized_entry_is_not_stored(self):
+        cache = ResponseCache(max_bytes=50)
+        cache.put((1, 'a'), self.entry(100))
+        
+        assert len(cache) == 0
+    
+    def test_invalidate_users(self):
+        cache = ResponseCache(max_bytes=1000)
+        cache.put((1, 'a'), self.entry(10))
+        cache.put((2, 'a'), self.entry(10))
+        cache.invalidate_users([1])
+        
+        assert cache.get((1, 'a')) is None
+        assert cache.get((2, 'a')) is not None
+        assert cache.size == 10
@@ -0,0 +1,179 @@
+"""
+Unit tests for request coalescing.
+Tests shared results, error propagation, timeouts and request keys.
+"""
+import pytest
+import sys
+import os
+import threading
+import time
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask, Blueprint, jsonify, request
+
+from performance.singleflight import CoalesceTimeoutError, SingleFlight, coalesce_requests
+
+
+def run_concurrently(count, target):
+    """Start count threads running target and return their results in order."""
+    results = [None] * count
+    
+    def run(i):
+        try:
+            results[i] = target()
+        except Exception as e:
+            results[i] = e
+    
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+    return results
+
+
+class TestSingleFlight:
+    """Test the SingleFlight group"""
+    
+    def test_concurrent_callers_share_one_run(self):
+        flights = SingleFlight()
+        calls = []
+        release = threading.Event()
+        
+        def compute():
+            calls.append(1)
+            release.wait(2)
+            return 'report'
+        
+        def caller():
+            return flights.do('key', compute, timeout=2)
+        
+        leader = threading.Thread(target=caller)
+        leader.start()
+        while not flights.in_flight():
+            time.sleep(0.001)
+        
+        timer = threading.Timer(0.05, release.set)
+        timer.start()
+        results = run_concurrently(4, caller)
+        leader.join(2)
+        
+        assert len(calls) == 1
+        assert results == [('report', True)] * 4
+        assert flights.in_flight() == 0
+    
+    def test_sequential_calls_run_again(self):
+        flights = SingleFlight()
+        values = iter([1, 2])
+        
+        assert flights.do('key', lambda: next(values)) == (1, False)
+        assert flights.do('key', lambda: next(values)) == (2, False)
+    
+    def test_errors_reach_every_waiter(self):
+        flights = SingleFlight()
+        release = threading.Event()
+        
+        def compute():
+            release.wait(2)
+            raise ValueError('query failed')
+        
+        leader = threading.Thread(target=run_concurrently, args=(1, lambda: flights.do('key', compute)))
+        leader.start()
+        while not flights.in_flight():
+            time.sleep(0.001)
+        
+        threading.Timer(0.05, release.set).start()
+        results = run_concurrently(3, lambda: flights.do('key', compute, timeout=2))
+        leader.join(2)
+        
+        assert all(isinstance(r, ValueError) for r in results)
+        assert flights.in_flight() == 0
+    
+    def test_waiter_times_out(self):
+        flights = SingleFlight()
+        release = threading.Event()
+        leader = threading.Thread(target=lambda: flights.do('key', lambda: release.wait(2)))
+        leader.start()
+        while not flights.in_flight():
+            time.sleep(0.001)
+        
+        with pytest.raises(CoalesceTimeoutError):
+            flights.do('key', lambda: 'unused', timeout=0.01)
+        
+        release.set()
+        leader.join(2)
+    
+    def test_different_keys_run_separately(self):
+        flights = SingleFlight()
+        
+        assert flights.do('a', lambda: 'a') == ('a', False)
+        assert flights.do('b', lambda: 'b') == ('b', False)
+
+
+@pytest.fixture
+def app():
+    app = Flask(__name__)
+    app.config['TESTING'] = True
+    app.view_calls = 0
+    app.release = threading.Event()
+    bp = Blueprint('analytics', __name__, url_prefix='/api/analytics')
+    
+    @bp.before_request
+    def fake_auth():
+        request.user_id = int(request.headers.get('X-User', 1))
+    
+    @bp.route('/report', methods=['GET'])
+    @coalesce_requests
+    def report():
+        app.view_calls += 1
+        app.release.wait(2)
+        return jsonify({'months': request.args.get('months')}), 200
+    
+    app.register_blueprint(bp)
+    return app
+
+
+class TestCoalesceRequests:
+    """Test the view decorator"""
+    
+    def fetch_concurrently(self, app, requests):
+        """Send requests at the same time and return their responses."""
+        def fetch(path, user):
+            with app.test_client() as client:
+                return client.get(path, headers={'X-User': str(user)})
+        
+        threading.Timer(0.1, app.release.set).start()
+        results = [None] * len(requests)
+        
+        def run(i):
+            results[i] = fetch(*requests[i])
+        
+        threads = [threading.Thread(target=run, args=(i,)) for i in range(len(requests))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(5)
+        return results
+    
+    def test_identical_requests_share_the_view(self, app):
+        responses = self.fetch_concurrently(app, [
+            ('/api/analytics/report?months=6&x=1', 1),
+            ('/api/analytics/report?x=1&months=6', 1),
+            ('/api/analytics/report?months=6&x=1', 1),
+        ])
+        
+        assert app.view_calls == 1
+        assert all(r.status_code == 200 for r in responses)
+        assert all(r.get_json() == {'months': '6'} for r in responses)
+    
+    def test_other_users_and_params_are_not_shared(self, app):
+        responses = self.fetch_concurrently(app, [
+            ('/api/analytics/report?months=6', 1),
+            ('/api/analytics/report?months=6', 2),
+            ('/api/analytics/report?months=12', 1),
+        ])
+        
+        assert app.view_calls == 3
+        assert [r.get_json()['months'] for r in responses] == ['6', '6', '12']
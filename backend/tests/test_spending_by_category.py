@@ -0,0 +1,87 @@
+"""
+Unit tests for the spending-by-category report.
+Tests date validation and the rollup reads sent to MySQL.
+"""
+import pytest
+import sys
+import os
+from datetime import date
+from decimal import Decimal
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import Database
+from performance.data_version import DataVersion
+from performance.response_cache import analytics_cache
+from routes_analytics import FIRST_DAY, LAST_DAY, analytics_bp
+
+
+ROWS = [{
+    'category_name': 'Food', 'type': 'Expense', 'transaction_count': 3,
+    'total_amount': Decimal('90.00'), 'avg_amount': Decimal('30.00'),
+    'min_amount': Decimal('10.00'), 'max_amount': Decimal('50.00'),
+}]
+
+
+@pytest.fixture
+def queries(monkeypatch):
+    """Record queries and answer the rollup read."""
+    calls = []
+    
+    def fake_execute_query(query, params=None, **kwargs):
+        query = ' '.join(query.split())
+        if 'Daily_Category_Rollups' in query:
+            calls.append((query, params))
+            return ROWS
+        return []
+    
+    monkeypatch.setattr(Database, 'execute_query', staticmethod(fake_execute_query))
+    monkeypatch.setattr(DataVersion, 'get', staticmethod(lambda user_id: 0))
+    analytics_cache.clear()
+    yield calls
+    analytics_cache.clear()
+
+
+@pytest.fixture
+def blueprints():
+    return [analytics_bp]
+
+
+class TestSpendingByCategory:
+    """Tests for category totals read from the daily rollups"""
+    
+    @pytest.mark.parametrize('query', ['start_date=2024-13-01', 'end_date=03/31/2024', 'start_date=abc'])
+    def test_malformed_dates_rejected(self, queries, client, auth_headers, query):
+        response = client.get(f'/api/analytics/spending-by-category?{query}', headers=auth_headers)
+        
+        assert response.status_code == 400
+        assert queries == []
+    
+    def test_date_range_bounds_running_totals(self, queries, client, auth_headers):
+        response = client.get('/api/analytics/spending-by-category?start_date=2024-03-01&end_date=2024-03-31',
+                              headers=auth_headers)
+        
+        assert response.status_code == 200
+        [(query, params)] = queries
+        # Min/max over the range, running totals on or before the end and before the start
+        assert params == (7, date(2024, 3, 1), date(2024, 3, 31), 7, date(2024, 3, 31), 7, date(2024, 3, 1))
+        assert 'r.day <= %s' in query and 'r.day < %s' in query
+        assert 'FROM Transactions' not in query
+    
+    def test_open_range_covers_all_days(self, queries, client, auth_headers):
+        client.get('/api/analytics/spending-by-category', headers=auth_headers)
+        
+        [(_, params)] = queries
+        assert params == (7, FIRST_DAY, LAST_DAY, 7, LAST_DAY, 7, FIRST_DAY)
+    
+    def test_response_shape(self, queries, client, auth_headers):
+        response = client.get('/api/analytics/spending-by-category', headers=auth_headers)
+        
+        [category] = response.get_json()['categories']
+        assert category['category_name'] == 'Food'
+        assert set(category) == set(ROWS[0])
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,59 @@
+"""
+Unit tests for the yearly summary report.
+Tests year validation and the sargable date ranges sent to MySQL.
+"""
+import pytest
+import sys
+import os
+from datetime import date
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import Database
+from performance.data_version import DataVersion
+from performance.response_cache import analytics_cache
+from routes_analytics import analytics_bp
+
+
+@pytest.fixture
+def queries(monkeypatch):
+    """Record queries instead of running them."""
+    calls = []
+    
+    def fake_execute_query(query, params=None, **kwargs):
+        calls.append((' '.join(query.split()), params))
+        return []
+    
+    monkeypatch.setattr(Database, 'execute_query', staticmethod(fake_execute_query))
+    monkeypatch.setattr(DataVersion, 'get', staticmethod(lambda user_id: 0))
+    analytics_cache.clear()
+    yield calls
+    analytics_cache.clear()
+
+
+@pytest.fixture
+def blueprints():
+    return [analytics_bp]
+
+
+class TestYearValidation:
+    """Test rejecting years that have no date range"""
+    
+    @pytest.mark.parametrize('query', ['year=9999', 'year=-5', 'year=0', 'years=2024,9999', 'years=abc'])
+    def test_out_of_range_years_rejected(self, queries, client, auth_headers, query):
+        response = client.get(f'/api/analytics/yearly-summary?{query}', headers=auth_headers)
+        
+        assert response.status_code == 400
+        assert queries == []
+    
+    def test_single_year_uses_its_date_range(self, queries, client, auth_headers):
+        response = client.get('/api/analytics/yearly-summary?year=2024', headers=auth_headers)
+        
+        assert response.status_code == 200
+        [params] = [params for query, params in queries if 'GROUP BY YEAR' in query]
+        assert params == (7, date(2024, 1, 1), date(2025, 1, 1))
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -437,13 +437,64 @@ async function apiRequest(endpoint, options = {}) {
   return response;
 }
 
+// Run several GET requests in one round trip.
+// Resolves to [{status, headers, body}, ...] in the same order as paths.
+async function apiBatch(paths, parallel = false) {
+  const response = await apiRequest('/batch', {
+    method: 'POST',
+    body: JSON.stringify({ requests: paths.map(path => ({ path })), parallel })
+  });
+
+  if (!response.ok) {
+    throw new Error(`Batch request failed with status ${response.status}`);
+  }
+
+  const data = await response.json();
+  return data.responses;
+}
+
 // Dashboard Functions
 async function loadDashboard() {
+  let monthlyTrend = null;
+  let yearlySummary = null;
+
   try {
-    const response = await apiRequest('/analytics/dashboard');
-    const data = await response.json();
+    // Summary, charts, notification badge, budget status, accounts and
+    // categories in a single request
+    const year = new Date().getFullYear();
+    const [dashboard, trend, summary, notifications, budgetStatus, accounts, categories] = await apiBatch([
+      '/analytics/dashboard',
+      '/analytics/monthly-trend?months=6',
+      `/analytics/yearly-summary?year=${year}`,
+      '/notifications/summary',
+      '/analytics/budget-status',
+      '/accounts',
+      '/categories'
+    ]);
 
-    if (response.ok) {
+    monthlyTrend = trend.status === 200 ? trend.body : null;
+    yearlySummary = summary.status === 200 ? summary.body : null;
+
+    if (notifications.status === 200) {
+      renderNotificationSummary(notifications.body);
+    }
+
+    // Shown on the analytics page until it refreshes them
+    if (budgetStatus.status === 200) {
+      displayBudgetStatus(budgetStatus.body.budgets);
+    }
+
+    // Lets the transactions page and category dropdowns skip their own fetches
+    if (accounts.status === 200) {
+      state.accounts = accounts.body.accounts || [];
+    }
+    if (categories.status === 200) {
+      state.categories = categories.body.categories || [];
+    }
+
+    const data = dashboard.body;
+
+    if (dashboard.status === 200) {
       // Update summary cards with safe defaults
       const currency = state.user.base_currency === 'VND' ? '₫' : '$';
       document.getElementById('totalBalance').textContent = formatCurrency(data.accounts?.balance || 0, currency);
@@ -481,7 +532,7 @@ async function loadDashboard() {
   
   // Initialize charts after dashboard data is loaded
   setTimeout(() => {
-    initCharts();
+    initCharts(monthlyTrend, yearlySummary);
   }, 500);
 }
 
@@ -2171,21 +2222,26 @@ async function loadNotificationSummary() {
     const response = await apiRequest('/notifications/summary');
     if (response.ok) {
       const data = await response.json();
-      const badge = document.getElementById('notificationBadge');
-      const totalUnread = data.total_unread || 0;
-      
-      if (totalUnread > 0) {
-        badge.textContent = totalUnread > 99 ? '99+' : totalUnread;
-        badge.style.display = 'block';
-      } else {
-        badge.style.display = 'none';
-      }
+      renderNotificationSummary(data);
     }
   } catch (error) {
     console.error('Error loading notification summary:', error);
   }
 }
 
+function renderNotificationSummary(data) {
+  const badge = document.getElementById('notificationBadge');
+  if (!badge) return;
+  const totalUnread = data.total_unread || 0;
+  
+  if (totalUnread > 0) {
+    badge.textContent = totalUnread > 99 ? '99+' : totalUnread;
+    badge.style.display = 'block';
+  } else {
+    badge.style.display = 'none';
+  }
+}
+
 async function loadNotifications() {
   try {
     const response = await apiRequest('/notifications');
@@ -2273,9 +2329,20 @@ function formatTimeAgo(timestamp) {
 // Charts
 // ============================================
 
-async function initCharts() {
-  await loadMonthlyTrendChart();
-  await loadYearlySummaryChart();
+// Chart data already fetched by the dashboard batch is used when given
+async function initCharts(monthlyTrend = null, yearlySummary = null) {
+  if (monthlyTrend) {
+    renderMonthlyTrendChart(monthlyTrend);
+  } else {
+    await loadMonthlyTrendChart();
+  }
+
+  if (yearlySummary) {
+    renderYearlySummaryChart(yearlySummary);
+  } else {
+    await loadYearlySummaryChart();
+  }
+
   populateYearSelector();
 }
 
@@ -2284,55 +2351,58 @@ async function loadMonthlyTrendChart() {
     const response = await apiRequest('/analytics/monthly-trend?months=6');
     if (response.ok) {
       const data = await response.json();
-      
-      const ctx = document.getElementById('monthlyTrendChart');
-      if (!ctx) return;
-
-      // Destroy existing chart
-      if (monthlyTrendChart) {
-        monthlyTrendChart.destroy();
-      }
+      renderMonthlyTrendChart(data);
+    }
+  } catch (error) {
+    console.error('Error loading monthly trend chart:', error);
+  }
+}
 
-      monthlyTrendChart = new Chart(ctx, {
-        type: 'line',
-        data: {
-          labels: data.labels,
-          datasets: data.datasets.map(ds => ({
-            ...ds,
-            tension: 0.4,
-            fill: false,
-            borderWidth: 2,
-            pointRadius: 4,
-            pointHoverRadius: 6
-          }))
+function renderMonthlyTrendChart(data) {
+  const ctx = document.getElementById('monthlyTrendChart');
+  if (!ctx) return;
+
+  // Destroy existing chart
+  if (monthlyTrendChart) {
+    monthlyTrendChart.destroy();
+  }
+
+  monthlyTrendChart = new Chart(ctx, {
+    type: 'line',
+    data: {
+      labels: data.labels,
+      datasets: data.datasets.map(ds => ({
+        ...ds,
+        tension: 0.4,
+        fill: false,
+        borderWidth: 2,
+        pointRadius: 4,
+        pointHoverRadius: 6
+      }))
+    },
+    options: {
+      responsive: true,
+      maintainAspectRatio: true,
+      plugins: {
+        legend: {
+          position: 'top',
         },
-        options: {
-          responsive: true,
-          maintainAspectRatio: true,
-          plugins: {
-            legend: {
-              position: 'top',
-            },
-            title: {
-              display: false
-            }
-          },
-          scales: {
-            y: {
-              beginAtZero: true,
-              ticks: {
-                callback: function(value) {
-                  return formatCurrency(value);
-                }
-              }
+        title: {
+          display: false
+        }
+      },
+      scales: {
+        y: {
+          beginAtZero: true,
+          ticks: {
+            callback: function(value) {
+              return formatCurrency(value);
             }
           }
         }
-      });
+      }
     }
-  } catch (error) {
-    console.error('Error loading monthly trend chart:', error);
-  }
+  });
 }
 
 async function loadYearlySummaryChart(year = null) {
@@ -2344,52 +2414,55 @@ async function loadYearlySummaryChart(year = null) {
     const response = await apiRequest(`/analytics/yearly-summary?year=${year}`);
     if (response.ok) {
       const data = await response.json();
-      
-      const ctx = document.getElementById('yearlySummaryChart');
-      if (!ctx) return;
-
-      // Destroy existing chart
-      if (yearlySummaryChart) {
-        yearlySummaryChart.destroy();
-      }
+      renderYearlySummaryChart(data);
+    }
+  } catch (error) {
+    console.error('Error loading yearly summary chart:', error);
+  }
+}
 
-      yearlySummaryChart = new Chart(ctx, {
-        type: 'bar',
-        data: {
-          labels: data.labels,
-          datasets: data.datasets.map(ds => ({
-            ...ds,
-            borderWidth: 1,
-            borderRadius: 4
-          }))
+function renderYearlySummaryChart(data) {
+  const ctx = document.getElementById('yearlySummaryChart');
+  if (!ctx) return;
+
+  // Destroy existing chart
+  if (yearlySummaryChart) {
+    yearlySummaryChart.destroy();
+  }
+
+  yearlySummaryChart = new Chart(ctx, {
+    type: 'bar',
+    data: {
+      labels: data.labels,
+      datasets: data.datasets.map(ds => ({
+        ...ds,
+        borderWidth: 1,
+        borderRadius: 4
+      }))
+    },
+    options: {
+      responsive: true,
+      maintainAspectRatio: true,
+      plugins: {
+        legend: {
+          position: 'top',
         },
-        options: {
-          responsive: true,
-          maintainAspectRatio: true,
-          plugins: {
-            legend: {
-              position: 'top',
-            },
-            title: {
-              display: false
-            }
-          },
-          scales: {
-            y: {
-              beginAtZero: true,
-              ticks: {
-                callback: function(value) {
-                  return formatCurrency(value);
-                }
-              }
+        title: {
+          display: false
+        }
+      },
+      scales: {
+        y: {
+          beginAtZero: true,
+          ticks: {
+            callback: function(value) {
+              return formatCurrency(value);
             }
           }
         }
-      });
+      }
     }
-  } catch (error) {
-    console.error('Error loading yearly summary chart:', error);
-  }
+  });
 }
 
 function populateYearSelector() {
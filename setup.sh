@@ -42,6 +42,22 @@ else
     exit 1
 fi
 
+mysql -u root -p < Notifications_Schema.sql
+if [ $? -eq 0 ]; then
+    echo "✓ Notifications table created successfully"
+else
+    echo "❌ Failed to create notifications table"
+    exit 1
+fi
+
+mysql -u root -p < Performance_Tables.sql
+if [ $? -eq 0 ]; then
+    echo "✓ Performance tables created successfully"
+else
+    echo "❌ Failed to create performance tables"
+    exit 1
+fi
+
 # Step 2: Backend Setup
 echo ""
 echo "Step 2: Setting up backend..."